@@ -1,9 +1,10 @@
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from functools import wraps
 from typing import Optional, Callable, TYPE_CHECKING, Union, Any, cast
 
 from django.contrib import admin
 from django.db import models
+from django.db.models import F
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.datastructures import MultiValueDict
@@ -14,8 +15,9 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 
 from integration_utils.bitrix24.types import ItsRequest
-from integration_utils.bitrix_robots.errors import VerificationError, DelayProcess
-from integration_utils.bitrix_robots.helpers import get_php_style_list
+from integration_utils.bitrix_robots.errors import AttemptsExceeded, VerificationError, DelayProcess
+from integration_utils.bitrix_robots.indexes import PartialIndex
+from integration_utils.bitrix_robots.props_schema import RobotPropsSchema
 from settings import ilogger
 
 import django
@@ -63,6 +65,25 @@ class BaseBitrixRobot(models.Model):
     # True активирует валидацию и приведение пропсов к нужным типам
     VALIDATE_PROPS = False
 
+    # Запрос, который взят в обработку (started) и не завершен (finished) дольше этого времени,
+    # считается брошенным упавшим воркером и возвращается в очередь process_robot_requests.
+    # Должно быть больше максимального времени обработки одного запроса. None - не возвращать.
+    LEASE_TIMEOUT_SECONDS = 60 * 60
+    # Запросы, взятые в обработку раньше этого времени, в очередь не возвращаются: это запросы
+    # упавших воркеров до появления повторов, их bizproc.event.send давно никому не нужен.
+    # None - возвращать любые брошенные запросы.
+    LEASE_RECLAIM_WINDOW_SECONDS = 24 * 60 * 60
+
+    # Сколько раз запрос берется в обработку (claim). Если последняя попытка отложена (DelayProcess)
+    # или брошена по LEASE_TIMEOUT_SECONDS, запрос завершается с ошибкой AttemptsExceeded. None - без ограничения.
+    MAX_ATTEMPTS = 10
+
+    # Модель-наследник BaseBitrixRobotArchive (класс или 'app_label.ModelName'),
+    # куда integration_utils.bitrix_robots.cron.archive_robot_requests переносит завершенные запросы
+    ARCHIVE_MODEL = None
+    # Через сколько дней после finished запрос переносится в архив
+    ARCHIVE_AFTER_DAYS = 30
+
     token = models.ForeignKey('BitrixUserToken', on_delete=models.PROTECT)
     event_token = models.CharField(max_length=255, null=True, blank=True)
     params = JSONField()
@@ -74,12 +95,26 @@ class BaseBitrixRobot(models.Model):
     result = JSONField(null=True, blank=True)
     is_hook_request = models.BooleanField(default=False)
     send_result_response = models.TextField(null=True, blank=True)
+    # не брать из очереди раньше этого времени (DelayProcess(retry_at=...))
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # сколько раз запрос взят в обработку через claim()
+    attempts = models.PositiveIntegerField(default=0)
 
     class Meta:
         abstract = True
+        indexes = [
+            # очередь process_robot_requests: started IS NULL ORDER BY dt_add
+            PartialIndex(fields=['dt_add'], condition=models.Q(started__isnull=True)),
+            # поиск брошенных запросов с истекшим LEASE_TIMEOUT_SECONDS
+            PartialIndex(fields=['started'], condition=models.Q(finished__isnull=True)),
+            # фильтры админки
+            models.Index(fields=['is_success', 'dt_add']),
+            # выборка для архивации
+            models.Index(fields=['finished']),
+        ]
 
     class Admin(admin.ModelAdmin):
-        list_display = ['id', 'token', 'dt_add', 'started', 'finished', 'is_success']
+        list_display = ['id', 'token', 'dt_add', 'started', 'finished', 'is_success', 'next_attempt_at', 'attempts']
         list_display_links = list_display
         list_filter = ['is_success', 'dt_add', 'finished']
         raw_id_fields = ['token']
@@ -97,16 +132,18 @@ class BaseBitrixRobot(models.Model):
         """
         if self.is_hook_request:
             return
-        for prop_name, desc in self.PROPERTIES.items():
-            prop = None
-            for prop_var in ['properties[{}]'.format(prop_name), 'properties[{}][0]'.format(prop_name)]:
-                if prop_var in self.params:
-                    prop = prop_var
-            if not prop:
-                return
-            if desc.get('Multiple') != 'Y' and desc.get('Type') == 'string':
-                # числа с большой разрядностью ведут сбя странно при сохранении в jsonfield
-                self.params[prop] = str(self.params[prop])
+        self.get_props_schema().fix_json_params(self.params)
+
+    @classmethod
+    def get_props_schema(cls) -> RobotPropsSchema:
+        """
+        Скомпилированная схема PROPERTIES, строится один раз на класс
+        """
+        schema = cls.__dict__.get('_props_schema')
+        if schema is None or schema.properties is not cls.PROPERTIES:
+            schema = RobotPropsSchema(cls)
+            cls._props_schema = schema
+        return schema
 
     @classmethod
     def handler_url(cls, view_name):
@@ -253,7 +290,8 @@ class BaseBitrixRobot(models.Model):
                 request.its_error_response = True
                 return HttpResponse("Robot save exception", status=500)
 
-            if cls.PROCESS_ON_REQUEST:
+            # claim: запрос мог уже взять process_robot_requests
+            if cls.PROCESS_ON_REQUEST and robot.claim():
                 try:
                     robot.start_process()
                 except Exception as e:
@@ -283,7 +321,7 @@ class BaseBitrixRobot(models.Model):
         def view(request):
             robot = cls.from_hook_request(request)
 
-            if not cls.PROCESS_ON_REQUEST:
+            if not cls.PROCESS_ON_REQUEST or not robot.claim():
                 return JsonResponse(dict(request_id=robot.id))
 
             robot.start_process()
@@ -515,50 +553,9 @@ class BaseBitrixRobot(models.Model):
     def validate_props(self) -> dict:
         """
         Проверяет типы значений свойств, которые прислал Битрикс.
-        Сейчас проверяет одиночные int, bool, string и text.
+        Проверяет одиночные int, bool, string, text, double, date, datetime и select.
         """
-        errors = []
-
-        for prop_name, prop_value in self.props.items():
-            try:
-                prop_config = self.PROPERTIES.get(prop_name, {})
-                prop_type = prop_config.get('Type')
-                multiple = prop_config.get('Multiple')
-                required = prop_config.get('Required', 'N') == 'Y'
-                options = prop_config.get('Options', {})
-
-                if prop_type == 'int' and multiple != 'Y':
-                    self.props[prop_name] = self.safe_int(prop_value, required=required)
-
-                elif prop_type == 'bool' and multiple != 'Y':
-                    self.props[prop_name] = self.safe_bool(prop_value, required=required)
-
-                elif prop_type == 'string' and multiple != 'Y':
-                    self.props[prop_name] = self.safe_string(prop_value, required=required)
-
-                elif prop_type == 'text' and multiple != 'Y':
-                    self.props[prop_name] = self.safe_text(prop_value, required=required)
-
-                elif prop_type == 'double' and multiple != 'Y':
-                    self.props[prop_name] = self.safe_double(prop_value, required=required)
-
-                elif prop_type == 'date' and multiple != 'Y':
-                    self.props[prop_name] = self.safe_date(prop_value, required=required)
-
-                elif prop_type == 'datetime' and multiple != 'Y':
-                    self.props[prop_name] = self.safe_datetime(prop_value, required=required)
-
-                elif prop_type == 'select' and multiple != 'Y':
-                    self.props[prop_name] = self.safe_select(prop_value, options=options, required=required)
-
-            except ValidationError as exc:
-                errors.append(f'Ошибка в поле "{prop_name}": {exc.message}.')
-
-        if errors:
-            # Если есть хотя бы одна ошибка, выбрасываем их все одним исключением
-            raise ValidationError(' '.join(errors))
-
-        return self.props
+        return self.get_props_schema().validate(self.props)
 
     @cached_property
     def props(self) -> dict:
@@ -568,20 +565,7 @@ class BaseBitrixRobot(models.Model):
         if self.is_hook_request:
             return self.params.get('properties', {})
 
-        res = {}
-        query_dict_params = self.get_query_dict_params()
-        for prop, desc in self.PROPERTIES.items():
-            full_prop = 'properties[%s]' % prop
-            # иногда параметры приходят в виде 'properties[prop_name][0]', даже если поле не множественное
-            full_prop_0 = 'properties[%s][0]' % prop
-            default = desc.get('Default')
-
-            if desc.get('Multiple') == 'Y':
-                res[prop] = get_php_style_list(query_dict_params, full_prop, [])
-            else:
-                res[prop] = self.params.get(full_prop, self.params.get(full_prop_0, default))
-
-        return res
+        return self.get_props_schema().parse(self.params)
 
     def get_query_dict_params(self):
         query_dict = QueryDict('', mutable=True)
@@ -602,11 +586,17 @@ class BaseBitrixRobot(models.Model):
             self.result = self.process()
             self.is_success = True
 
-        except DelayProcess:
-            # вернуть запрос в очередь
-            self.started = None
-            self.save(update_fields=['started'])
-            return
+        except DelayProcess as exc:
+            if self.MAX_ATTEMPTS is None or self.attempts < self.MAX_ATTEMPTS:
+                # вернуть запрос в очередь
+                self.started = None
+                self.next_attempt_at = exc.retry_at
+                self.save(update_fields=['started', 'next_attempt_at'])
+                return
+
+            self.result = self.get_error_result(AttemptsExceeded(self.attempts))
+            self.is_success = False
+            ilogger.warning(f'robot_attempts_exceeded_{type(self).__name__}', f'request id {self.id}: {exc}')
 
         except ValidationError as exc:
             self.result = self.get_error_result(exc)
@@ -671,7 +661,126 @@ class BaseBitrixRobot(models.Model):
         """
         raise NotImplementedError
 
+    def claim(self) -> bool:
+        """
+        Атомарно взять запрос из очереди и увеличить attempts.
+        False, если его уже взял другой процесс.
+        """
+        started = timezone.now()
+        claimed = type(self).objects.filter(id=self.id, started__isnull=True).update(
+            started=started, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            self.started = started
+            self.attempts += 1
+        return bool(claimed)
+
+    def fail_attempts_exceeded(self) -> bool:
+        """
+        Завершить с ошибкой AttemptsExceeded брошенный запрос, который исчерпал MAX_ATTEMPTS,
+        и отправить ошибку в бизнес-процесс.
+        False, если запрос уже завершил другой процесс.
+        """
+        self.result = self.get_error_result(AttemptsExceeded(self.attempts))
+        self.is_success = False
+        self.finished = timezone.now()
+        finished = type(self).objects.filter(id=self.id, started=self.started, finished__isnull=True).update(
+            finished=self.finished, result=self.result, is_success=False,
+        )
+        if not finished:
+            return False
+        ilogger.error(f'robot_attempts_exceeded_{type(self).__name__}', f'request id {self.id}: lease expired')
+        self.send_result()
+        return True
+
+    @classmethod
+    def release_expired_leases(cls, qs=None) -> int:
+        """
+        Вернуть в очередь запросы, обработка которых не завершилась за LEASE_TIMEOUT_SECONDS.
+        Запросы, исчерпавшие MAX_ATTEMPTS, не возвращаются, а завершаются с ошибкой (fail_attempts_exceeded).
+        Запросы, взятые раньше LEASE_RECLAIM_WINDOW_SECONDS, не трогаются.
+
+        :return: сколько запросов возвращено в очередь
+        """
+        if cls.LEASE_TIMEOUT_SECONDS is None:
+            return 0
+        if qs is None:
+            qs = cls.objects.all()
+        now = timezone.now()
+        expired = qs.filter(finished__isnull=True, started__lt=now - timedelta(seconds=cls.LEASE_TIMEOUT_SECONDS))
+        if cls.LEASE_RECLAIM_WINDOW_SECONDS is not None:
+            expired = expired.filter(started__gte=now - timedelta(seconds=cls.LEASE_RECLAIM_WINDOW_SECONDS))
+        if cls.MAX_ATTEMPTS is not None:
+            for robot in expired.filter(attempts__gte=cls.MAX_ATTEMPTS):
+                robot.fail_attempts_exceeded()
+            expired = expired.filter(attempts__lt=cls.MAX_ATTEMPTS)
+        return expired.update(started=None)
+
     @classmethod
     def process_robot_requests(cls):
         from integration_utils.bitrix_robots.cron import process_robot_requests
         return process_robot_requests(cls)
+
+    @classmethod
+    def archive_robot_requests(cls):
+        from integration_utils.bitrix_robots.cron import archive_robot_requests
+        return archive_robot_requests(cls)
+
+
+class BaseBitrixRobotArchive(models.Model):
+    """
+    Архив завершенных запросов робота.
+
+    Пример:
+        class ExampleRobotArchive(BaseBitrixRobotArchive):
+            pass
+
+        class ExampleRobot(BaseRobot):
+            ARCHIVE_MODEL = 'example_robot.ExampleRobotArchive'
+    """
+    original_id = models.BigIntegerField(db_index=True)
+    token_id = models.BigIntegerField(null=True, blank=True)
+    event_token = models.CharField(max_length=255, null=True, blank=True)
+    params = JSONField()
+
+    dt_add = models.DateTimeField()
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True, db_index=True)
+    is_success = models.BooleanField(default=False)
+    result = JSONField(null=True, blank=True)
+    is_hook_request = models.BooleanField(default=False)
+    send_result_response = models.TextField(null=True, blank=True)
+
+    dt_archived = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        abstract = True
+
+    class Admin(admin.ModelAdmin):
+        list_display = ['id', 'original_id', 'token_id', 'dt_add', 'finished', 'is_success']
+        list_display_links = list_display
+        list_filter = ['is_success']
+        search_fields = ['=original_id']
+
+    def __str__(self):
+        return '[{}] {} ({})'.format(self.original_id, self.token_id, self.dt_add)
+
+    @classmethod
+    def from_robot(cls, robot: BaseBitrixRobot) -> 'BaseBitrixRobotArchive':
+        """
+        Построить запись архива из запроса робота.
+        Переопределить, если у робота есть собственные поля, которые нужно сохранить.
+        """
+        return cls(
+            original_id=robot.id,
+            token_id=robot.token_id,
+            event_token=robot.event_token,
+            params=robot.params,
+            dt_add=robot.dt_add,
+            started=robot.started,
+            finished=robot.finished,
+            is_success=robot.is_success,
+            result=robot.result,
+            is_hook_request=robot.is_hook_request,
+            send_result_response=robot.send_result_response,
+        )
@@ -0,0 +1,186 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from unittest import mock
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+# /rest/app.info.json, /rest/1/webhook_key/profile.json
+REST_PATH_RE = re.compile(r'^/rest/(?:.+/)?(?P<method>[^/]+?)(?:\.json)?$')
+# cmd[name] в запросе batch
+BATCH_CMD_RE = re.compile(r'^cmd\[(?P<name>[^\]]+)\]$')
+
+
+class FakeBitrixServer:
+    """
+    Локальная заглушка REST API Битрикс24 для нагрузочных тестов роботов.
+
+    Отвечает на app.info, profile, bizproc.event.send и batch, остальные методы возвращают {'result': True}.
+    latency - задержка каждого ответа в секундах, error_503_rate - доля ответов 503 (QUERY_LIMIT_EXCEEDED).
+
+    Example:
+        with FakeBitrixServer(latency=0.05, error_503_rate=0.01) as server, server.redirect_api_calls():
+            token.call_api_method('profile')
+        print(server.calls)
+    """
+
+    def __init__(self, app_code: str = 'local.fake', latency: float = 0, error_503_rate: float = 0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.app_code = app_code
+        self.latency = latency
+        self.error_503_rate = error_503_rate
+        # метод -> количество вызовов (методы внутри batch считаются отдельно)
+        self.calls = Counter()
+        self.errors_503 = 0
+        self._lock = threading.Lock()
+        self._handlers = {
+            'app.info': self._app_info,
+            'profile': self._profile,
+            'bizproc.event.send': self._bizproc_event_send,
+        }  # type: Dict[str, Callable[[dict], dict]]
+        self._httpd = ThreadingHTTPServer((host, port), self._make_request_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None  # type: Optional[threading.Thread]
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def add_handler(self, method: str, handler: Callable[[dict], dict]):
+        """
+        Ответ на произвольный метод: handler(params) -> dict с ключом result
+        """
+        self._handlers[method] = handler
+
+    def start(self) -> 'FakeBitrixServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @contextmanager
+    def redirect_api_calls(self):
+        """
+        Перенаправить api_call (https://<портал>/rest/...) на этот сервер.
+        Подменяется только requests внутри integration_utils.bitrix24.functions.api_call.
+        """
+        from integration_utils.bitrix24.functions import api_call as api_call_module
+
+        server_url = self.url
+
+        class RequestsProxy:
+            def __getattr__(self, item):
+                return getattr(requests, item)
+
+            @staticmethod
+            def post(url, *args, **kwargs):
+                parts = urlsplit(url)
+                kwargs.pop('verify', None)
+                return requests.post(server_url + parts.path, *args, **kwargs)
+
+        with mock.patch.object(api_call_module, 'requests', RequestsProxy()):
+            yield self
+
+    def _count(self, method: str):
+        with self._lock:
+            self.calls[method] += 1
+
+    def _should_fail_503(self) -> bool:
+        if self.error_503_rate and random.random() < self.error_503_rate:
+            with self._lock:
+                self.errors_503 += 1
+            return True
+        return False
+
+    def _app_info(self, params: dict) -> dict:
+        return {'result': {'ID': 1, 'CODE': self.app_code, 'VERSION': 1, 'STATUS': 'L', 'INSTALLED': True}}
+
+    def _profile(self, params: dict) -> dict:
+        return {'result': {'ID': '1', 'ADMIN': True, 'NAME': 'Fake', 'LAST_NAME': 'Bitrix'}}
+
+    def _bizproc_event_send(self, params: dict) -> dict:
+        return {'result': True}
+
+    def _call(self, method: str, params: dict) -> dict:
+        self._count(method)
+        handler = self._handlers.get(method)
+        if handler is None:
+            return {'result': True}
+        return handler(params)
+
+    def _batch(self, params: dict) -> dict:
+        self._count('batch')
+        result, result_error, result_time = {}, {}, {}
+        for key, value in params.items():
+            match = BATCH_CMD_RE.match(key)
+            if not match:
+                continue
+            name = match.group('name')
+            method, _, query = value.partition('?')
+            response = self._call(method, dict(parse_qsl(query)))
+            if 'error' in response:
+                result_error[name] = response
+            else:
+                result[name] = response.get('result')
+            result_time[name] = {'operating': 0}
+        return {'result': {
+            'result': result, 'result_error': result_error, 'result_time': result_time,
+            'result_total': {}, 'result_next': {},
+        }, 'time': {'operating': 0}}
+
+    def _make_request_handler(self):
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8')
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                match = REST_PATH_RE.match(urlsplit(self.path).path)
+                if not match:
+                    return self._reply(404, {'error': 'ERROR_METHOD_NOT_FOUND'})
+                if server._should_fail_503():
+                    return self._reply(503, {'error': 'QUERY_LIMIT_EXCEEDED', 'error_description': 'Too many requests'})
+
+                method = match.group('method')
+                params = dict(parse_qsl(body, keep_blank_values=True))
+                if method == 'batch':
+                    return self._reply(200, server._batch(params))
+                return self._reply(200, server._call(method, params))
+
+            def _reply(self, status: int, data: dict):
+                payload = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return RequestHandler
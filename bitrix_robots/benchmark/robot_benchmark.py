@@ -0,0 +1,247 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Type
+from unittest import mock
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+
+from integration_utils.bitrix_robots.base import BaseBitrixRobot
+from integration_utils.bitrix_robots.benchmark.fake_bitrix import FakeBitrixServer
+
+MODE_VIEW = 'view'
+MODE_HOOK = 'hook'
+MODE_CRON = 'cron'
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Перцентиль методом ближайшего ранга
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class QueryCounter:
+    """
+    Считает SQL-запросы текущего потока через connection.execute_wrapper
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class LoadTestReport:
+    def __init__(self, robot_cls: Type[BaseBitrixRobot], mode: str, concurrency: int):
+        self.robot_cls = robot_cls
+        self.mode = mode
+        self.concurrency = concurrency
+        # длительность каждого запроса (для cron - каждого запуска process_robot_requests) в секундах
+        self.latencies = []  # type: List[float]
+        self.queries = []  # type: List[int]
+        self.statuses = {}  # type: dict
+        self.elapsed = 0.0
+        self.processed = 0
+        self.bitrix_calls = {}  # type: dict
+        self.bitrix_503 = 0
+
+    @property
+    def robots_per_second(self) -> float:
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        ms = lambda seconds: '{:.1f}ms'.format(seconds * 1000)
+        queries = sum(self.queries) / len(self.queries) if self.queries else 0
+        return '\n'.join([
+            '{} [{}] concurrency={}'.format(self.robot_cls.__name__, self.mode, self.concurrency),
+            'requests: {}, statuses: {}'.format(len(self.latencies), self.statuses),
+            'p50: {}, p95: {}, p99: {}'.format(
+                ms(percentile(self.latencies, 50)),
+                ms(percentile(self.latencies, 95)),
+                ms(percentile(self.latencies, 99)),
+            ),
+            'db queries per request: {:.1f}'.format(queries),
+            'robots processed: {}, {:.1f}/s'.format(self.processed, self.robots_per_second),
+            'bitrix calls: {}, 503: {}'.format(dict(self.bitrix_calls), self.bitrix_503),
+        ])
+
+
+def _robot_post_data(robot_cls: Type[BaseBitrixRobot], token, properties: dict, i: int,
+                     application_token: str) -> dict:
+    """
+    Form-encoded POST, как его присылает Битрикс при срабатывании робота
+    """
+    data = {
+        'code': robot_cls.CODE,
+        'event_token': '{}|{}'.format(uuid.uuid4().hex, i),
+        'document_id[0]': 'crm',
+        'document_id[1]': 'CCrmDocumentDeal',
+        'document_id[2]': 'DEAL_{}'.format(i),
+        'document_type[0]': 'crm',
+        'document_type[1]': 'CCrmDocumentDeal',
+        'document_type[2]': 'DEAL',
+        'use_subscription': 'Y',
+        'ts': str(int(time.time())),
+        'auth[access_token]': token.auth_token,
+        'auth[refresh_token]': token.refresh_token,
+        'auth[member_id]': 'fake_member_id',
+        'auth[application_token]': application_token,
+        'auth[user_id]': str(token.user.bitrix_id),
+        'auth[domain]': token.domain,
+    }
+    for prop, value in properties.items():
+        if isinstance(value, (list, tuple)):
+            for ix, item in enumerate(value):
+                data['properties[{}][{}]'.format(prop, ix)] = item
+        else:
+            data['properties[{}]'.format(prop)] = value
+    return data
+
+
+def run_robot_load_test(
+        robot_cls,
+        token,
+        properties: dict,
+        requests_count: int = 200,
+        concurrency: int = 10,
+        mode: str = MODE_VIEW,
+        latency: float = 0.05,
+        error_503_rate: float = 0,
+        verify_via_app_info: bool = True,
+        cleanup: bool = True,
+        server: Optional[FakeBitrixServer] = None,
+) -> LoadTestReport:
+    """
+    Нагрузочный тест робота против локальной заглушки Битрикс24 (FakeBitrixServer).
+
+    Запускать на тестовой БД: создаются запросы робота и, в режиме view, пользователь/токен из auth[...].
+
+    view - N параллельных form-encoded POST в robot_cls.as_view()
+    hook - N параллельных JSON POST в robot_cls.as_hook() с авторизацией по cookie
+    cron - N запросов сохраняются через as_view() без обработки, затем их разбирают
+           concurrency параллельных process_robot_requests (разбирается вся очередь robot_cls)
+
+    Example:
+        from integration_utils.bitrix_robots.benchmark.robot_benchmark import run_robot_load_test
+        print(run_robot_load_test(ExampleRobot, BitrixUserToken.objects.first(),
+                                  properties={'to': '1', 'message': 'hi'}, mode='cron'))
+
+    :param token: BitrixUserToken, от имени которого приходят запросы
+    :param properties: значения PROPERTIES робота
+    :param latency: задержка ответа заглушки в секундах
+    :param error_503_rate: доля ответов 503 от заглушки
+    :param verify_via_app_info: присылать чужой application_token, чтобы verify_event вызывал app.info
+    :param cleanup: удалить созданные запросы робота после теста
+    """
+    if isinstance(robot_cls, str):
+        robot_cls = import_string(robot_cls)
+    if mode not in (MODE_VIEW, MODE_HOOK, MODE_CRON):
+        raise ValueError('unknown mode: {}'.format(mode))
+
+    app_settings = getattr(settings, 'APP_SETTINGS', None)
+    application_token = getattr(app_settings, 'application_token', None) or ''
+    if verify_via_app_info:
+        application_token = 'fake_' + uuid.uuid4().hex
+    own_server = server is None
+    if own_server:
+        server = FakeBitrixServer(
+            app_code=getattr(app_settings, 'application_bitrix_client_id', None) or 'local.fake',
+            latency=latency,
+            error_503_rate=error_503_rate,
+        ).start()
+
+    report = LoadTestReport(robot_cls, mode, concurrency)
+    factory = RequestFactory()
+    max_id_before = robot_cls.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    status_lock = threading.Lock()
+
+    def timed(fn, *args):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(counter):
+                response = fn(*args)
+            elapsed = time.perf_counter() - started
+        finally:
+            # потоки пула переиспользуются, соединение открывается заново, как при CONN_MAX_AGE=0
+            connections.close_all()
+        with status_lock:
+            report.latencies.append(elapsed)
+            report.queries.append(counter.count)
+            status = getattr(response, 'status_code', None)
+            report.statuses[status] = report.statuses.get(status, 0) + 1
+        return response
+
+    def send_view_request(i):
+        data = _robot_post_data(robot_cls, token, properties, i, application_token)
+        request = factory.post('/robot/', data=urlencode(data), content_type='application/x-www-form-urlencoded')
+        return timed(robot_view, request)
+
+    def send_hook_request(i):
+        request = factory.post(
+            '/robot/hook/',
+            data=json.dumps({'properties': properties}),
+            content_type='application/json',
+        )
+        request.COOKIES['b24app_auth_{}'.format(app_settings.app_name)] = token.signed_pk()
+        return timed(robot_hook, request)
+
+    def process_queue(worker_ix):
+        return timed(robot_cls.process_robot_requests)
+
+    try:
+        with server.redirect_api_calls():
+            if mode == MODE_HOOK:
+                robot_hook = robot_cls.as_hook()
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    list(executor.map(send_hook_request, range(requests_count)))
+                report.elapsed = time.perf_counter() - started
+
+            elif mode == MODE_VIEW:
+                robot_view = robot_cls.as_view()
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    list(executor.map(send_view_request, range(requests_count)))
+                report.elapsed = time.perf_counter() - started
+
+            else:
+                robot_view = robot_cls.as_view()
+                with mock.patch.object(robot_cls, 'PROCESS_ON_REQUEST', False):
+                    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                        list(executor.map(send_view_request, range(requests_count)))
+                # замеряется только разбор очереди
+                report.latencies, report.queries, report.statuses = [], [], {}
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    list(executor.map(process_queue, range(concurrency)))
+                report.elapsed = time.perf_counter() - started
+
+        created = robot_cls.objects.filter(id__gt=max_id_before)
+        report.processed = created.filter(finished__isnull=False).count()
+        if mode == MODE_CRON and report.processed:
+            # для cron интереснее запросы к БД на одного робота, а не на запуск process_robot_requests
+            report.queries = [sum(report.queries) // report.processed] * report.processed
+
+        report.bitrix_calls = dict(server.calls)
+        report.bitrix_503 = server.errors_503
+
+        if cleanup:
+            created.delete()
+    finally:
+        if own_server:
+            server.stop()
+
+    return report
@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+import requests
+
+from integration_utils.bitrix_robots.benchmark.fake_bitrix import FakeBitrixServer
+
+
+class FakeBitrixServerTest(TestCase):
+    def test_methods_and_batch(self):
+        with FakeBitrixServer(app_code='local.test') as server:
+            app_info = requests.post(server.url + '/rest/app.info.json', data={'auth': 'x'}).json()
+            self.assertEqual(app_info['result']['CODE'], 'local.test')
+
+            # так кодирует cmd convert_methods: & внутри команды квотируется как %26
+            batch = requests.post(
+                server.url + '/rest/batch.json',
+                data='cmd[p]=profile?&cmd[send]=bizproc.event.send?event_token=1%26return_values[ok]=Y',
+                headers={'Content-Type': 'application/x-www-form-urlencoded'},
+            ).json()['result']
+            self.assertEqual(batch['result']['p']['ID'], '1')
+            self.assertIs(batch['result']['send'], True)
+
+        self.assertEqual(server.calls['app.info'], 1)
+        self.assertEqual(server.calls['bizproc.event.send'], 1)
+        self.assertEqual(server.calls['batch'], 1)
+
+    def test_503_injection(self):
+        with FakeBitrixServer(error_503_rate=1) as server:
+            response = requests.post(server.url + '/rest/profile.json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(server.errors_503, 1)
+
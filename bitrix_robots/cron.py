@@ -1,3 +1,9 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.module_loading import import_string
 
 from settings import ilogger
@@ -11,11 +17,26 @@ def process_robot_requests(robot_cls, qs = None, qs_limit: int = None):
     if qs is None:
         qs = robot_cls.objects.all()
 
-    qs_not_started = qs.filter(started__isnull=True)
+    released = robot_cls.release_expired_leases(qs)
+    if released:
+        ilogger.warning(
+            'robot_lease_expired_{}'.format(robot_cls.__name__),
+            'returned to queue: {}'.format(released),
+        )
+
+    # порядок по dt_add покрывается частичным индексом BaseBitrixRobot.Meta.indexes
+    qs_not_started = qs.filter(
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now()),
+        started__isnull=True,
+    ).order_by('dt_add')
     if qs_limit:
         qs_not_started = qs_not_started[:qs_limit]
 
     for robot in qs_not_started.iterator():
+        if not robot.claim():
+            # уже обрабатывается другим процессом
+            continue
+
         try:
             robot.start_process()
         except Exception as exc:
@@ -38,3 +59,41 @@ def process_robot_requests(robot_cls, qs = None, qs_limit: int = None):
     return '\n\n'.join('{}\nprocessed: {}\nerrors: {}\nwaiting: {}'.format(
         portal, result['processed'], result['errors'], result['waiting']
     ) for portal, result in portal_results.items()).strip() or 'nothing to process'
+
+
+def archive_robot_requests(robot_cls, qs=None, days: int = None, batch_size: int = 1000,
+                           delete_without_archive: bool = False):
+    """
+    Переносит завершенные запросы робота старше days дней в robot_cls.ARCHIVE_MODEL пачками по batch_size.
+    Каждая пачка переносится в отдельной транзакции, чтобы не держать долгих блокировок.
+
+    Если ARCHIVE_MODEL не задана, запросы только удаляются и только при delete_without_archive=True.
+    """
+    if isinstance(robot_cls, str):
+        robot_cls = import_string(robot_cls)
+
+    archive_model = robot_cls.ARCHIVE_MODEL
+    if isinstance(archive_model, str):
+        archive_model = apps.get_model(archive_model)
+    if archive_model is None and not delete_without_archive:
+        raise ValueError('{}.ARCHIVE_MODEL is not set'.format(robot_cls.__name__))
+
+    if days is None:
+        days = robot_cls.ARCHIVE_AFTER_DAYS
+    if qs is None:
+        qs = robot_cls.objects.all()
+
+    qs_finished = qs.filter(finished__lt=timezone.now() - timedelta(days=days)).order_by('finished')
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            robots = list(qs_finished[:batch_size])
+            if not robots:
+                break
+            if archive_model is not None:
+                archive_model.objects.bulk_create([archive_model.from_robot(robot) for robot in robots])
+            robot_cls.objects.filter(id__in=[robot.id for robot in robots]).delete()
+        archived += len(robots)
+
+    return '{}\narchived: {}'.format(robot_cls.__name__, archived) if archived else 'nothing to archive'
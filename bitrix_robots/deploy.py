@@ -0,0 +1,172 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from django.db import connections
+
+from settings import ilogger
+
+if TYPE_CHECKING:
+    from integration_utils.bitrix24.bitrix_token import BaseBitrixToken
+    from integration_utils.bitrix_robots.base import BaseBitrixRobot
+
+    # Класс робота (view берется из HANDLER_VIEW_NAME) или пара (класс, имя view)
+    RobotSpec = Union[Type[BaseBitrixRobot], Tuple[Type[BaseBitrixRobot], str]]
+
+
+class RobotDeployReport:
+    """
+    Результат установки роботов на одном портале
+    """
+    def __init__(self, portal: str):
+        self.portal = portal
+        self.added = []  # type: List[str]
+        self.updated = []  # type: List[str]
+        self.deleted = []  # type: List[str]
+        # CODE робота -> ошибка Битрикс из batch
+        self.errors = {}  # type: Dict[str, object]
+        # исключение, из-за которого портал не обработан целиком
+        self.exception = None  # type: Optional[Exception]
+
+    @property
+    def ok(self) -> bool:
+        return self.exception is None and not self.errors
+
+    def __str__(self):
+        if self.exception is not None:
+            return '{}\nexception: {}'.format(self.portal, self.exception)
+        lines = [
+            self.portal,
+            'added: {}'.format(', '.join(self.added) or '-'),
+            'updated: {}'.format(', '.join(self.updated) or '-'),
+            'deleted: {}'.format(', '.join(self.deleted) or '-'),
+        ]
+        lines.extend('error {}: {}'.format(code, error) for code, error in self.errors.items())
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return '<{} {} ok={}>'.format(type(self).__name__, self.portal, self.ok)
+
+
+def _normalize_robots(robots: Sequence['RobotSpec']) -> List[Tuple[Type['BaseBitrixRobot'], str]]:
+    normalized = []
+    for robot in robots:
+        if isinstance(robot, tuple):
+            robot_cls, view_name = robot
+        else:
+            robot_cls, view_name = robot, getattr(robot, 'HANDLER_VIEW_NAME', None)
+        if not view_name:
+            raise ValueError('{}: HANDLER_VIEW_NAME is not set'.format(robot_cls.__name__))
+        normalized.append((robot_cls, view_name))
+    return normalized
+
+
+def _get_portal(token: 'BaseBitrixToken') -> str:
+    return str(getattr(token, 'domain', None) or token)
+
+
+def _get_auth_user_id(token: 'BaseBitrixToken') -> Optional[int]:
+    user = getattr(token, 'user', None)
+    return getattr(user, 'bitrix_id', None)
+
+
+def deploy_robots_to_portal(
+        robots: Sequence[Tuple[Type['BaseBitrixRobot'], str]],
+        token: 'BaseBitrixToken',
+        delete_missing: bool = False,
+        timeout: int = 30,
+) -> RobotDeployReport:
+    """
+    Установить/обновить роботов на одном портале:
+    один bizproc.robot.list и один batch со всеми add/update/delete.
+
+    :param robots: пары (класс робота, имя view обработчика)
+    :param delete_missing: удалить роботы приложения, которых нет в robots
+    """
+    report = RobotDeployReport(_get_portal(token))
+    auth_user_id = _get_auth_user_id(token)
+
+    installed_codes = set(token.call_list_method_v2('bizproc.robot.list', timeout=timeout))
+
+    methods = []
+    actions = {}
+    for robot_cls, view_name in robots:
+        if robot_cls.CODE in installed_codes:
+            params = robot_cls._robot_update_params(view_name, auth_user_id)
+            if auth_user_id is None:
+                params['FIELDS'].pop('AUTH_USER_ID')
+            methods.append((robot_cls.CODE, 'bizproc.robot.update', params))
+            actions[robot_cls.CODE] = report.updated
+        else:
+            params = robot_cls._robot_add_params(view_name, auth_user_id)
+            if auth_user_id is None:
+                params.pop('AUTH_USER_ID')
+            methods.append((robot_cls.CODE, 'bizproc.robot.add', params))
+            actions[robot_cls.CODE] = report.added
+
+    if delete_missing:
+        for code in sorted(installed_codes - set(actions)):
+            methods.append((code, 'bizproc.robot.delete', dict(CODE=code)))
+            actions[code] = report.deleted
+
+    if not methods:
+        return report
+
+    batch_result = token.batch_api_call(methods, timeout=timeout)
+    for code, result in batch_result.items():
+        if result['error'] is not None:
+            report.errors[code] = result['error']
+        else:
+            actions[code].append(code)
+
+    return report
+
+
+def deploy_robots(
+        robots: Sequence['RobotSpec'],
+        tokens: Iterable['BaseBitrixToken'],
+        delete_missing: bool = False,
+        max_workers: int = 10,
+        timeout: int = 30,
+) -> Dict[str, RobotDeployReport]:
+    """
+    Установить/обновить набор роботов на многих порталах параллельно.
+
+    На каждый портал уходит bizproc.robot.list и один batch (до 50 роботов в одном запросе)
+    вместо отдельных is_installed + add/update на каждый класс.
+    Ошибка одного портала не прерывает остальные, она попадает в его отчет.
+
+    Example:
+        reports = deploy_robots([ExampleRobot, (OtherRobot, 'other_robot_handler')], admin_tokens)
+        print('\\n\\n'.join(str(report) for report in reports.values()))
+
+    :param robots: классы роботов с HANDLER_VIEW_NAME или пары (класс, имя view)
+    :param tokens: админские токены, по одному на портал
+    :param delete_missing: удалить роботы приложения, которых нет в robots
+    :param max_workers: сколько порталов обрабатывать одновременно
+    :return: портал -> RobotDeployReport
+    :raises ValueError: несколько токенов одного портала - их отчеты затерли бы друг друга,
+        а параллельные batch на один портал добавляли бы одних и тех же роботов
+    """
+    robots = _normalize_robots(robots)
+    tokens = list(tokens)
+    duplicates = sorted(portal for portal, count in Counter(map(_get_portal, tokens)).items() if count > 1)
+    if duplicates:
+        raise ValueError('several tokens for portal: {}'.format(', '.join(duplicates)))
+
+    def deploy(token):
+        try:
+            return deploy_robots_to_portal(robots, token, delete_missing=delete_missing, timeout=timeout)
+        except Exception as exc:
+            ilogger.warning('deploy_robots_error', '{}: {}'.format(_get_portal(token), exc))
+            report = RobotDeployReport(_get_portal(token))
+            report.exception = exc
+            return report
+        finally:
+            # соединения с БД, открытые в потоке (например, при refresh токена), иначе не закрываются
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        reports = list(executor.map(deploy, tokens))
+
+    return {report.portal: report for report in reports}
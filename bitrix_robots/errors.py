@@ -1,4 +1,8 @@
+from datetime import datetime, timedelta
+from typing import Optional, Union
+
 from django.http import HttpResponse
+from django.utils import timezone
 
 
 class RobotException(Exception):
@@ -19,4 +23,22 @@ class VerificationError(RobotException):
 
 
 class DelayProcess(RobotException):
-    pass
+    """
+    Вернуть запрос робота в очередь.
+    retry_at - когда повторить (datetime или timedelta от текущего момента),
+    без retry_at запрос будет взят при следующем запуске process_robot_requests.
+    """
+    def __init__(self, message=None, retry_at: Optional[Union[datetime, timedelta]] = None):
+        super().__init__(message)
+        if isinstance(retry_at, timedelta):
+            retry_at = timezone.now() + retry_at
+        self.retry_at = retry_at
+
+
+class AttemptsExceeded(RobotException):
+    """
+    Запрос робота взят в обработку MAX_ATTEMPTS раз и так и не завершился
+    (отложен через DelayProcess или брошен упавшим воркером)
+    """
+    def __init__(self, attempts: int):
+        super().__init__('Robot request not finished after {} attempts'.format(attempts))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import integration_utils.bitrix_robots.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example_robot', '0004_alter_examplerobot_is_success'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examplerobot',
+            index=integration_utils.bitrix_robots.indexes.PartialIndex(condition=models.Q(('started__isnull', True)), fields=['dt_add'], name='example_rob_dt_add_d68793_pix'),
+        ),
+        migrations.AddIndex(
+            model_name='examplerobot',
+            index=models.Index(fields=['is_success', 'dt_add'], name='example_rob_is_succ_f55bf0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examplerobot',
+            index=models.Index(fields=['finished'], name='example_rob_finishe_5b9c0d_idx'),
+        ),
+    ]
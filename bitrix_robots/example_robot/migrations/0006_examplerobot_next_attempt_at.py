@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import integration_utils.bitrix_robots.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example_robot', '0005_examplerobot_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examplerobot',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='examplerobot',
+            index=integration_utils.bitrix_robots.indexes.PartialIndex(condition=models.Q(('finished__isnull', True)), fields=['started'], name='example_rob_started_a6ed2c_pix'),
+        ),
+    ]
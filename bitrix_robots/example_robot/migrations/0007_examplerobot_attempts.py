@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example_robot', '0006_examplerobot_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examplerobot',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
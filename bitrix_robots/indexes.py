@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class PartialIndex(models.Index):
+    """
+    Частичный индекс (condition) с автоматическим именем.
+
+    Django требует явное имя для индекса с condition, а шаблон
+    '%(app_label)s_%(class)s_...' у моделей роботов не укладывается в 30 символов.
+    Поэтому имя генерируется через set_name_with_model, как у обычных индексов без имени.
+    """
+    # суффикс отличается от 'idx', чтобы не совпасть с обычным индексом по тем же полям
+    suffix = 'pix'
+
+    def __init__(self, *args, name='', condition=None, **kwargs):
+        super().__init__(*args, name=name or 'partial_index', condition=condition, **kwargs)
+        self.name = name
@@ -23,7 +23,7 @@ class BaseRobot(BaseBitrixRobot):
 
     token = models.ForeignKey('bitrix24.BitrixUserToken', null=True, blank=True, on_delete=models.PROTECT)
 
-    class Meta:
+    class Meta(BaseBitrixRobot.Meta):
         abstract = True
 
     class Admin(BaseBitrixRobot.Admin):
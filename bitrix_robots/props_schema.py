@@ -0,0 +1,155 @@
+from functools import partial
+from typing import Callable, Dict, Tuple
+
+from django.core.exceptions import ValidationError
+
+PROPERTIES_PREFIX = 'properties['
+
+# Type свойства -> имя метода-конвертера робота (safe_*).
+# Множественные свойства не приводятся, как и раньше.
+PROP_CONVERTERS = {
+    'int': 'safe_int',
+    'bool': 'safe_bool',
+    'string': 'safe_string',
+    'text': 'safe_text',
+    'double': 'safe_double',
+    'date': 'safe_date',
+    'datetime': 'safe_datetime',
+    'select': 'safe_select',
+}
+
+
+class RobotPropsSchema:
+    """
+    Скомпилированное описание PROPERTIES робота.
+
+    Строится один раз на класс (см. BaseBitrixRobot.get_props_schema):
+    ключи обеих форм ('properties[x]' и 'properties[x][0]') и конвертеры
+    типов вычисляются заранее, множественные свойства разбираются за один
+    проход по присланным параметрам.
+    """
+
+    def __init__(self, robot_cls):
+        properties = robot_cls.PROPERTIES
+        # по ссылке проверяется, что PROPERTIES класса не подменили после компиляции
+        self.properties = properties
+
+        # (prop, 'properties[prop]', 'properties[prop][0]', default)
+        self.single = []  # type: list
+        # prop -> список значений; порядок как в PROPERTIES
+        self.multiple = []  # type: list
+        # prop -> (converter, required)
+        self.converters = {}  # type: Dict[str, Tuple[Callable, bool]]
+        # (key, key_0, stringify) для fix_json_params, порядок как в PROPERTIES
+        self.json_fix_keys = []  # type: list
+
+        for prop, desc in properties.items():
+            full_prop = 'properties[%s]' % prop
+            # иногда параметры приходят в виде 'properties[prop_name][0]', даже если поле не множественное
+            full_prop_0 = 'properties[%s][0]' % prop
+            is_multiple = desc.get('Multiple') == 'Y'
+
+            if is_multiple:
+                self.multiple.append(prop)
+            else:
+                self.single.append((prop, full_prop, full_prop_0, desc.get('Default')))
+
+            self.json_fix_keys.append((full_prop, full_prop_0, not is_multiple and desc.get('Type') == 'string'))
+
+            converter_name = PROP_CONVERTERS.get(desc.get('Type'))
+            if converter_name and not is_multiple:
+                converter = getattr(robot_cls, converter_name)
+                if desc.get('Type') == 'select':
+                    converter = partial(converter, options=desc.get('Options', {}))
+                self.converters[prop] = (converter, desc.get('Required', 'N') == 'Y')
+
+        self.multiple_set = frozenset(self.multiple)
+
+    def parse(self, params: dict) -> dict:
+        """
+        Разбирает присланные Битриксом параметры (аналог get_php_style_list для множественных полей)
+        """
+        res = {}
+        for prop, full_prop, full_prop_0, default in self.single:
+            res[prop] = params.get(full_prop, params.get(full_prop_0, default))
+
+        if self.multiple:
+            res.update(self._parse_multiple(params))
+
+        return res
+
+    def _parse_multiple(self, params: dict) -> dict:
+        # ?properties[foo][]=1 имеет приоритет над ?properties[foo][0]=1
+        bracket_values = {}
+        indexed_values = {}
+
+        for key in params:
+            if not key.startswith(PROPERTIES_PREFIX):
+                continue
+            prop, sep, tail = key[len(PROPERTIES_PREFIX):].partition('][')
+            if not sep or prop not in self.multiple_set:
+                continue
+
+            if tail == ']':
+                bracket_values[prop] = [params[key]]
+                continue
+
+            # может встретиться пропуск позиций: foo[0]=1&foo[2]=3&foo[3]=4
+            try:
+                ix = int(tail.strip('[]'))
+            except ValueError:
+                continue
+            if ix < 0:
+                continue
+
+            values = indexed_values.setdefault(prop, [])
+            if len(values) <= ix:
+                values.extend([None] * (ix + 1 - len(values)))
+            values[ix] = params[key]
+
+        return {
+            prop: bracket_values.get(prop) or indexed_values.get(prop) or []
+            for prop in self.multiple
+        }
+
+    def validate(self, props: dict) -> dict:
+        """
+        Приводит значения к типам из PROPERTIES, изменяя props на месте.
+
+        :raises: ValidationError со всеми ошибками сразу
+        """
+        errors = []
+
+        for prop_name, prop_value in props.items():
+            try:
+                converter, required = self.converters[prop_name]
+            except KeyError:
+                continue
+
+            try:
+                props[prop_name] = converter(prop_value, required=required)
+            except ValidationError as exc:
+                errors.append(f'Ошибка в поле "{prop_name}": {exc.message}.')
+
+        if errors:
+            # Если есть хотя бы одна ошибка, выбрасываем их все одним исключением
+            raise ValidationError(' '.join(errors))
+
+        return props
+
+    def fix_json_params(self, params: dict) -> dict:
+        """
+        Приводит строковые параметры к str перед сохранением в JSONField
+        """
+        for full_prop, full_prop_0, stringify in self.json_fix_keys:
+            if full_prop_0 in params:
+                prop = full_prop_0
+            elif full_prop in params:
+                prop = full_prop
+            else:
+                return params
+            if stringify:
+                # числа с большой разрядностью ведут сбя странно при сохранении в jsonfield
+                params[prop] = str(params[prop])
+
+        return params
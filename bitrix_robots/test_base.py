@@ -0,0 +1,190 @@
+from datetime import timedelta
+from unittest import TestCase, mock, skipUnless
+from urllib.parse import urlencode
+
+from integration_utils import testing  # noqa: F401
+
+from django.apps import apps
+from django.db import connection, models
+from django.test import RequestFactory
+from django.urls import path
+from django.utils import timezone
+
+INSTALLED = apps.is_installed('integration_utils.bitrix24') and apps.is_installed('integration_utils.bitrix_robots')
+
+if INSTALLED:
+    from integration_utils.bitrix24.models import BitrixUser, BitrixUserToken
+    from integration_utils.bitrix_robots.base import BaseBitrixRobot
+    from integration_utils.bitrix_robots.errors import DelayProcess
+
+    class QueueRobot(BaseBitrixRobot):
+        """
+        Робот для тестов: params['delay'] - отложить через DelayProcess на столько секунд (0 - без retry_at)
+        """
+        CODE = 'test_queue_robot'
+        NAME = 'Тестовый робот'
+        HANDLER_VIEW_NAME = 'test_queue_robot'
+
+        token = models.ForeignKey('bitrix24.BitrixUserToken', null=True, blank=True, on_delete=models.PROTECT)
+
+        class Meta(BaseBitrixRobot.Meta):
+            app_label = 'bitrix_robots'
+
+        def verify_event(self):
+            pass
+
+        def process(self):
+            delay = self.params.get('delay')
+            if delay is not None:
+                raise DelayProcess(retry_at=timedelta(seconds=delay) if delay else None)
+            return dict(ok=True)
+
+    urlpatterns = [path('robot/', QueueRobot.as_view(), name=QueueRobot.HANDLER_VIEW_NAME)]
+
+
+@skipUnless(INSTALLED, 'bitrix24 and bitrix_robots are not in INSTALLED_APPS')
+class RobotTestCase(TestCase):
+    """
+    Создает таблицы QueueRobot и токенов в тестовой БД, перед каждым тестом очищает очередь
+    """
+    models = ()
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.created_models = [BitrixUser, BitrixUserToken, QueueRobot] + list(cls.models)
+        with connection.schema_editor() as editor:
+            for model in cls.created_models:
+                editor.create_model(model)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            for model in reversed(cls.created_models):
+                editor.delete_model(model)
+        super().tearDownClass()
+
+    def setUp(self):
+        for model in reversed(self.created_models):
+            model.objects.all().delete()
+
+    @staticmethod
+    def add_request(**params) -> 'QueueRobot':
+        return QueueRobot.objects.create(params=params)
+
+
+class ClaimTest(RobotTestCase):
+    def test_claim_once(self):
+        robot = self.add_request()
+        first, second = QueueRobot.objects.get(id=robot.id), QueueRobot.objects.get(id=robot.id)
+        self.assertTrue(first.claim())
+        self.assertFalse(second.claim())
+        self.assertEqual(first.attempts, 1)
+        self.assertEqual(QueueRobot.objects.get(id=robot.id).attempts, 1)
+
+    def test_process_claims_and_finishes(self):
+        robot = self.add_request()
+        QueueRobot.process_robot_requests()
+        robot.refresh_from_db()
+        self.assertTrue(robot.is_success)
+        self.assertIsNotNone(robot.finished)
+        self.assertEqual(robot.attempts, 1)
+        self.assertEqual(QueueRobot.process_robot_requests(), 'nothing to process')
+
+
+class NextAttemptTest(RobotTestCase):
+    def test_delay_sets_next_attempt_at(self):
+        robot = self.add_request(delay=300)
+        QueueRobot.process_robot_requests()
+        robot.refresh_from_db()
+        self.assertIsNone(robot.started)
+        self.assertIsNone(robot.finished)
+        self.assertGreater(robot.next_attempt_at, timezone.now() + timedelta(seconds=250))
+
+        # до next_attempt_at запрос не берется
+        self.assertEqual(QueueRobot.process_robot_requests(), 'nothing to process')
+        QueueRobot.objects.filter(id=robot.id).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertIn('waiting: 1', QueueRobot.process_robot_requests())
+        self.assertEqual(QueueRobot.objects.get(id=robot.id).attempts, 2)
+
+    def test_delay_until_attempts_exceeded(self):
+        robot = self.add_request(delay=0)
+        with mock.patch.object(QueueRobot, 'MAX_ATTEMPTS', 2):
+            QueueRobot.process_robot_requests()
+            QueueRobot.process_robot_requests()
+        robot.refresh_from_db()
+        self.assertEqual(robot.attempts, 2)
+        self.assertIsNotNone(robot.finished)
+        self.assertFalse(robot.is_success)
+        self.assertIn('2 attempts', robot.result['error'])
+
+
+class LeaseTest(RobotTestCase):
+    def add_started(self, minutes_ago, attempts):
+        robot = self.add_request()
+        QueueRobot.objects.filter(id=robot.id).update(
+            started=timezone.now() - timedelta(minutes=minutes_ago), attempts=attempts,
+        )
+        return robot
+
+    def test_expired_lease_is_processed_again(self):
+        expired = self.add_started(minutes_ago=61, attempts=1)
+        running = self.add_started(minutes_ago=5, attempts=1)
+        QueueRobot.process_robot_requests()
+
+        expired.refresh_from_db()
+        self.assertTrue(expired.is_success)
+        self.assertEqual(expired.attempts, 2)
+        running.refresh_from_db()
+        self.assertIsNone(running.finished)
+        self.assertEqual(running.attempts, 1)
+
+    def test_attempts_exceeded(self):
+        robot = self.add_started(minutes_ago=61, attempts=QueueRobot.MAX_ATTEMPTS)
+        self.assertEqual(QueueRobot.release_expired_leases(), 0)
+        robot.refresh_from_db()
+        self.assertIsNotNone(robot.finished)
+        self.assertFalse(robot.is_success)
+        self.assertEqual(robot.attempts, QueueRobot.MAX_ATTEMPTS)
+        self.assertIn('attempts', robot.result['error'])
+
+    def test_old_abandoned_request_is_not_reclaimed(self):
+        # брошен задолго до обновления: attempts=0 после миграции
+        robot = self.add_started(minutes_ago=25 * 60, attempts=0)
+        self.assertEqual(QueueRobot.release_expired_leases(), 0)
+        robot.refresh_from_db()
+        self.assertIsNotNone(robot.started)
+        self.assertIsNone(robot.finished)
+        self.assertEqual(robot.attempts, 0)
+
+        with mock.patch.object(QueueRobot, 'LEASE_RECLAIM_WINDOW_SECONDS', None):
+            self.assertEqual(QueueRobot.release_expired_leases(), 1)
+
+    def test_without_lease_timeout(self):
+        robot = self.add_started(minutes_ago=600, attempts=1)
+        with mock.patch.object(QueueRobot, 'LEASE_TIMEOUT_SECONDS', None):
+            self.assertEqual(QueueRobot.release_expired_leases(), 0)
+        robot.refresh_from_db()
+        self.assertIsNotNone(robot.started)
+
+
+class ViewTest(RobotTestCase):
+    def post(self):
+        request = RequestFactory().post(
+            '/robot/', data=urlencode({'event_token': 'token'}), content_type='application/x-www-form-urlencoded',
+        )
+        return QueueRobot.as_view()(request)
+
+    def test_process_on_request_claims(self):
+        self.assertEqual(self.post().content, b'Ok')
+        robot = QueueRobot.objects.get()
+        self.assertTrue(robot.is_success)
+        self.assertEqual(robot.attempts, 1)
+
+    def test_claimed_by_cron_first(self):
+        # process_robot_requests взял запрос между save и обработкой во view
+        with mock.patch.object(QueueRobot, 'claim', return_value=False):
+            self.assertEqual(self.post().content, b'Ok')
+        robot = QueueRobot.objects.get()
+        self.assertIsNone(robot.finished)
+        self.assertEqual(robot.attempts, 0)
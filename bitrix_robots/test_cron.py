@@ -0,0 +1,62 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from integration_utils.bitrix_robots import test_base
+from integration_utils.bitrix_robots.test_base import RobotTestCase
+
+if test_base.INSTALLED:
+    from integration_utils.bitrix_robots.base import BaseBitrixRobotArchive
+    from integration_utils.bitrix_robots.cron import archive_robot_requests
+    from integration_utils.bitrix_robots.test_base import QueueRobot
+
+    class QueueRobotArchive(BaseBitrixRobotArchive):
+        class Meta(BaseBitrixRobotArchive.Meta):
+            app_label = 'bitrix_robots'
+
+
+class ArchiveTest(RobotTestCase):
+    models = (QueueRobotArchive,) if test_base.INSTALLED else ()
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(QueueRobot, 'ARCHIVE_MODEL', QueueRobotArchive)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_finished(self, days_ago):
+        robot = self.add_request(days_ago=days_ago)
+        QueueRobot.objects.filter(id=robot.id).update(
+            finished=timezone.now() - timedelta(days=days_ago), is_success=True, result=dict(ok=True),
+        )
+        return robot
+
+    def test_archive_in_batches(self):
+        old = [self.add_finished(days_ago=40 + number) for number in range(5)]
+        recent = self.add_finished(days_ago=1)
+        running = self.add_request()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(archive_robot_requests(QueueRobot, batch_size=2), 'QueueRobot\narchived: 5')
+
+        table = QueueRobotArchive._meta.db_table
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "{}"'.format(table))]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(set(QueueRobot.objects.values_list('id', flat=True)), {recent.id, running.id})
+        archive = QueueRobotArchive.objects.order_by('finished')
+        # переносятся от самых старых
+        self.assertEqual([row.original_id for row in archive], [robot.id for robot in reversed(old)])
+        self.assertTrue(all(row.is_success and row.result == dict(ok=True) for row in archive))
+        self.assertEqual(archive_robot_requests(QueueRobot, batch_size=2), 'nothing to archive')
+
+    def test_without_archive_model(self):
+        self.add_finished(days_ago=40)
+        with mock.patch.object(QueueRobot, 'ARCHIVE_MODEL', None):
+            with self.assertRaises(ValueError):
+                archive_robot_requests(QueueRobot)
+            self.assertEqual(archive_robot_requests(QueueRobot, delete_without_archive=True), 'QueueRobot\narchived: 1')
+        self.assertFalse(QueueRobot.objects.exists())
+        self.assertFalse(QueueRobotArchive.objects.exists())
@@ -0,0 +1,38 @@
+from unittest import TestCase, skipUnless
+
+from integration_utils.bitrix_robots import test_base
+from integration_utils.bitrix_robots.benchmark.fake_bitrix import FakeBitrixServer
+
+if test_base.INSTALLED:
+    from integration_utils.bitrix24.bitrix_token import BitrixToken
+    from integration_utils.bitrix_robots.deploy import deploy_robots
+
+
+@skipUnless(test_base.INSTALLED, 'bitrix24 and bitrix_robots are not in INSTALLED_APPS')
+class DeployRobotsTest(TestCase):
+    def setUp(self):
+        self.server = FakeBitrixServer().start()
+        self.addCleanup(self.server.stop)
+        self.server.add_handler('bizproc.robot.list', lambda params: {'result': ['old_robot'], 'total': 1})
+
+    def deploy(self, *domains, **kwargs):
+        tokens = [BitrixToken(domain, web_hook_auth='1/key') for domain in domains]
+        with self.server.redirect_api_calls():
+            return deploy_robots([test_base.QueueRobot], tokens, **kwargs)
+
+    def test_deploy_to_portals(self):
+        reports = self.deploy('a.bitrix24.ru', 'b.bitrix24.ru', delete_missing=True)
+
+        self.assertEqual(sorted(reports), ['a.bitrix24.ru', 'b.bitrix24.ru'])
+        for report in reports.values():
+            self.assertTrue(report.ok, report)
+            self.assertEqual(report.added, ['test_queue_robot'])
+            self.assertEqual(report.deleted, ['old_robot'])
+        self.assertEqual(self.server.calls['bizproc.robot.list'], 2)
+        self.assertEqual(self.server.calls['batch'], 2)
+        self.assertEqual(self.server.calls['bizproc.robot.add'], 2)
+
+    def test_several_tokens_for_portal(self):
+        with self.assertRaises(ValueError):
+            self.deploy('a.bitrix24.ru', 'b.bitrix24.ru', 'a.bitrix24.ru')
+        self.assertEqual(sum(self.server.calls.values()), 0)
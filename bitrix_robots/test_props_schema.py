@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+from django.core.exceptions import ValidationError
+
+from integration_utils.bitrix_robots.props_schema import RobotPropsSchema
+
+
+class FakeRobot:
+    PROPERTIES = {
+        'title': {'Type': 'string'},
+        'count': {'Type': 'int', 'Required': 'Y'},
+        'mode': {'Type': 'select', 'Options': {'a': 'A'}, 'Default': 'a'},
+        'users': {'Type': 'user', 'Multiple': 'Y'},
+    }
+
+    @staticmethod
+    def safe_string(value, required=False):
+        return value
+
+    @staticmethod
+    def safe_int(value, required=False):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValidationError('not int')
+
+    @staticmethod
+    def safe_select(value, options, required=False):
+        if value not in options:
+            raise ValidationError('not in options')
+        return value
+
+
+class RobotPropsSchemaTest(TestCase):
+    def setUp(self):
+        self.schema = RobotPropsSchema(FakeRobot)
+
+    def test_parse_single_and_multiple(self):
+        props = self.schema.parse({
+            'properties[title][0]': 'Hello',
+            'properties[count]': '5',
+            'properties[users][2]': 'user_3',
+            'properties[users][0]': 'user_1',
+            'properties[usersx][0]': 'other',
+        })
+        self.assertEqual(props, {
+            'title': 'Hello',
+            'count': '5',
+            'mode': 'a',
+            'users': ['user_1', None, 'user_3'],
+        })
+
+    def test_parse_brackets_list_has_priority(self):
+        props = self.schema.parse({
+            'properties[users][0]': 'user_1',
+            'properties[users][]': 'user_2',
+        })
+        self.assertEqual(props['users'], ['user_2'])
+
+    def test_parse_missing_multiple(self):
+        self.assertEqual(self.schema.parse({})['users'], [])
+
+    def test_validate_collects_errors(self):
+        props = self.schema.parse({'properties[count]': 'x', 'properties[mode]': 'b'})
+        with self.assertRaises(ValidationError) as ctx:
+            self.schema.validate(props)
+        self.assertIn('"count"', ctx.exception.message)
+        self.assertIn('"mode"', ctx.exception.message)
+
+    def test_validate_converts(self):
+        props = self.schema.validate(self.schema.parse({'properties[count]': '7'}))
+        self.assertEqual(props['count'], 7)
+
+    def test_fix_json_params(self):
+        params = {'properties[title]': 12345678901234567890, 'properties[count]': 1}
+        self.schema.fix_json_params(params)
+        self.assertEqual(params['properties[title]'], '12345678901234567890')
+        self.assertEqual(params['properties[count]'], 1)
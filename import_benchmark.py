@@ -0,0 +1,108 @@
+"""
+Время импорта пакетов integration_utils по данным python -X importtime.
+
+Каждый модуль импортируется в отдельном процессе, поэтому кэш sys.modules не влияет на замер.
+Запускать из проекта, где доступны settings (модули, которые их импортируют, иначе упадут с ошибкой):
+
+    python -m integration_utils.import_benchmark
+    python -m integration_utils.import_benchmark integration_utils.iu_bbcode --top 20
+    python -m integration_utils.import_benchmark --max-ms 300  # код возврата 1, если какой-то модуль дольше
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import List, NamedTuple, Optional, Sequence
+
+# import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE_RE = re.compile(r'^import time:\s+(?P<self>\d+)\s+\|\s+(?P<cumulative>\d+)\s+\|(?P<name>.*)$')
+
+DEFAULT_MODULES = (
+    'integration_utils.iu_bbcode',
+    'integration_utils.iu_datetime.functions',
+    'integration_utils.iu_datetime.dt_its',
+    'integration_utils.iu_get_params',
+    'integration_utils.iu_key_value',
+    'integration_utils.iu_logger',
+    'integration_utils.iu_retry_manager',
+    'integration_utils.bitrix24',
+    'integration_utils.bitrix_robots',
+    'integration_utils.its_utils',
+    'integration_utils.itsolution',
+    'integration_utils.vendors',
+)
+
+
+class ImportRow(NamedTuple):
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+class ImportResult(NamedTuple):
+    module: str
+    # None, если импорт упал
+    cumulative_us: Optional[int]
+    rows: List[ImportRow]
+    error: str
+
+
+def parse_importtime(output: str) -> List[ImportRow]:
+    rows = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE_RE.match(line)
+        if match:
+            rows.append(ImportRow(match.group('name').strip(), int(match.group('self')), int(match.group('cumulative'))))
+    return rows
+
+
+def measure_import(module: str, python: str = sys.executable) -> ImportResult:
+    env = dict(os.environ)
+    # integration_utils должен находиться так же, как в текущем процессе
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, sys.path))
+    process = subprocess.run(
+        [python, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, universal_newlines=True,
+    )
+    rows = parse_importtime(process.stderr)
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'exit code {}'.format(process.returncode)
+        return ImportResult(module, None, rows, error)
+    cumulative_us = next((row.cumulative_us for row in reversed(rows) if row.name == module), None)
+    return ImportResult(module, cumulative_us, rows, '')
+
+
+def run_benchmark(modules: Sequence[str] = DEFAULT_MODULES, top: int = 5, max_ms: Optional[float] = None) -> bool:
+    """
+    Печатает время импорта модулей и самые тяжелые зависимости каждого.
+    Возвращает False, если какой-то модуль не импортировался или импортировался дольше max_ms.
+    """
+    ok = True
+    for module in modules:
+        result = measure_import(module)
+        if result.cumulative_us is None:
+            ok = False
+            print('{:<48} ERROR {}'.format(module, result.error))
+            continue
+
+        total_ms = result.cumulative_us / 1000
+        over_limit = max_ms is not None and total_ms > max_ms
+        ok = ok and not over_limit
+        print('{:<48} {:8.1f} ms{}'.format(module, total_ms, '  > {} ms'.format(max_ms) if over_limit else ''))
+        for row in sorted(result.rows, key=lambda row: row.self_us, reverse=True)[:top]:
+            print('    {:<44} self {:8.1f} ms'.format(row.name, row.self_us / 1000))
+    return ok
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--top', type=int, default=5, help='сколько самых тяжелых зависимостей показать')
+    parser.add_argument('--max-ms', type=float, default=None, help='допустимое время импорта одного модуля')
+    args = parser.parse_args(argv)
+    return 0 if run_benchmark(args.modules, top=args.top, max_ms=args.max_ms) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -46,7 +46,8 @@ class KeyValue(models.Model):
                 # Перенесем хранение в json поле
                 KeyValue.set_value(key=key, value=kv.value, comment=kv.comment)
 
-            return KeyValue.objects.get(key=key).value
+            # set_value меняет только json_value, поэтому value перечитывать не нужно
+            return kv.value
         except KeyValue.DoesNotExist:
             if create:
                 KeyValue.set_value(key=key, value=default, comment=comment)
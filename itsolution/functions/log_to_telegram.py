@@ -1,21 +1,219 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
 from django.conf import settings
 from integration_utils.vendors.telegram.bot import Bot
+from integration_utils.vendors.telegram.constants import MAX_MESSAGE_LENGTH
+from integration_utils.vendors.telegram.error import RetryAfter
+
+
+@lru_cache(maxsize=None)
+def get_log_bot(token):
+    """
+    Один Bot на токен на весь процесс, соединения берутся из общего пула get_shared_request
+    """
+    return Bot(token=token)
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH):
+    """
+    Делит текст на части не длиннее limit, по возможности по переносам строк
+    """
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+class TelegramLogSender:
+    """
+    Фоновая отправка логов в Telegram с группировкой одинаковых сообщений.
+
+    Первое сообщение с данным текстом уходит сразу, повторы того же текста в чат за window секунд
+    копятся и в конце окна склеиваются в строку "x137 of refresh_token_error_gte500 in last 60s".
+    Текст режется по лимиту длины сообщения Telegram и отправляется не чаще одного сообщения
+    в min_interval секунд на чат. На RetryAfter поток ждет и повторяет.
+
+    Очередь ограничена max_pending разными текстами на чат, остальные считаются в dropped.
+    При выходе из процесса накопленное отправляется не дольше exit_timeout секунд.
+    """
+
+    def __init__(self, token, window=60, min_interval=3, max_pending=1000, exit_timeout=5):
+        self.token = token
+        self.window = window
+        self.min_interval = min_interval
+        self.max_pending = max_pending
+        self.exit_timeout = exit_timeout
+        self.dropped = 0
+        self.sent = 0
+        self.errors = 0
+
+        # chat_id -> OrderedDict(текст -> 1): первые сообщения, отправляются сразу
+        self._immediate = {}
+        # chat_id -> OrderedDict(текст -> количество повторов в текущем окне)
+        self._pending = {}
+        # chat_id -> тексты, уже отправленные в текущем окне
+        self._seen = {}
+        self._last_sent = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+        atexit.register(self.close)
+
+    def add(self, chat_id, text):
+        with self._condition:
+            seen = self._seen.setdefault(chat_id, set())
+            if text in seen:
+                messages = self._pending.setdefault(chat_id, OrderedDict())
+            else:
+                messages = self._immediate.setdefault(chat_id, OrderedDict())
+            if text in messages:
+                messages[text] += 1
+            elif len(messages) < self.max_pending:
+                messages[text] = 1
+                seen.add(text)
+            else:
+                self.dropped += 1
+            self._condition.notify()
+            self._ensure_thread()
 
-def log_to_telegram(text):
+    def flush(self):
+        """Отправить накопленное сейчас, не дожидаясь конца окна"""
+        with self._condition:
+            immediate, pending = self._take(flush_window=True)
+        self._send_pending(immediate)
+        self._send_pending(pending)
+
+    def close(self, timeout=None):
+        """
+        Остановить фоновый поток и отправить накопленное (вызывается при выходе из процесса).
+        Ждет отправки не дольше timeout секунд (по умолчанию exit_timeout), чтобы не задерживать выход.
+
+        :return: True, если все успели отправить
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        flush_thread = threading.Thread(target=self.flush, name='TelegramLogSender-flush', daemon=True)
+        flush_thread.start()
+        flush_thread.join(self.exit_timeout if timeout is None else timeout)
+        return not flush_thread.is_alive()
+
+    def _take(self, flush_window):
+        # Вызывается под self._condition
+        immediate, self._immediate = self._immediate, {}
+        pending = {}
+        if flush_window:
+            pending, self._pending = self._pending, {}
+            self._seen = {}
+        return immediate, pending
+
+    def _ensure_thread(self):
+        if self._closed:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='TelegramLogSender', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        window_end = time.monotonic() + self.window
+        while True:
+            with self._condition:
+                while not self._immediate and not self._closed:
+                    wait = window_end - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                if self._closed:
+                    return
+                flush_window = time.monotonic() >= window_end
+                if flush_window:
+                    window_end = time.monotonic() + self.window
+                immediate, pending = self._take(flush_window)
+            self._send_pending(immediate)
+            self._send_pending(pending)
+
+    def _format(self, messages):
+        lines = []
+        for text, count in messages.items():
+            if count > 1:
+                lines.append('x{} of {} in last {}s'.format(count, text, self.window))
+            else:
+                lines.append(text)
+        return '\n'.join(lines)
+
+    def _send_pending(self, pending):
+        for chat_id, messages in pending.items():
+            if not messages:
+                continue
+            for chunk in split_message(self._format(messages)):
+                self._send(chat_id, chunk)
+
+    def _send(self, chat_id, text):
+        bot = get_log_bot(self.token)
+        for _ in range(3):
+            wait = self._last_sent.get(chat_id, 0) + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                bot.send_message(chat_id, text)
+                self.sent += 1
+                return
+            except RetryAfter as exc:
+                time.sleep(exc.retry_after)
+            except Exception:
+                self.errors += 1
+                return
+            finally:
+                self._last_sent[chat_id] = time.monotonic()
+        self.errors += 1
+
+
+_senders = {}
+_senders_lock = threading.Lock()
+
+
+def get_log_sender(token=None):
+    token = token or settings.TELEGRAM_LOG_BOT_TOKEN
+    with _senders_lock:
+        sender = _senders.get(token)
+        if sender is None:
+            sender = _senders[token] = TelegramLogSender(
+                token,
+                window=getattr(settings, 'TELEGRAM_LOG_WINDOW', 60),
+                min_interval=getattr(settings, 'TELEGRAM_LOG_MIN_INTERVAL', 3),
+                exit_timeout=getattr(settings, 'TELEGRAM_LOG_EXIT_TIMEOUT', 5),
+            )
+        return sender
+
+
+def log_to_telegram(text, chat_id=None):
     """
     исползьзует настройки из settings.py
     TELEGRAM_LOG_BOT_TOKEN = '20933333:AAHUF233232323AA_DmGewfw332r32r0UI9qk'
     TELEGRAM_LOG_CHAT_ID = -38283832832832
+    TELEGRAM_LOG_WINDOW = 60 (необязательно) - за сколько секунд копить и склеивать повторы одинаковых сообщений
+    TELEGRAM_LOG_MIN_INTERVAL = 3 (необязательно) - не чаще одного сообщения в чат за столько секунд
+    TELEGRAM_LOG_EXIT_TIMEOUT = 5 (необязательно) - сколько секунд при выходе из процесса отправлять накопленное
+
+    Сообщение ставится в очередь фоновой отправки (см. TelegramLogSender): первое уходит сразу, повторы - в конце окна.
+    Срочно отправить накопленное: get_log_sender().flush()
 
     :param text:
-    :return:
+    :return: True, если сообщение принято в очередь
     """
 
     try:
-        Bot(token=settings.TELEGRAM_LOG_BOT_TOKEN).send_message(settings.TELEGRAM_LOG_CHAT_ID, text)
+        get_log_sender().add(chat_id or settings.TELEGRAM_LOG_CHAT_ID, str(text))
         return True
     except Exception:
         return False
-
-
-
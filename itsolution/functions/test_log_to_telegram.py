@@ -0,0 +1,72 @@
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from integration_utils.itsolution.functions.log_to_telegram import TelegramLogSender, split_message
+from integration_utils.vendors.telegram.error import RetryAfter
+
+
+class TelegramLogSenderTest(TestCase):
+    def setUp(self):
+        self.bot = MagicMock()
+        patcher = patch('integration_utils.itsolution.functions.log_to_telegram.get_log_bot', return_value=self.bot)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sender = TelegramLogSender('token', window=60, min_interval=0)
+        # Фоновый поток в тестах не нужен, отправляем через flush
+        self.sender._ensure_thread = lambda: None
+
+    def test_coalesces_repeats(self):
+        for _ in range(137):
+            self.sender.add(1, 'refresh_token_error_gte500')
+        self.sender.add(1, 'other')
+        self.sender.add(2, 'second chat')
+        self.sender.flush()
+
+        self.assertEqual([call.args for call in self.bot.send_message.call_args_list], [
+            (1, 'refresh_token_error_gte500\nother'),
+            (2, 'second chat'),
+            (1, 'x136 of refresh_token_error_gte500 in last 60s'),
+        ])
+        self.assertEqual(self.sender.sent, 3)
+
+        # После окна первое сообщение снова уходит целиком
+        self.sender.add(1, 'refresh_token_error_gte500')
+        self.sender.flush()
+        self.bot.send_message.assert_called_with(1, 'refresh_token_error_gte500')
+
+    def test_first_message_is_sent_without_waiting_for_window(self):
+        sender = TelegramLogSender('token', window=60, min_interval=0)
+        self.addCleanup(sender.close, 1)
+        sent = threading.Event()
+        self.bot.send_message.side_effect = lambda chat_id, text: sent.set()
+
+        sender.add(1, 'error')
+        sender.add(1, 'error')
+        self.assertTrue(sent.wait(2))
+        self.bot.send_message.assert_called_once_with(1, 'error')
+
+    def test_close_is_bounded(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.bot.send_message.side_effect = lambda chat_id, text: release.wait(5)
+        self.sender.add(1, 'error')
+
+        started = time.monotonic()
+        self.assertFalse(self.sender.close(timeout=0.1))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_retry_after(self):
+        self.bot.send_message.side_effect = [RetryAfter(1), None]
+        self.sender.add(1, 'error')
+        with patch('integration_utils.itsolution.functions.log_to_telegram.time.sleep') as sleep:
+            self.sender.flush()
+        sleep.assert_called_with(1)
+        self.assertEqual(self.bot.send_message.call_count, 2)
+        self.assertEqual(self.sender.sent, 1)
+
+    def test_split_message(self):
+        chunks = split_message('a' * 10 + '\n' + 'b' * 10, limit=15)
+        self.assertEqual(chunks, ['a' * 10, 'b' * 10])
+        self.assertEqual(split_message('c' * 40, limit=15), ['c' * 15, 'c' * 15, 'c' * 10])
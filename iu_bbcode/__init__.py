@@ -1 +1 @@
-from .bbcode_to_telegram import bbcode_to_telegram
+from .bbcode_to_telegram import bbcode_to_telegram, convert_many
@@ -1,13 +1,12 @@
 import html
 import re
 from datetime import datetime
-from abc import ABC, abstractmethod
-from typing import Any, Dict, Final, Iterable, List, Literal, Match, Optional, Text, Tuple, Type
-
-from prettytable import PrettyTable
+from functools import lru_cache
+from typing import Any, Dict, Final, FrozenSet, Iterable, List, Literal, Match, Optional, Text, Tuple
 
 __all__ = [
     "bbcode_to_telegram",
+    "convert_many",
 ]
 
 BBCodeTagLiteral = Literal[
@@ -92,29 +91,29 @@ _TAGS_TO_REMOVE: Final[Tuple[BBCodeTagLiteral, ...]] = (
 
 # Теги, которые обрабатываются текущим кодом
 _PROCESSED_TAGS: Final[Tuple[BBCodeTagLiteral, ...]] = (
-    # Обрабатываются _TableHandler
+    # Таблицы
     "table", "tr", "td", "th",
 
-    # Обрабатываются _LinkHandler
+    # Ссылки
     "url", "email",
 
-    # Обрабатывается _UserHandler
+    # Пользователи
     "user",
 
-    # Обрабатываются _MediaHandler
+    # Медиа
     "img", "imgleft", "imgright", "imgcenter", "image", "imgmini", "video",
 
-    # Обрабатываются _FormattingHandler
+    # Форматирование, заголовки, цитаты и списки
     "b", "bold", "i", "italic", "u", "ins", "s", "del", "strike", "tt",
     "sub", "sup", "h1", "h2", "h3", "h4", "h5", "h6",
     "quote", "q", "cite", "acronym", "abbr", "dfn",
     "list", "ul", "ol", "*", "p", "div", "br", "hr",
 
-    # Обрабатываются _FormattingHandler для кода
+    # Код
     "code", "prog", "php", "html", "sql", "python", "javascript",
     "css", "bash", "java",
 
-    # Обрабатывается _SpoilerHandler
+    # Спойлеры
     "spoiler",
 )
 
@@ -149,230 +148,418 @@ def _replace_with_placeholders(text: Text, pattern: re.Pattern, protected_store:
     return pattern.sub(_replacer, text)
 
 
-class _BaseHandler(ABC):
-    """
-    Базовый обработчик тегов
-    """
-
-    __slots__ = ("_next_handler",)
-
-    _next_handler: Optional["_BaseHandler"]
-
-    def __init__(self, next_handler: Optional["_BaseHandler"] = None):
-        self._next_handler = next_handler
-
-    @abstractmethod
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        """Базовый метод обработки текста в цепочке."""
-        if self._next_handler:
-            return self._next_handler.handle(text, context)
-        else:
-            return text
-
-
-class _ProtectedTagHandler(_BaseHandler):
+# Тег BBCode: открывающий [name], [name=attr], [name attr] или закрывающий [/name]
+_TAG_RE = re.compile(r"\[(?:/(?P<close>[a-z][a-z0-9-]*|\*)|(?P<open>[a-z][a-z0-9-]*|\*)(?P<attr>[^]]*))]", re.IGNORECASE)
+
+_TABLE_ROW_RE = re.compile(r"\[tr](.*?)\[/tr]", re.DOTALL | re.IGNORECASE)
+_TABLE_CELL_RE = re.compile(r"\[t[dh].*?](.*?)\[/t[dh]]", re.DOTALL | re.IGNORECASE)
+_TABLE_CELL_TAG_RE = re.compile(r"\[/?[a-z].*?]", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+_CODE_ATTR_RE = re.compile(r"\s*=\s*[\"']?(.*?)[\"']?", re.DOTALL)
+_PROG_ATTR_RE = re.compile(r"(?:=|\s+lang=)[\"']?(.*?)[\"']?", re.DOTALL)
+_VOID_ATTR_RE = re.compile(r"\s*/?")
+_HTML_TAG_RE = re.compile(r"<[^>]*>")
+_MULTIPLE_NEWLINES_RE = re.compile(r"\n\s*\n\s*\n+")
+
+_TRANS_SUB: Final = str.maketrans("0123456789+-=()", "₀₁₂₃₄₅₆₇₈₉₊₋₌₍₎")
+_TRANS_SUP: Final = str.maketrans("0123456789+-=()", "⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾")
+
+# Простое форматирование, только без атрибутов: [b]...[/b]
+_SIMPLE_TAGS: Final[Dict[Text, Text]] = {
+    "b": "b", "bold": "b",
+    "i": "i", "italic": "i",
+    "u": "u", "ins": "u",
+    "s": "s", "del": "s", "strike": "s",
+    "tt": "code",
+}
+_HEADER_TAGS: Final = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+_QUOTE_TAGS: Final = frozenset(("quote", "q", "cite", "acronym", "abbr", "dfn"))
+_IMAGE_TAGS: Final = frozenset(("img", "imgleft", "imgright", "imgcenter", "image", "imgmini"))
+_CODE_LANGS: Final = frozenset(("php", "html", "sql", "python", "javascript", "css", "bash", "java"))
+_REMOVE_TAGS: Final = frozenset(_TAGS_TO_REMOVE)
+
+# Парные теги, из которых строится дерево
+_CONTAINER_TAGS: Final = frozenset((
+    "table", "url", "email", "user", "video", "code", "prog", "sub", "sup", "ol", "list", "spoiler",
+)) | frozenset(_SIMPLE_TAGS) | _HEADER_TAGS | _QUOTE_TAGS | _IMAGE_TAGS | _CODE_LANGS | _REMOVE_TAGS
+
+
+class _Markup(str):
     """
-    Обрабатывает игнорируемые теги, временно скрывая их.
+    Готовый вывод тега среди текста: одиночный тег в дереве или вложенный тег в блоке кода.
+    В отличие от текста не переводится в [sub]/[sup] и не обрезается по краям пунктов
+    списка и блоков кода: прежняя цепочка заменяла эти теги позже.
     """
 
     __slots__ = ()
 
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        ignore_tags = context.get("ignore_tags")
 
-        if not ignore_tags:
-            return super().handle(text, context)
+_NEWLINE: Final = _Markup("\n")
+_BULLET: Final = _Markup("\n• ")
 
-        protected_store: Dict[Text, Text] = {}
-        processed_text: Text = text
+# Прежняя цепочка заменяла эти теги раньше [code], поэтому их вывод в блоке кода обрезается как текст
+_BEFORE_CODE_TAGS: Final = frozenset(("table", "url", "email", "user", "video")) | _IMAGE_TAGS
+# А эти - позже нумерованных списков, их вывод по краям пункта не обрезается
+_AFTER_LIST_TAGS: Final = _REMOVE_TAGS | frozenset(("spoiler",))
 
-        for tag in ignore_tags:
-            tag_escaped = re.escape(tag)
+# Одиночные теги, заменяются на месте вне зависимости от парности
+_LINE_BREAK_TAGS: Final = frozenset(("p", "div"))
+_VOID_TAGS: Final[Dict[Text, _Markup]] = {
+    "br": _NEWLINE,
+    "hr": _Markup("\n-------------------\n"),
+}
 
-            # Шаблон для парных тегов: [tag]...[/tag]
-            pattern_pair = re.compile(
-                rf"\[{tag_escaped}[^]]*].*?\[/\s*{tag_escaped}\s*]",
-                flags=re.DOTALL | re.IGNORECASE,
-            )
+# Закрытые теги глубже этого выводятся исходным текстом, чтобы не упереться в лимит рекурсии
+_MAX_DEPTH: Final = 100
 
-            # Шаблон для одиночных тегов: [tag]
-            pattern_single = re.compile(
-                rf"\[{tag_escaped}[^]]*]",
-                flags=re.IGNORECASE,
-            )
 
-            # Заменяем теги на токены-заглушки
-            processed_text = _replace_with_placeholders(processed_text, pattern_pair, protected_store)
-            processed_text = _replace_with_placeholders(processed_text, pattern_single, protected_store)
+class _ListItem:
+    """Маркер [*] в дереве: пункт списка."""
 
-        # Пропускаем текст через остальную цепочку обработчиков
-        processed_text = super().handle(processed_text, context)
+    __slots__ = ()
 
-        # Восстанавливаем оригинальные теги на место токенов
-        for placeholder, original_content in protected_store.items():
-            processed_text = processed_text.replace(placeholder, original_content)
 
-        return processed_text
+_LIST_ITEM: Final = _ListItem()
 
 
-class _TimestampHandler(_BaseHandler):
+class _Node:
     """
-    Обрабатывает Bitrix-теги [TIMESTAMP=... FORMAT=...].
+    Парный тег BBCode в дереве разбора.
+    start и end - границы содержимого тега в исходном тексте, closing - закрывающий тег.
     """
 
-    __slots__ = ()
+    __slots__ = ("name", "attr", "tag_text", "start", "end", "children", "closing")
 
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        def _replace(match: Match) -> Text:
-            dt = datetime.fromtimestamp(int(match.group(1)))
-            if match.group(2) == "LONG_DATE_FORMAT":
-                return dt.strftime("%d.%m.%Y")
-            return dt.strftime("%H:%M")
+    def __init__(self, name: Optional[Text], attr: Text, tag_text: Text, start: int):
+        self.name = name
+        self.attr = attr
+        self.tag_text = tag_text
+        self.start = start
+        self.end = start
+        self.children: List[Any] = []
+        self.closing = ""
 
-        text = _BITRIX_TIMESTAMP_RE.sub(_replace, text)
-        return super().handle(text, context)
 
+def _is_ordered_list(name: Text, attr: Text) -> bool:
+    return name == "ol" or (name == "list" and attr == "=1")
 
-class _HTMLEncodeHandler(_BaseHandler):
-    """
-    Экранирует спецсимволы HTML.
-    """
 
-    __slots__ = ()
+def _accepts_open_tag(name: Text, attr: Text) -> bool:
+    """Проверяет атрибуты открывающего тега так же, как шаблоны обработчиков."""
 
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        # Экранируем HTML-символы для безопасности
-        text = str(text or "").replace("&quot;", '"')
-        safe_text = html.escape(str(text or ""), quote=False)
-        return super().handle(safe_text, context)
+    if name in _SIMPLE_TAGS or name in _HEADER_TAGS or name in _CODE_LANGS or name in ("sub", "sup", "ol"):
+        return not attr
+    if name in ("url", "email"):
+        return not attr or attr.startswith("=")
+    if name == "user":
+        return attr.startswith("=")
+    if name == "code":
+        return not attr or _CODE_ATTR_RE.fullmatch(attr) is not None
+    if name == "prog":
+        return _PROG_ATTR_RE.fullmatch(attr) is not None
+    if name == "list":
+        return attr == "=1"
+    return True
 
 
-class _TableHandler(_BaseHandler):
+def _flatten_unclosed(parent: _Node, unclosed: List[_Node]):
     """
-    Обрабатывает таблицы.
-    [table] — таблица
-    [tr] — строка таблицы
-    [td] — ячейка таблицы
-    [th] — заголовочная ячейка
+    Переносит в parent содержимое незакрытых тегов: первый из unclosed - последний ребенок parent,
+    каждый следующий - последний ребенок предыдущего. Незакрытый тег остается текстом, а в дереве
+    только закрытые теги: глубина дерева не растет от случайных скобок вроде a[i] в тексте.
     """
 
-    __slots__ = ()
+    children = parent.children
+    for node in unclosed:
+        children.pop()
+        name = node.name
+        if name == "list":
+            children.append(_NEWLINE)
+        elif name in _REMOVE_TAGS or name == "table":
+            # Прежняя очистка удаляла незакрытый тег позже [code] и списков: по краям блока
+            # и пункта он не давал обрезать текст
+            children.append(_Markup())
+        else:
+            children.append(node.tag_text)
+        children.extend(node.children)
+
+
+def _parse(text: Text) -> _Node:
+    """Разбирает BBCode в дерево за один проход по тегам."""
+
+    root = _Node(None, "", "", 0)
+    stack = [root]
+    position = 0
+
+    for match in _TAG_RE.finditer(text):
+        if match.start() > position:
+            stack[-1].children.append(text[position:match.start()])
+        position = match.end()
+        tag_text = match.group()
+        closing_name = match.group("close")
+
+        if closing_name is not None:
+            name = closing_name.lower()
+
+            # Закрывающий тег ищем среди открытых, незакрытые внутри остаются текстом
+            for index in range(len(stack) - 1, 0, -1):
+                node = stack[index]
+                if node.name == name or (name in ("ol", "list") and _is_ordered_list(node.name, node.attr)):
+                    _flatten_unclosed(node, stack[index + 1:])
+                    del stack[index:]
+                    node.end = match.start()
+                    node.closing = tag_text
+                    break
+            else:
+                if name in ("list", "ul") or name in _LINE_BREAK_TAGS:
+                    stack[-1].children.append(_NEWLINE)
+                else:
+                    stack[-1].children.append(tag_text)
+            continue
+
+        name = match.group("open").lower()
+        attr = match.group("attr")
+
+        if name == "*":
+            stack[-1].children.append(_LIST_ITEM if not attr else tag_text)
+        elif name in _VOID_TAGS:
+            stack[-1].children.append(_VOID_TAGS[name] if _VOID_ATTR_RE.fullmatch(attr) else tag_text)
+        elif name in _LINE_BREAK_TAGS:
+            stack[-1].children.append(_NEWLINE if not attr else tag_text)
+        elif name == "ul" or (name == "list" and not _is_ordered_list(name, attr)):
+            stack[-1].children.append(_NEWLINE)
+        elif name in _CONTAINER_TAGS and _accepts_open_tag(name, attr):
+            node = _Node(name, attr, tag_text, position)
+            stack[-1].children.append(node)
+            stack.append(node)
+        else:
+            stack[-1].children.append(tag_text)
 
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        """Ищет и преобразует BBCode таблицы в текстовые таблицы PrettyTable."""
+    if position < len(text):
+        stack[-1].children.append(text[position:])
+    _flatten_unclosed(root, stack[1:])
 
-        def _table_replacer(match: Match) -> Text:
-            table_content = match.group(1)
+    return root
 
-            ascii_table = self._convert_bbcode_to_ascii(table_content)
 
-            return f"\n<pre>{ascii_table}</pre>\n"
+class _Renderer:
+    """
+    Выводит дерево BBCode в HTML для Telegram.
+    """
 
-        text = re.sub(
-            r"\[table.*?](.*?)\[/table]",
-            _table_replacer,
-            text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
+    __slots__ = ("_text", "_domain", "_translation", "_depth")
+
+    def __init__(self, text: Text, domain: Optional[Text]):
+        self._text = text
+        self._domain = domain
+        # Таблица символов открытого [sub] или [sup], применяется к тексту внутри
+        self._translation: Optional[Dict[int, int]] = None
+        # Сколько закрытых тегов сейчас выводится
+        self._depth = 0
+
+    def render(self) -> Text:
+        return self._render_children(_parse(self._text))
+
+    def _render_children(self, node: _Node) -> Text:
+        parts = []
+        for child in node.children:
+            if child.__class__ is str:
+                parts.append(child if self._translation is None else child.translate(self._translation))
+            elif child.__class__ is _Markup:
+                parts.append(child)
+            elif child is _LIST_ITEM:
+                parts.append(_BULLET)
+            else:
+                parts.append(self._render_node(child))
+        return "".join(parts)
 
-        return super().handle(text, context)
+    def _render_plain(self, node: _Node) -> Text:
+        """
+        Содержимое pre и code: Telegram не допускает в них другой разметки,
+        поэтому вложенные теги выводятся только текстом.
+        """
 
-    @staticmethod
-    def _convert_bbcode_to_ascii(bbcode_content: Text) -> Text:
+        return _HTML_TAG_RE.sub("", self._render_children(node))
+
+    def _render_code(self, node: _Node) -> Text:
         """
-        Преобразует внутреннее содержимое тега [table] в строковое ASCII-представление.
+        Содержимое блока кода без разметки. Переносы по краям обрезаются только
+        у текста: большинство вложенных тегов прежняя цепочка заменяла уже после [code].
         """
 
-        # Ищем все строки таблицы (теги [tr])
-        rows: List[Text] = re.findall(r"\[tr](.*?)\[/tr]", bbcode_content, flags=re.DOTALL | re.IGNORECASE)
+        parts: List[Text] = []
+        for child in node.children:
+            if child.__class__ is str:
+                parts.append(child if self._translation is None else child.translate(self._translation))
+            elif child.__class__ is _Markup:
+                parts.append(child)
+            elif child is _LIST_ITEM:
+                parts.append(_BULLET)
+            elif child.name in _BEFORE_CODE_TAGS:
+                parts.append(self._render_node(child))
+            else:
+                parts.append(_Markup(self._render_node(child)))
+        return _HTML_TAG_RE.sub("", self._strip_parts(parts, "\n"))
 
-        if not rows:
-            return ""
+    def _source(self, node: _Node) -> Text:
+        return self._text[node.start:node.end]
 
-        parsed_data: List[List[Text]] = []
+    def _render_node(self, node: _Node) -> Text:
+        if self._depth >= _MAX_DEPTH:
+            # Глубже выводится только этот тег, теги после него разбираются как обычно
+            return node.tag_text + self._source(node) + node.closing
 
-        for row in rows:
-            # Ищем все ячейки в строке (теги [td] или [th])
-            cells = re.findall(r"\[t[dh].*?](.*?)\[/t[dh]]", row, flags=re.DOTALL | re.IGNORECASE)
+        self._depth += 1
+        result = self._render_tag(node)
+        self._depth -= 1
+        return result
 
-            # Очищаем содержимое ячеек от вложенных тегов
-            cleaned_row = [
-                re.sub(r"\s+", " ", re.sub(r"\[/?[a-z].*?]", "", cell, flags=re.IGNORECASE)).strip()
-                for cell in cells
-            ]
+    def _render_tag(self, node: _Node) -> Text:
+        name = node.name
 
-            if cleaned_row:
-                parsed_data.append(cleaned_row)
+        if name == "table":
+            return f"\n<pre>{self._convert_table_to_ascii(self._source(node))}</pre>\n"
 
-        if not parsed_data:
-            return ""
+        if name in _SIMPLE_TAGS:
+            html_tag = _SIMPLE_TAGS[name]
+            if html_tag == "code":
+                return f"<code>{self._render_plain(node)}</code>"
+            return f"<{html_tag}>{self._render_children(node)}</{html_tag}>"
 
-        pt = PrettyTable()
-        pt.header = False
+        if name in _REMOVE_TAGS:
+            return self._render_children(node)
 
-        max_cols = max(len(row) for row in parsed_data)
+        if name == "url":
+            return self._render_url(node)
 
-        for row in parsed_data:
-            # Дополняем пустые ячейки для ровной таблицы
-            row += [""] * (max_cols - len(row))
-            pt.add_row(row)
+        if name in _IMAGE_TAGS:
+            return f"<a href='{self._get_full_url(self._source(node))}'>🖼 Изображение</a>"
 
-        return pt.get_string()
+        if name in _QUOTE_TAGS:
+            return f"<pre>{self._render_plain(node)}</pre>"
 
+        if name == "user":
+            user_id = node.attr[1:].strip("\"'")
+            user_name = self._render_children(node)
+            if self._domain:
+                return f"<a href='https://{self._domain}/company/personal/user/{user_id}/'>{user_name}</a>"
+            return user_name
 
-class _LinkHandler(_BaseHandler):
-    """
-    Обрабатывает ссылки и контакты:
-    [url] — гиперссылка
-    [email] — ссылка на email
-    """
+        if name == "code":
+            content = self._render_code(node)
+            if not node.attr:
+                return self._wrap_code(content)
+            return self._wrap_code(content, _CODE_ATTR_RE.fullmatch(node.attr).group(1).lower().strip())
+
+        if name == "prog":
+            content = self._render_code(node)
+            return self._wrap_code(content, _PROG_ATTR_RE.fullmatch(node.attr).group(1).lower().strip())
+
+        if name in _CODE_LANGS:
+            return self._wrap_code(self._render_code(node), name)
+
+        if name in _HEADER_TAGS:
+            return f"<b>{self._render_children(node)}</b>\n"
+
+        if name in ("ol", "list"):
+            return self._render_ordered_list(node)
+
+        if name in ("sub", "sup"):
+            if "\n" in self._source(node):
+                # Шаблоны [sub] и [sup] не переходят через перенос строки
+                return node.tag_text + self._render_children(node) + f"[/{name}]"
+            outer, self._translation = self._translation, _TRANS_SUB if name == "sub" else _TRANS_SUP
+            try:
+                return self._render_children(node)
+            finally:
+                self._translation = outer
+
+        if name == "email":
+            content = self._render_children(node)
+            if node.attr:
+                address = node.attr[1:].strip().strip("\"'")
+            else:
+                address = self._source(node).strip()
+            return f"<a href='mailto:{address}'>{content}</a>"
 
-    __slots__ = ()
+        if name == "video":
+            return f"🎥 <a href='{self._source(node).strip()}'>Видео</a>"
+
+        if name == "spoiler":
+            return f"<tg-spoiler>{self._render_children(node)}</tg-spoiler>"
 
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        domain = context.get("domain")
+        return node.tag_text + self._render_children(node)
 
-        def _url_callback(match: Match) -> Text:
-            groups = match.groups()
+    def _render_url(self, node: _Node) -> Text:
+        """
+        Два варианта: [url]ссылка[/url] или [url=ссылка]текст[/url]
+        """
+
+        link_text = self._render_children(node)
 
-            # Два варианта: [url]ссылка[/url] или [url=ссылка]текст[/url]
-            if len(groups) == 1:
-                url_raw = groups[0]  # Первый случай: только ссылка
-                link_text = url_raw
+        if node.attr:
+            # Извлекаем ссылку из атрибута
+            url_raw = _WHITESPACE_RE.split(node.attr[1:].strip())[0].strip("\"'")
+        else:
+            url_raw = self._source(node)
+
+        # Нормализуем ссылку (добавляем протокол, домен и т.д.)
+        final_url = self._normalize_url(url_raw)
+
+        if final_url:
+            return f"<a href='{final_url}'>{link_text}</a>"
+        return link_text
+
+    def _render_ordered_list(self, node: _Node) -> Text:
+        """Преобразует [ol]...[/ol] или [list=1] в нумерованный текст"""
+
+        items: List[List[Text]] = [[]]
+        for child in node.children:
+            if child is _LIST_ITEM:
+                items.append([])
+            elif child.__class__ is str:
+                items[-1].append(child if self._translation is None else child.translate(self._translation))
+            elif child.__class__ is _Markup:
+                items[-1].append(child)
+            elif child.name in _AFTER_LIST_TAGS:
+                items[-1].append(_Markup(self._render_node(child)))
             else:
-                attr_str = str(groups[0]).strip()
-                url_raw = re.split(r"\s+", attr_str)[0].strip('"\'')  # Извлекаем ссылку из атрибута
-                link_text = groups[1]
+                items[-1].append(self._render_node(child))
+
+        result_lines = []
+        counter = 1
 
-            # Нормализуем ссылку (добавляем протокол, домен и т.д.)
-            final_url = self._normalize_url(url_raw, domain)
+        for item in items:
+            clean_item = self._strip_parts(item)
+            # Пустой вывод тега из _AFTER_LIST_TAGS пункт не пропускает: прежде там стоял сам тег
+            if item:
+                result_lines.append(f"{counter}. {clean_item}")
+                counter += 1
 
-            if final_url:
-                return f"<a href='{final_url}'>{link_text}</a>"
-            return link_text
+        return "\n" + "\n".join(result_lines) + "\n"
 
-        # Обрабатываем оба варианта тега [url]
-        text = re.sub(r"\[url](.*?)\[/url]", _url_callback, text, flags=re.DOTALL | re.IGNORECASE)
-        text = re.sub(r"\[url=(.*?)](.*?)\[/url]", _url_callback, text, flags=re.DOTALL | re.IGNORECASE)
+    @staticmethod
+    def _strip_parts(parts: List[Text], chars: Optional[Text] = None) -> Text:
+        """
+        Обрезает chars по краям текста, вывод одиночных тегов (_Markup) не трогает.
+        Обрезанный текст удаляется из parts, в нем остаются только непустые края.
+        """
 
-        text = re.sub(
-            r"\[email](.*?)\[/email]",
-            lambda m: f"<a href='mailto:{m.group(1).strip()}'>{m.group(1)}</a>",
-            text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
+        while parts and parts[0].__class__ is not _Markup:
+            parts[0] = parts[0].lstrip(chars)
+            if parts[0]:
+                break
+            del parts[0]
 
-        text = re.sub(
-            r"\[email=(.*?)](.*?)\[/email]",
-            lambda m: f"<a href='mailto:{m.group(1).strip().strip(chr(34) + chr(39))}'>{m.group(2)}</a>",
-            text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
+        while parts and parts[-1].__class__ is not _Markup:
+            parts[-1] = parts[-1].rstrip(chars)
+            if parts[-1]:
+                break
+            del parts[-1]
 
-        return super().handle(text, context)
+        return "".join(parts)
 
-    @staticmethod
-    def _normalize_url(url: Text, domain: Optional[Text]) -> Optional[Text]:
+    def _normalize_url(self, url: Text) -> Optional[Text]:
         """
         Добавляет протокол 'https:' для ссылок вида '//example.com' и базовый домен для относительных путей.
         """
@@ -392,352 +579,164 @@ class _LinkHandler(_BaseHandler):
             return f"https:{url}"
 
         # Относительная ссылка - добавляем домен
-        if domain:
+        if self._domain:
             separator = "/" if not url.startswith("/") else ""
-            return f"https://{domain}{separator}{url}"
+            return f"https://{self._domain}{separator}{url}"
 
         return url
 
+    def _get_full_url(self, url: Text) -> Text:
+        """
+        Превращает относительный URL медиафайла в абсолютный.
+        """
 
-class _UserHandler(_BaseHandler):
-    """
-    Обрабатывает ссылки на профили пользователей:
-    [user] — ссылка на профиль пользователя
-    """
-
-    __slots__ = ()
-
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        domain = context.get("domain")
-
-        def _user_callback(match: Match) -> Text:
-            user_id = match.group(1).strip('"\'')
-            user_name = match.group(2)
-
-            # Создаем ссылку на профиль пользователя, если указан домен
-            if domain:
-                return f"<a href='https://{domain}/company/personal/user/{user_id}/'>{user_name}</a>"
-
-            # Если домен не указан, возвращаем просто имя пользователя
-            return user_name
-
-        # Обрабатываем тег [user=ID]Имя пользователя[/user]
-        text = re.sub(r"\[user=(.*?)](.*?)\[/user]", _user_callback, text, flags=re.DOTALL | re.IGNORECASE)
-
-        return super().handle(text, context)
-
-
-class _MediaHandler(_BaseHandler):
-    """
-    Обрабатывает изображения и видео:
-    [img] — изображение
-    [imgleft], [imgright], [imgcenter] — изображение с обтеканием
-    [image] — большое изображение
-    [imgmini] — миниатюра
-    [video] — видео
-    """
-
-    _IMAGE_TAGS: Final[Tuple[BBCodeTagLiteral, ...]] = ("img", "imgleft", "imgright", "imgcenter", "image", "imgmini")
-
-    __slots__ = ()
-
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        domain = context.get("domain")
-
-        def _get_full_url(url: Text) -> Text:
-            """
-            Превращает относительный URL медиафайла в абсолютный.
-            """
-
-            url = url.strip().strip('"\'')
-
-            # Если уже абсолютная ссылка, возвращаем как есть
-            if not url or url.startswith(("http", "data:")):
-                return url
-
-            # Относительная ссылка - добавляем домен
-            if domain:
-                separator = "/" if not url.startswith("/") else ""
-                return f"https://{domain}{separator}{url}"
+        url = url.strip().strip("\"'")
 
+        # Если уже абсолютная ссылка, возвращаем как есть
+        if not url or url.startswith(("http", "data:")):
             return url
 
-        # Обрабатываем различные теги изображений
-        for tag in self._IMAGE_TAGS:
-            text = re.sub(
-                rf"\[{tag}.*?](.*?)\[/{tag}]",
-                lambda m: f"<a href='{_get_full_url(m.group(1))}'>🖼 Изображение</a>",
-                text,
-                flags=re.DOTALL | re.IGNORECASE,
-            )
-
-        # Тег [img] с альтернативным текстом
-        text = re.sub(
-            r"\[img=(.*?)](.*?)\[/img]",
-            lambda m: f"<a href='{_get_full_url(m.group(1))}'>🖼 {m.group(2)}</a>",
-            text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-
-        # Обрабатываем видео
-        text = re.sub(
-            r"\[video.*?](.*?)\[/video]",
-            lambda m: f"🎥 <a href='{m.group(1).strip()}'>Видео</a>",
-            text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-
-        return super().handle(text, context)
-
-
-class _CodeBlockHandler(_BaseHandler):
-    """
-    Обрабрабатывает BBCode код [code] и языковые теги в [prog]-
-    """
-
-    _CODE_LANGS: Final[Tuple[BBCodeTagLiteral, ...]] = ("php", "html", "sql", "python", "javascript", "css", "bash", "java")
-
-    __slots__ = ()
-
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        def _wrap_code(content: Text, lang: Optional[Text] = None) -> Text:
-            content = content.strip("\n")
-
-            if lang:
-                # Код с указанием языка
-                return f"<pre><code class='language-{lang}'>{content}</code></pre>"
-
-            # Код без указания языка
-            return f"<code>{content}</code>"
-
-        # Код с указанием языка через атрибут
-        text = re.sub(
-            r'\[code\s*=\s*["\']?(.*?)["\']?](.*?)\[/code]',
-            lambda m: _wrap_code(m.group(2), m.group(1).lower().strip()),
-            text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-
-        # Тег [prog] для программного кода
-        text = re.sub(
-            r'\[prog(?:=|\s+lang=)["\']?(.*?)["\']?](.*?)\[/prog]',
-            lambda m: _wrap_code(m.group(2), m.group(1).lower().strip()),
-            text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-
-        # Простой тег [code] без языка
-        text = re.sub(r"\[code](.*?)\[/code]", lambda m: _wrap_code(m.group(1)), text, flags=re.DOTALL | re.IGNORECASE)
-
-        for code_lang in self._CODE_LANGS:
-            text = re.sub(
-                rf"\[{code_lang}](.*?)\[/{code_lang}]",
-                lambda m, lang=code_lang: _wrap_code(m.group(1), lang),
-                text,
-                flags=re.DOTALL | re.IGNORECASE,
-            )
-
-        return super().handle(text, context)
-
+        # Относительная ссылка - добавляем домен
+        if self._domain:
+            separator = "/" if not url.startswith("/") else ""
+            return f"https://{self._domain}{separator}{url}"
 
-class _SubSupHandler(_BaseHandler):
-    """
-    Обрабрабатывает теги [sub] и [sup].
-    """
+        return url
 
-    __slots__ = ()
+    @staticmethod
+    def _wrap_code(content: Text, lang: Optional[Text] = None) -> Text:
+        if lang:
+            # Код с указанием языка
+            return f"<pre><code class='language-{lang}'>{content}</code></pre>"
 
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        # Таблицы преобразования для подстрочных и надстрочных символов
-        trans_sub = str.maketrans("0123456789+-=()", "₀₁₂₃₄₅₆₇₈₉₊₋₌₍₎")
-        trans_sup = str.maketrans("0123456789+-=()", "⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾")
+        # Код без указания языка
+        return f"<code>{content}</code>"
 
-        text = re.sub(r"\[sub](.*?)\[/sub]", lambda m: m.group(1).translate(trans_sub), text, flags=re.IGNORECASE)
-        text = re.sub(r"\[sup](.*?)\[/sup]", lambda m: m.group(1).translate(trans_sup), text, flags=re.IGNORECASE)
+    @staticmethod
+    def _convert_table_to_ascii(bbcode_content: Text) -> Text:
+        """
+        Преобразует внутреннее содержимое тега [table] в строковое ASCII-представление.
+        """
 
-        return super().handle(text, context)
+        # Ищем все строки таблицы (теги [tr])
+        rows: List[Text] = _TABLE_ROW_RE.findall(bbcode_content)
 
+        if not rows:
+            return ""
 
-class _FormattingHandler(_BaseHandler):
-    """
-    Обрабатывает форматирование (жирный, курсив, списки, код и др.).
+        parsed_data: List[List[Text]] = []
 
-    Теги: "[b]", "[bold]", "[i]", "[italic]", "[u]", "[ins]", "[s]", "[del]", "[strike]", "[tt]", "[sub]", "[sup]",
-    "[h1]", "[h2]", "[h3]", "[h4]", "[h5]", "[h6]", "[quote]", "[q]", "[cite]", "[acronym]", "[abbr]", "[dfn]", "[list]",
-    "[ul]", "[ol]", "[*]", "[p]", "[div]", "[br]", "[hr]", "[code]", "[prog]", "[php]", "[html]", "[sql]", "[python]",
-    "[javascript]", "[css]", "[bash]", "[java]"
-    """
+        for row in rows:
+            # Ищем все ячейки в строке (теги [td] или [th])
+            cells = _TABLE_CELL_RE.findall(row)
 
-    _QUOTE_TAGS: Final[Tuple[BBCodeTagLiteral, ...]] = ("quote", "q", "cite", "acronym", "abbr", "dfn")
+            # Очищаем содержимое ячеек от вложенных тегов
+            cleaned_row = [_WHITESPACE_RE.sub(" ", _TABLE_CELL_TAG_RE.sub("", cell)).strip() for cell in cells]
 
-    __slots__ = ()
+            if cleaned_row:
+                parsed_data.append(cleaned_row)
 
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-
-        # Простые замены форматирования
-        simple_replacements: Dict[Text, Text] = {
-            r"\[b](.*?)\[/b]": r"<b>\1</b>",
-            r"\[bold](.*?)\[/bold]": r"<b>\1</b>",
-            r"\[i](.*?)\[/i]": r"<i>\1</i>",
-            r"\[italic](.*?)\[/italic]": r"<i>\1</i>",
-            r"\[u](.*?)\[/u]": r"<u>\1</u>",
-            r"\[ins](.*?)\[/ins]": r"<u>\1</u>",
-            r"\[s](.*?)\[/s]": r"<s>\1</s>",
-            r"\[del](.*?)\[/del]": r"<s>\1</s>",
-            r"\[strike](.*?)\[/strike]": r"<s>\1</s>",
-            r"\[tt](.*?)\[/tt]": r"<code>\1</code>",
-        }
-
-        for pattern, replacement in simple_replacements.items():
-            text = re.sub(pattern, replacement, text, flags=re.DOTALL | re.IGNORECASE)
-
-        # Цитаты оформляем как блок кода (pre)
-        for tag in self._QUOTE_TAGS:
-            text = re.sub(rf"\[{tag}.*?](.*?)\[/{tag}]", r"<pre>\1</pre>", text, flags=re.DOTALL | re.IGNORECASE)
-
-        # Заголовки
-        for i in range(1, 7):
-            text = re.sub(rf"\[h{i}](.*?)\[/h{i}]", r"<b>\1</b>\n", text, flags=re.DOTALL | re.IGNORECASE)
-
-        def _process_ordered_list(match):
-            """Преобразует [ol]...[/ol] или [list=1] в нумерованный текст"""
-
-            content = match.group(2)
-            items = re.split(r'\[\*]', content)
-            result_lines = []
-            counter = 1
-
-            for item in items:
-                clean_item = item.strip()
-                if clean_item:
-                    result_lines.append(f"{counter}. {clean_item}")
-                    counter += 1
-
-            return "\n" + "\n".join(result_lines) + "\n"
-
-        text = re.sub(
-            r"\[(ol|list=1)](.*?)\[/(?:ol|list)]",
-            _process_ordered_list,
-            text,
-            flags=re.DOTALL | re.IGNORECASE
-        )
-
-        text = re.sub(r"\[/?(?:list|ul).*?]", "\n", text, flags=re.IGNORECASE)
-        text = re.sub(r"\[\*]", "\n• ", text, flags=re.IGNORECASE)
-        text = re.sub(r"\[/?(?:p|div)]", "\n", text, flags=re.IGNORECASE)
-        text = re.sub(r"\[br\s*/?]", "\n", text, flags=re.IGNORECASE)
-        text = re.sub(r"\[hr\s*/?]", "\n-------------------\n", text, flags=re.IGNORECASE)
-
-        return super().handle(text, context)
-
-
-class _SpoilerHandler(_BaseHandler):
-    """
-    Обрабатывает спойлер: [spoiler]
-    """
+        if not parsed_data:
+            return ""
 
-    __slots__ = ()
+        # Таблицы встречаются редко, prettytable не грузим при импорте модуля
+        from prettytable import PrettyTable
 
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
+        pt = PrettyTable()
+        pt.header = False
 
-        # Оборачиваем спойлер в тег <tg-spoiler>
-        text = re.sub(
-            r"\[spoiler.*?](.*?)\[/spoiler]",
-            r"<tg-spoiler>\1</tg-spoiler>",
-            text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
+        max_cols = max(len(row) for row in parsed_data)
 
-        return super().handle(text, context)
+        for row in parsed_data:
+            # Дополняем пустые ячейки для ровной таблицы
+            row += [""] * (max_cols - len(row))
+            pt.add_row(row)
 
+        return pt.get_string()
 
-class _CleanupHandler(_BaseHandler):
-    """
-    Удаляет необрабатываемые теги
-    """
 
-    __slots__ = ()
+@lru_cache(maxsize=256)
+def _compile_protected_patterns(tag: Text) -> Tuple[re.Pattern, re.Pattern]:
+    """Шаблоны для игнорируемого тега, кэшируются между вызовами."""
 
-    def handle(self, text: Text, context: Dict[Text, Any]) -> Text:
-        """Выполняет финальную чистку текста от необрабатываемых тегов и лишних пробелов."""
+    tag_escaped = re.escape(tag)
 
-        # Удаляем только теги из _TAGS_TO_REMOVE, оставляя содержимое
-        for tag in _TAGS_TO_REMOVE:
+    # Шаблон для парных тегов: [tag]...[/tag]
+    pattern_pair = re.compile(
+        rf"\[{tag_escaped}[^]]*].*?\[/\s*{tag_escaped}\s*]",
+        flags=re.DOTALL | re.IGNORECASE,
+    )
 
-            # Удаляем парные теги: [tag]содержимое[/tag] → содержимое
-            text = re.sub(
-                rf"\[{re.escape(tag)}[^]]*](.*?)\[/\s*{re.escape(tag)}\s*]",
-                r"\1",
-                text,
-                flags=re.DOTALL | re.IGNORECASE
-            )
+    # Шаблон для одиночных тегов: [tag]
+    pattern_single = re.compile(
+        rf"\[{tag_escaped}[^]]*]",
+        flags=re.IGNORECASE,
+    )
 
-            # Удаляем одиночные теги: [tag] → пусто
-            text = re.sub(
-                rf"\[{re.escape(tag)}[^]]*]",
-                "",
-                text,
-                flags=re.IGNORECASE
-            )
+    return pattern_pair, pattern_single
 
-        # Убираем лишние переносы строк (3+ подряд заменяем на 2)
-        text = re.sub(r"\n\s*\n\s*\n+", "\n\n", text).strip()
 
-        return super().handle(text, context)
+def _replace_timestamp(match: Match) -> Text:
+    dt = datetime.fromtimestamp(int(match.group(1)))
+    if match.group(2) == "LONG_DATE_FORMAT":
+        return dt.strftime("%d.%m.%Y")
+    return dt.strftime("%H:%M")
 
 
 class _BBCodeConverter:
     """
     Основной конвертер BBCode в HTML для Telegram.
+
+    Текст разбирается в дерево тегов один раз и выводится за один обход
+    (_parse и _Renderer). Эталонный вывод зафиксирован в iu_bbcode/golden.
+    Экземпляр не хранит состояния между вызовами, поэтому переиспользуется
+    через _get_converter.
     """
 
-    __slots__ = ()
+    __slots__ = ("_domain", "_protected_patterns")
 
-    _HANDLER_CLASSES: Tuple[Type[_BaseHandler], ...] = (
-        _ProtectedTagHandler,
-        _TimestampHandler,
-        _HTMLEncodeHandler,
-        _TableHandler,
-        _LinkHandler,
-        _UserHandler,
-        _MediaHandler,
-        _CodeBlockHandler,
-        _SubSupHandler,
-        _FormattingHandler,
-        _SpoilerHandler,
-        _CleanupHandler,
-    )
+    def __init__(self, ignore_tags: FrozenSet[Text] = frozenset(), domain: Optional[Text] = None):
+        self._domain = domain
+        # Порядок тегов фиксирован, чтобы токены-заглушки не зависели от порядка во frozenset
+        self._protected_patterns = tuple(_compile_protected_patterns(tag) for tag in sorted(ignore_tags))
 
-    def __call__(
-            self,
-            text: Text,
-            *,
-            ignore_tags: Optional[Iterable[BBCodeTagLiteral]] = None,
-            domain: Optional[Text] = None,
-    ) -> Text:
-        """Запускает процесс конвертации через цепочку."""
+    def __call__(self, text: Text) -> Text:
+        """Запускает процесс конвертации."""
 
         if not text:
             return ""
 
         text = _decode_hex_emojis(text)
 
-        handler_chain = None
+        # Игнорируемые теги временно скрываем за токенами-заглушками
+        protected_store: Dict[Text, Text] = {}
+        for pattern_pair, pattern_single in self._protected_patterns:
+            text = _replace_with_placeholders(text, pattern_pair, protected_store)
+            text = _replace_with_placeholders(text, pattern_single, protected_store)
 
-        for handler_class in reversed(self._HANDLER_CLASSES):
-            handler_chain = handler_class(handler_chain)
+        # Bitrix-теги [TIMESTAMP=... FORMAT=...]
+        text = _BITRIX_TIMESTAMP_RE.sub(_replace_timestamp, text)
 
-        context = {
-            "ignore_tags": tuple(ignore_tags) if ignore_tags else None,
-            "domain": domain,
-        }
+        # Экранируем HTML-символы для безопасности
+        text = html.escape(text.replace("&quot;", '"'), quote=False)
 
-        if handler_chain:
-            return handler_chain.handle(text, context)
+        text = _Renderer(text, self._domain).render()
+
+        # Убираем лишние переносы строк (3+ подряд заменяем на 2)
+        text = _MULTIPLE_NEWLINES_RE.sub("\n\n", text).strip()
+
+        # Восстанавливаем оригинальные теги на место токенов
+        for placeholder, original_content in protected_store.items():
+            text = text.replace(placeholder, original_content)
 
         return text
 
 
+@lru_cache(maxsize=64)
+def _get_converter(ignore_tags: FrozenSet[Text], domain: Optional[Text]) -> _BBCodeConverter:
+    return _BBCodeConverter(ignore_tags, domain)
+
+
 def bbcode_to_telegram(
         text: Text,
         *,
@@ -745,5 +744,21 @@ def bbcode_to_telegram(
         domain: Optional[Text] = None,
 ) -> Text:
     """Функция для перевода из bbcode в html для Telegram"""
-    converter = _BBCodeConverter()
-    return converter(text, ignore_tags=ignore_tags, domain=domain)
+    converter = _get_converter(frozenset(ignore_tags or ()), domain)
+    return converter(text)
+
+
+def convert_many(
+        texts: Iterable[Text],
+        *,
+        ignore_tags: Optional[Iterable[BBCodeTagLiteral]] = None,
+        domain: Optional[Text] = None,
+) -> List[Text]:
+    """
+    Перевод пачки текстов с одинаковыми параметрами, например комментариев для рассылки.
+
+    Example:
+        messages = convert_many(comments, domain="portal.bitrix24.ru")
+    """
+    converter = _get_converter(frozenset(ignore_tags or ()), domain)
+    return [converter(text) for text in texts]
@@ -0,0 +1,34 @@
+"""
+Сравнение скорости bbcode_to_telegram с прежней цепочкой regex-обработчиков.
+
+    python -m integration_utils.iu_bbcode.benchmark.bbcode_benchmark
+"""
+import timeit
+
+from integration_utils.iu_bbcode.bbcode_to_telegram import bbcode_to_telegram
+from integration_utils.iu_bbcode.benchmark.corpus import load_golden_cases
+from integration_utils.iu_bbcode.benchmark.legacy_chain import bbcode_to_telegram as legacy_bbcode_to_telegram
+
+
+def run_benchmark(number: int = 200):
+    cases = list(load_golden_cases())
+    long_text = "\n".join(text for _, text, _, _ in cases) * 20
+
+    def convert_corpus(convert):
+        for _, text, _, options in cases:
+            convert(text, **options)
+
+    rows = [
+        ("golden corpus", lambda convert: convert_corpus(convert), number),
+        ("long text ({} chars)".format(len(long_text)), lambda convert: convert(long_text), max(number // 20, 1)),
+    ]
+    for title, run, repeat in rows:
+        legacy = timeit.timeit(lambda: run(legacy_bbcode_to_telegram), number=repeat)
+        current = timeit.timeit(lambda: run(bbcode_to_telegram), number=repeat)
+        print("{:<28} legacy {:8.2f} ms  current {:8.2f} ms  x{:.1f}".format(
+            title, legacy * 1000 / repeat, current * 1000 / repeat, legacy / current,
+        ))
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,88 @@
+"""
+Корпуса BBCode для тестов и сравнения скорости: эталонные пары из iu_bbcode/golden
+и случайные тексты для сравнения с прежней цепочкой обработчиков.
+"""
+import json
+import random
+from pathlib import Path
+from typing import Iterator, List, Optional, Text, Tuple
+
+GOLDEN_DIR = Path(__file__).resolve().parent.parent / "golden"
+
+_WORDS = ("текст", "Задача", "x < y & z", "1+2=3", "(5)", "  ", "слово-2", "'кавычки'", "\n")
+
+# Парные теги: (открывающий, закрывающий)
+_FORMATTING = (
+    ("[b]", "[/b]"), ("[i]", "[/i]"), ("[u]", "[/u]"), ("[s]", "[/s]"), ("[del]", "[/del]"),
+    ("[spoiler]", "[/spoiler]"),
+)
+_SCRIPTS = (("[sub]", "[/sub]"), ("[sup]", "[/sup]"))
+_BLOCKS = (
+    ("[quote]", "[/quote]"), ("[cite]", "[/cite]"), ("[code]", "[/code]"), ("[code=PHP]", "[/code]"),
+    ("[prog lang=sql]", "[/prog]"), ("[php]", "[/php]"), ("[tt]", "[/tt]"), ("[h2]", "[/h2]"),
+    ("[url=https://example.com/1]", "[/url]"), ("[user=7]", "[/user]"), ("[color=red]", "[/color]"),
+)
+_VOID = ("[br]", "[hr]", "[p]", "[/p]")
+_EMBEDS = (
+    "[url]https://example.com/a[/url]", "[img]/upload/1.png[/img]", "[email]a@example.com[/email]",
+    "[table][tr][td]1[/td][td][b]2[/b][/td][/tr][/table]",
+)
+
+
+def load_golden_cases():
+    """Пары (имя, bbcode, ожидаемый html, параметры) из iu_bbcode/golden"""
+    options = json.loads((GOLDEN_DIR / "options.json").read_text(encoding="utf-8"))
+    for source in sorted(GOLDEN_DIR.glob("*.txt")):
+        expected = source.with_suffix(".html").read_text(encoding="utf-8")
+        yield source.stem, source.read_text(encoding="utf-8"), expected, options.get(source.stem, {})
+
+
+def _closing_name(closing: Text) -> Text:
+    return closing[2:-1]
+
+
+def _generate(rng: random.Random, depth: int, open_names: Tuple[Text, ...], in_script: bool) -> Text:
+    parts: List[Text] = []
+    for _ in range(rng.randint(1, 4)):
+        kind = rng.random()
+        if kind < 0.35 or depth == 0:
+            word = rng.choice(_WORDS)
+            parts.append(" " if in_script and word == "\n" else word)
+            continue
+
+        # Внутри [sub]/[sup] прежняя цепочка переводила цифры и в атрибутах вложенных тегов
+        pairs = _FORMATTING if in_script else _FORMATTING + _SCRIPTS + _BLOCKS
+        if kind < 0.85:
+            opening, closing = rng.choice(pairs)
+            name = _closing_name(closing)
+            # Одноименные вложенные теги прежние regex закрывали по первому закрывающему
+            if name in open_names:
+                continue
+            inner = _generate(rng, depth - 1, open_names + (name,), in_script or (opening, closing) in _SCRIPTS)
+            parts.append(opening + inner + closing)
+        elif in_script:
+            continue
+        elif kind < 0.9 and "list" not in open_names:
+            ordered = rng.random() < 0.5
+            items = "".join(
+                "[*]" + _generate(rng, depth - 1, open_names + ("list",), in_script)
+                for _ in range(rng.randint(1, 3))
+            )
+            parts.append(("[list=1]" if ordered else "[list]") + items + "[/list]")
+        elif kind < 0.95:
+            parts.append(rng.choice(_VOID))
+        else:
+            parts.append(rng.choice(_EMBEDS))
+    return "".join(parts)
+
+
+def generate_corpus(count: int = 500, seed: Optional[int] = 0, depth: int = 4) -> Iterator[Text]:
+    """
+    Случайные правильно вложенные тексты из тегов, которые понимают оба конвертера.
+
+    Одноименные теги друг в друга не вкладываются, а внутри [sub]/[sup] нет тегов
+    с атрибутами, одиночных тегов и переносов: там прежняя цепочка работала по-другому.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield _generate(rng, depth, (), False)
@@ -0,0 +1,76 @@
+import re
+from unittest import TestCase
+
+from integration_utils.iu_bbcode.bbcode_to_telegram import bbcode_to_telegram
+from integration_utils.iu_bbcode.benchmark.corpus import generate_corpus, load_golden_cases
+from integration_utils.iu_bbcode.benchmark.legacy_chain import bbcode_to_telegram as legacy_bbcode_to_telegram
+
+_HTML_TAG_RE = re.compile(r"<(/?)([a-z-]+)[^>]*>")
+_MULTIPLE_NEWLINES_RE = re.compile(r"\n\s*\n\s*\n+")
+
+
+def flatten_blocks(text):
+    """Убирает разметку внутри pre и code, кроме <code class=...> сразу в <pre>"""
+    parts = []
+    # Для каждого открытого внутри блока тега: выводить ли его
+    stack = []
+    position = 0
+    for match in _HTML_TAG_RE.finditer(text):
+        parts.append(text[position:match.start()])
+        position = match.end()
+        closing, name = match.group(1), match.group(2)
+        if not stack:
+            if not closing and name in ("pre", "code"):
+                stack.append(True)
+            parts.append(match.group())
+        elif closing:
+            if stack.pop():
+                parts.append(match.group())
+        else:
+            keep = len(stack) == 1 and match.group().startswith("<code class=")
+            stack.append(keep)
+            if keep:
+                parts.append(match.group())
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+class LegacyChainTest(TestCase):
+    """
+    Новый конвертер против прежней цепочки: вывод совпадает с точностью до разметки
+    внутри pre и code, которую Telegram не принимает.
+    """
+
+    def assertSameAsLegacy(self, text, **options):
+        result = bbcode_to_telegram(text, **options)
+        self.assertEqual(flatten_blocks(result), result)
+        legacy = flatten_blocks(legacy_bbcode_to_telegram(text, **options))
+        self.assertEqual(result, _MULTIPLE_NEWLINES_RE.sub("\n\n", legacy).strip())
+
+    def test_generated_corpus(self):
+        for number, text in enumerate(generate_corpus(2000)):
+            with self.subTest(number, text=text):
+                self.assertSameAsLegacy(text, domain="portal.example.com")
+
+    def test_golden_corpus(self):
+        # Вложенные одноименные и перекрестные теги прежние regex закрывали по первому закрывающему
+        differs = {"cross_tags", "nested_blocks"}
+        for name, text, _, options in load_golden_cases():
+            if name not in differs:
+                with self.subTest(name):
+                    self.assertSameAsLegacy(text, **options)
+
+    def test_unbalanced_tags(self):
+        # Незакрытые теги и скобки из текста не мешают разбирать теги после них
+        cases = [
+            "x[u] " * 120 + "[b]bold[/b] end",
+            "a[i] = b[i];\n" * 60 + "[b]x[/b]",
+            "[u]" * 5000 + "[b]x[/b]",
+            "[quote]a[b]b[/quote] [i]c ] [",
+            "[list=1][*]a[color=red]b\n[*]c[/list]",
+            "[code]x[u]y\n[/code] ]z[ [sub]1[url=https://example.com]2[/sub]",
+            "[spoiler][table][tr][td]1[/spoiler] [list][*]a",
+        ]
+        for text in cases:
+            with self.subTest(text=text[:40]):
+                self.assertSameAsLegacy(text, domain="portal.example.com")
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from integration_utils.iu_bbcode.bbcode_to_telegram import _get_converter, bbcode_to_telegram, convert_many
+from integration_utils.iu_bbcode.benchmark.corpus import load_golden_cases
+
+
+class BBCodeToTelegramGoldenTest(TestCase):
+    def test_golden_corpus(self):
+        for name, text, expected, options in load_golden_cases():
+            with self.subTest(name):
+                self.assertEqual(bbcode_to_telegram(text, **options), expected)
+
+    def test_empty(self):
+        self.assertEqual(bbcode_to_telegram(""), "")
+
+    def test_deep_nesting(self):
+        text = "[b]" * 1000 + "x" + "[/b]" * 1000
+        result = bbcode_to_telegram(text)
+        self.assertTrue(result.startswith("<b><b>"))
+        self.assertIn("x", result)
+
+    def test_too_deep_tags_are_text(self):
+        text = "[b]" * 150 + "x" + "[/b]" * 150 + " [i]y[/i]"
+        result = bbcode_to_telegram(text)
+        self.assertTrue(result.startswith("<b>" * 100 + "[b]"))
+        self.assertTrue(result.endswith("[/b]" + "</b>" * 100 + " <i>y</i>"))
+
+    def test_convert_many(self):
+        cases = list(load_golden_cases())
+        texts = [text for _, text, _, options in cases if options == {"domain": "portal.example.com"}]
+        expected = [expected for _, _, expected, options in cases if options == {"domain": "portal.example.com"}]
+        self.assertEqual(convert_many(texts, domain="portal.example.com"), expected)
+
+    def test_converter_is_cached(self):
+        self.assertIs(
+            _get_converter(frozenset(["code", "user"]), None),
+            _get_converter(frozenset(["user", "code"]), None),
+        )
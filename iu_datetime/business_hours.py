@@ -0,0 +1,161 @@
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from integration_utils.iu_datetime.work_calendar import get_work_calendar
+
+MICROSECONDS_IN_SECOND = 1000000
+
+
+@lru_cache(maxsize=None)
+def _numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _as_datetime(value):
+    # DtIts и другие Arrow хранят datetime в атрибуте datetime
+    return getattr(value, 'datetime', value)
+
+
+def _time_to_microseconds(value: time) -> int:
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * MICROSECONDS_IN_SECOND + value.microsecond
+
+
+class BusinessHours:
+    """
+    Рабочее время по производственному календарю для многих дат сразу:
+    признак рабочего дня, рабочие секунды между парами дат и дедлайн через N рабочих часов.
+
+    Рабочий день длится с work_start до work_end по местному времени даты (для aware datetime - в ее tzinfo,
+    вторая дата пары переводится в часовой пояс первой). Принимает datetime, date (is_workday_many) и DtIts.
+    С numpy (если установлен) считается массивами, без него - циклом по тем же формулам.
+
+    Example:
+        hours = BusinessHours(time(9), time(18))
+        hours.is_workday_many([task.deadline for task in tasks])
+        hours.seconds_between_many([(task.created, task.closed) for task in tasks])
+        hours.deadline_many([task.created for task in tasks], 16)
+    """
+
+    def __init__(
+            self,
+            work_start: time = time(9),
+            work_end: time = time(18),
+            calendar_id: Optional[str] = None,
+            use_numpy: Optional[bool] = None,
+    ):
+        """
+        :param calendar_id: id календаря из get_work_calendar, по умолчанию РФ
+        :param use_numpy: None - numpy, если установлен
+        """
+        self.calendar = get_work_calendar(calendar_id)
+        self.day_start = _time_to_microseconds(work_start)
+        self.day_length = _time_to_microseconds(work_end) - self.day_start
+        if self.day_length <= 0:
+            raise ValueError('work_end must be later than work_start')
+        self.use_numpy = _numpy_available() if use_numpy is None else use_numpy
+
+    def is_workday_many(self, days: Iterable[Union[date, datetime]]) -> List[bool]:
+        ordinals = [_as_datetime(day).toordinal() for day in days]
+        if self.use_numpy:
+            import numpy
+
+            ordinals = numpy.array(ordinals, dtype=numpy.int64)
+            calendar = self.calendar
+            return (calendar.workdays_before_array(ordinals + 1) != calendar.workdays_before_array(ordinals)).tolist()
+        return [self.calendar.is_workday(date.fromordinal(ordinal)) for ordinal in ordinals]
+
+    def seconds_between_many(self, pairs: Iterable[Tuple[datetime, datetime]]) -> List[float]:
+        """
+        Рабочие секунды между датами каждой пары (start, end), отрицательные, если end раньше start.
+        """
+        starts, ends = [], []
+        for start, end in pairs:
+            start, end = _as_datetime(start), _as_datetime(end)
+            if start.tzinfo is not None and end.tzinfo is not None:
+                end = end.astimezone(start.tzinfo)
+            starts.append(start)
+            ends.append(end)
+
+        elapsed = self._business_microseconds(ends)
+        if self.use_numpy:
+            elapsed = (elapsed - self._business_microseconds(starts)).tolist()
+        else:
+            elapsed = [end - start for start, end in zip(self._business_microseconds(starts), elapsed)]
+        return [microseconds / MICROSECONDS_IN_SECOND for microseconds in elapsed]
+
+    def deadline_many(self, starts: Sequence[datetime], hours: Union[float, Sequence[float]]) -> List[datetime]:
+        """
+        Момент, когда после каждой даты из starts пройдет hours рабочих часов.
+        Если срок истекает ровно в конце рабочего дня, возвращается конец этого дня, а не начало следующего.
+
+        :param hours: одно число для всех дат или по числу на каждую дату
+        """
+        if isinstance(hours, (int, float)):
+            hours = [hours] * len(starts)
+        durations = [round(value * 3600 * MICROSECONDS_IN_SECOND) for value in hours]
+        values = [_as_datetime(start) for start in starts]
+        passed = self._business_microseconds(values)
+
+        if self.use_numpy:
+            import numpy
+
+            targets = passed + numpy.array(durations, dtype=numpy.int64)
+            # Номер рабочего дня, в который наберется targets: ceil(targets / day_length) - 1
+            indexes = -(-targets // self.day_length) - 1
+            ordinals = self.calendar.nth_workday_array(indexes).tolist()
+            offsets = (targets - indexes * self.day_length).tolist()
+        else:
+            ordinals, offsets = [], []
+            for target in (value + duration for value, duration in zip(passed, durations)):
+                index = -(-target // self.day_length) - 1
+                ordinals.append(self.calendar.nth_workday(index))
+                offsets.append(target - index * self.day_length)
+
+        deadlines = []
+        for start, value, ordinal, offset in zip(starts, values, ordinals, offsets):
+            deadline = datetime.combine(date.fromordinal(ordinal), time(), tzinfo=value.tzinfo)
+            deadline += timedelta(microseconds=self.day_start + offset)
+            if start is not value:
+                # DtIts на входе - DtIts на выходе
+                deadline = type(start).fromdatetime(deadline)
+            deadlines.append(deadline)
+        return deadlines
+
+    def seconds_between(self, start: datetime, end: datetime) -> float:
+        return self.seconds_between_many([(start, end)])[0]
+
+    def deadline(self, start: datetime, hours: float) -> datetime:
+        return self.deadline_many([start], hours)[0]
+
+    def _business_microseconds(self, values: Sequence[datetime]):
+        """
+        Рабочие микросекунды от начала летоисчисления до каждой даты:
+        полные рабочие дни до нее плюс прошедшая часть рабочего дня, если сам день рабочий.
+        """
+        ordinals = [value.toordinal() for value in values]
+        day_times = [
+            ((value.hour * 60 + value.minute) * 60 + value.second) * MICROSECONDS_IN_SECOND + value.microsecond
+            for value in values
+        ]
+
+        if self.use_numpy:
+            import numpy
+
+            ordinals = numpy.array(ordinals, dtype=numpy.int64)
+            before = self.calendar.workdays_before_array(ordinals)
+            is_workday = self.calendar.workdays_before_array(ordinals + 1) != before
+            passed = numpy.clip(numpy.array(day_times, dtype=numpy.int64) - self.day_start, 0, self.day_length)
+            return before * self.day_length + passed * is_workday
+
+        workdays_before = self.calendar.workdays_before
+        result = []
+        for ordinal, day_time in zip(ordinals, day_times):
+            before = workdays_before(ordinal)
+            passed = min(max(day_time - self.day_start, 0), self.day_length)
+            result.append(before * self.day_length + (passed if workdays_before(ordinal + 1) != before else 0))
+        return result
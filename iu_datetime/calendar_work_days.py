@@ -1,5 +1,8 @@
 from typing import Dict, Tuple
 
+# Словарь оставлен для совместимости. is_workday и DtIts берут календарь из calendars/ru.txt
+# (integration_utils.iu_datetime.work_calendar), новые годы добавляются туда.
+
 REST: bool = False
 WORK: bool = True
 
@@ -1,11 +1,21 @@
 from arrow import Arrow, ArrowFactory
 
-from integration_utils.iu_datetime.calendar_work_days import WORK_AND_REST_DAYS
 from integration_utils.iu_datetime.functions import is_workday
+from integration_utils.iu_datetime.work_calendar import get_work_calendar
 
 from settings import ilogger
 
 # https://pypi.org/project/arrow/
+# arrow импортируется сразу: DtIts наследуется от Arrow. Календарь рабочих дней грузится при первом обращении
+
+
+def __getattr__(name):
+    # Совместимость: раньше WORK_AND_REST_DAYS импортировался сюда при загрузке модуля
+    if name == 'WORK_AND_REST_DAYS':
+        from integration_utils.iu_datetime.calendar_work_days import WORK_AND_REST_DAYS
+        return WORK_AND_REST_DAYS
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
 
 def dt_its(*args, **kwargs):
     # сокращение для DtIts.get() и обрабатывает None!!!
@@ -91,34 +101,24 @@ class DtIts(Arrow):
     def end_of_day(self):
         return self.replace(hour=23, minute=59, second=59, microsecond=999999)
 
-    def shift_workdays(self, days):
+    def shift_workdays(self, days, calendar_id=None):
         # Смещает дни учитывая рабочие и выходные.
         # Возвращает новый объект.
         # Если сегодня понедельник, то один рабочий день назад - это пятница.
         # А если сегодня суббота, то тоже - пятница.
-        # Создаём новый результат, чтобы не вернуть тот же объект.
-        result = DtIts.get(self)
-        while days:
-            if days > 0:
-                result = result.shift(days=1)
-            else:
-                result = result.shift(days=-1)
-            if result.is_workday():
-                if days > 0:
-                    days -= 1
-                else:
-                    days += 1
-        return result.shift()
-
-    def is_workday(self):
-        return is_workday(self.date())
+        # Считается по индексу календаря (WorkCalendar) без перебора дней.
+        # calendar_id - id календаря из get_work_calendar, по умолчанию РФ.
+        ordinal = self.date().toordinal()
+        return self.shift(days=get_work_calendar(calendar_id).shift_ordinal(ordinal, days) - ordinal)
+
+    def is_workday(self, calendar_id=None):
+        return is_workday(self.date(), calendar_id)
 
     @staticmethod
-    def workdays_diff(dt1: 'DtIts', dt2: 'DtIts') -> int:
+    def workdays_diff(dt1: 'DtIts', dt2: 'DtIts', calendar_id=None) -> int:
         # Должен вычислить количество полных рабочих суток.
         # Если dt1 > dt2, то вернет положительное число, иначе - отрицательное.
         # Если dt1 = понедельник 13-00 и dt2 = предыдущая пятница 16-00, то рабочие сутки ещё не прошли.
-        days = 0
         if dt1 == dt2:
             return 0
         if dt1 > dt2:
@@ -129,10 +129,13 @@ class DtIts(Arrow):
             dt_max = dt2
             dt_min = dt1
             direction = -1
-        while True:
-            dt_min = dt_min.shift_workdays(days=1)
-            if dt_max >= dt_min:
-                days += 1
-            else:
-                break
+
+        # Рабочие дни после dt_min до dt_max включительно, время сравниваем в часовом поясе dt_min
+        calendar = get_work_calendar(calendar_id)
+        ordinal_min = dt_min.date().toordinal()
+        ordinal_max = dt_max.to(dt_min.tzinfo).date().toordinal()
+        days = max(calendar.workdays_before(ordinal_max + 1) - calendar.workdays_before(ordinal_min + 1), 0)
+        if days and dt_min.shift_workdays(days, calendar_id) > dt_max:
+            # Последний рабочий день еще не прошел полностью
+            days -= 1
         return days * direction
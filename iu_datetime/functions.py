@@ -1,13 +1,15 @@
 from datetime import date
 
+from typing import Optional
+
 from django.utils import timezone
 
-from integration_utils.iu_datetime.calendar_work_days import WORK_AND_REST_DAYS
+from integration_utils.iu_datetime.work_calendar import get_work_calendar
 
 
-def is_workday(check_date: date) -> bool:
-    day_tuple = check_date.timetuple()[:3]  # (year, month, day)
-    return WORK_AND_REST_DAYS.get(day_tuple, check_date.weekday() < 5)
+def is_workday(check_date: date, calendar_id: Optional[str] = None) -> bool:
+    # Календарь загружается из файла при первой проверке, а не при импорте модуля
+    return get_work_calendar(calendar_id).is_workday(check_date)
 
-def is_today_workday() -> bool:
-    return is_workday(timezone.localdate())
+def is_today_workday(calendar_id: Optional[str] = None) -> bool:
+    return is_workday(timezone.localdate(), calendar_id)
@@ -0,0 +1,53 @@
+import random
+from datetime import date, datetime, time, timedelta, timezone
+from unittest import TestCase, skipUnless
+
+from integration_utils.iu_datetime.business_hours import BusinessHours, _numpy_available
+
+MSK = timezone(timedelta(hours=3))
+
+
+class BusinessHoursTest(TestCase):
+    def setUp(self):
+        self.hours = BusinessHours(time(9), time(18), use_numpy=False)
+
+    def test_seconds_between(self):
+        # Пятница 17:00 -> понедельник 10:00: час в пятницу и час в понедельник
+        self.assertEqual(self.hours.seconds_between(datetime(2026, 2, 13, 17), datetime(2026, 2, 16, 10)), 7200)
+        self.assertEqual(self.hours.seconds_between(datetime(2026, 2, 16, 10), datetime(2026, 2, 13, 17)), -7200)
+        # Новогодние каникулы
+        self.assertEqual(self.hours.seconds_between(datetime(2025, 12, 31, 12), datetime(2026, 1, 12, 9)), 0)
+        # Разные часовые пояса
+        self.assertEqual(self.hours.seconds_between(
+            datetime(2026, 2, 16, 9, tzinfo=MSK), datetime(2026, 2, 16, 7, tzinfo=timezone.utc),
+        ), 3600)
+
+    def test_deadline(self):
+        self.assertEqual(self.hours.deadline(datetime(2026, 2, 13, 17), 2), datetime(2026, 2, 16, 10))
+        # Срок истекает в конце рабочего дня
+        self.assertEqual(self.hours.deadline(datetime(2026, 2, 16, 9), 9), datetime(2026, 2, 16, 18))
+        self.assertEqual(self.hours.deadline(datetime(2026, 2, 14, 20, tzinfo=MSK), 1),
+                         datetime(2026, 2, 16, 10, tzinfo=MSK))
+
+    def test_is_workday_many(self):
+        self.assertEqual(self.hours.is_workday_many([date(2026, 1, 9), date(2026, 1, 12), datetime(2026, 1, 17, 12)]),
+                         [False, True, False])
+
+    @skipUnless(_numpy_available(), 'numpy is not installed')
+    def test_numpy_matches_python(self):
+        rnd = random.Random(0)
+        numpy_hours = BusinessHours(time(9), time(18), use_numpy=True)
+
+        def random_datetime():
+            return datetime(2002, 1, 1) + timedelta(minutes=rnd.randint(0, 60 * 24 * 365 * 27))
+
+        starts = [random_datetime() for _ in range(500)]
+        pairs = [(start, start + timedelta(hours=rnd.randint(-2000, 2000))) for start in starts]
+        durations = [rnd.randint(1, 500) / 4 for _ in starts]
+
+        self.assertEqual(numpy_hours.is_workday_many(starts), self.hours.is_workday_many(starts))
+        self.assertEqual(numpy_hours.seconds_between_many(pairs), self.hours.seconds_between_many(pairs))
+        deadlines = numpy_hours.deadline_many(starts, durations)
+        self.assertEqual(deadlines, self.hours.deadline_many(starts, durations))
+        for start, deadline, duration in zip(starts, deadlines, durations):
+            self.assertEqual(self.hours.seconds_between(start, deadline), duration * 3600)
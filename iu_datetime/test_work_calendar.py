@@ -0,0 +1,102 @@
+import random
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import TestCase
+
+from integration_utils.iu_datetime import work_calendar
+from integration_utils.iu_datetime.calendar_work_days import WORK_AND_REST_DAYS
+from integration_utils.iu_datetime.work_calendar import (
+    WorkCalendar, get_work_calendar, register_calendar, register_calendar_dir,
+)
+
+
+def is_workday(day: date) -> bool:
+    # Прежняя проверка по словарю
+    return WORK_AND_REST_DAYS.get(day.timetuple()[:3], day.weekday() < 5)
+
+
+def shift_workdays_by_days(day: date, days: int) -> date:
+    # Прежний алгоритм DtIts.shift_workdays: перебор по одному дню
+    step = timedelta(days=1 if days > 0 else -1)
+    while days:
+        day += step
+        if is_workday(day):
+            days -= 1 if days > 0 else -1
+    return day
+
+
+class WorkCalendarTest(TestCase):
+    def setUp(self):
+        self.calendar = get_work_calendar()
+        self.random = random.Random(0)
+
+    def random_day(self) -> date:
+        # Захватываем годы до и после диапазона календаря
+        return date(2002, 1, 1) + timedelta(days=self.random.randint(0, 365 * 27))
+
+    def test_is_workday(self):
+        for _ in range(2000):
+            day = self.random_day()
+            self.assertEqual(self.calendar.is_workday(day), is_workday(day), day)
+
+    def test_shift_workdays(self):
+        self.assertEqual(self.calendar.shift_workdays(date(2026, 1, 1), 1), date(2026, 1, 12))
+        self.assertEqual(self.calendar.shift_workdays(date(2026, 1, 12), -1), date(2025, 12, 30))
+        for _ in range(2000):
+            day = self.random_day()
+            days = self.random.randint(-30, 30)
+            self.assertEqual(self.calendar.shift_workdays(day, days), shift_workdays_by_days(day, days), (day, days))
+
+    def test_workdays_between(self):
+        pairs = []
+        for _ in range(300):
+            day = self.random_day()
+            pairs.append((day, day + timedelta(days=self.random.randint(-400, 400))))
+        expected = [
+            sum(is_workday(day_from + timedelta(days=i)) for i in range(1, (day_to - day_from).days + 1))
+            if day_to >= day_from else
+            -sum(is_workday(day_to + timedelta(days=i)) for i in range(1, (day_from - day_to).days + 1))
+            for day_from, day_to in pairs
+        ]
+        self.assertEqual(self.calendar.workdays_between_many(pairs), expected)
+
+
+class WorkCalendarProvidersTest(TestCase):
+    def setUp(self):
+        self._providers = dict(work_calendar._calendar_providers)
+        self._dirs = list(work_calendar._calendar_dirs)
+
+    def tearDown(self):
+        work_calendar._calendar_providers.clear()
+        work_calendar._calendar_providers.update(self._providers)
+        work_calendar._calendar_dirs[:] = self._dirs
+        work_calendar._load_work_calendar.cache_clear()
+
+    def test_default_calendar_matches_dict(self):
+        calendar = get_work_calendar()
+        self.assertIs(calendar, get_work_calendar('ru'))
+        for (year, month, day), is_work in WORK_AND_REST_DAYS.items():
+            self.assertEqual(calendar.is_workday(date(year, month, day)), is_work, (year, month, day))
+
+    def test_dump_and_load(self):
+        calendar = WorkCalendar.from_exceptions({(2024, 1, 1): False, (2025, 12, 27): True})
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'test.txt'
+            calendar.dump(path, 'тест')
+            loaded = WorkCalendar.load(path)
+        self.assertEqual(loaded.year_bitsets(), calendar.year_bitsets())
+        self.assertFalse(loaded.is_workday(date(2024, 1, 1)))
+        self.assertTrue(loaded.is_workday(date(2025, 12, 27)))
+
+    def test_register(self):
+        register_calendar('no_weekends', lambda: WorkCalendar(2026, [True] * 365))
+        self.assertTrue(get_work_calendar('no_weekends').is_workday(date(2026, 1, 3)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            WorkCalendar.from_exceptions({(2026, 1, 5): True}).dump(Path(directory) / 'ru.txt')
+            register_calendar_dir(directory)
+            self.assertTrue(get_work_calendar().is_workday(date(2026, 1, 5)))
+
+        with self.assertRaises(LookupError):
+            get_work_calendar('unknown')
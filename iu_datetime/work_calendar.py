@@ -0,0 +1,263 @@
+from bisect import bisect_right
+from datetime import date
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+def _weekdays_before(ordinal: int) -> int:
+    """Количество будних дней (пн-пт) с ordinal 1 (01.01.0001, понедельник) до ordinal, не включая его"""
+    weeks, rest = divmod(ordinal - 1, 7)
+    return weeks * 5 + min(rest, 5)
+
+
+class WorkCalendar:
+    """
+    Производственный календарь, скомпилированный в массив накопленного числа рабочих дней.
+
+    Внутри диапазона лет календаря рабочие дни считаются по массиву,
+    за его пределами - по дням недели, поэтому все операции работают за O(1) или O(log n)
+    без перебора дней.
+
+    Example:
+        calendar = get_work_calendar()
+        calendar.shift_workdays(date(2026, 1, 1), 1)  # date(2026, 1, 12)
+        calendar.workdays_between(date(2026, 1, 1), date(2026, 1, 31))
+    """
+
+    __slots__ = ('start', 'end', '_cumulative', '_offset', '_cumulative_array')
+
+    def __init__(self, start_year: int, flags: Sequence[bool]):
+        """
+        :param start_year: год, с 1 января которого начинаются flags
+        :param flags: признак рабочего дня для каждого дня подряд, длина - целое число лет
+        """
+        self.start = date(start_year, 1, 1).toordinal()
+        self.end = self.start + len(flags)
+
+        # _cumulative[i] - количество рабочих дней в [start, start + i)
+        self._cumulative = [0]
+        self._cumulative.extend(accumulate(flags))
+        self._offset = _weekdays_before(self.start)
+        # numpy-копия _cumulative, создается при первом вызове *_array
+        self._cumulative_array = None
+
+    @classmethod
+    def from_exceptions(cls, exceptions: Dict[Tuple[int, int, int], bool]) -> 'WorkCalendar':
+        """
+        :param exceptions: (год, месяц, день) -> True для рабочего дня, False для выходного,
+            остальные дни рабочие с понедельника по пятницу
+        """
+        years = [day[0] for day in exceptions] or [date.today().year]
+        start = date(min(years), 1, 1).toordinal()
+        end = date(max(years) + 1, 1, 1).toordinal()
+
+        flags = [(ordinal - 1) % 7 < 5 for ordinal in range(start, end)]
+        for (year, month, day), is_work in exceptions.items():
+            flags[date(year, month, day).toordinal() - start] = is_work
+        return cls(min(years), flags)
+
+    @classmethod
+    def from_year_bitsets(cls, bitsets: Dict[int, int]) -> 'WorkCalendar':
+        """
+        :param bitsets: год -> битовая маска рабочих дней (бит i - день года i + 1),
+            пропущенные годы заполняются по дням недели
+        """
+        start_year = min(bitsets)
+        flags = []
+        for year in range(start_year, max(bitsets) + 1):
+            first = date(year, 1, 1).toordinal()
+            days_in_year = date(year + 1, 1, 1).toordinal() - first
+            bitset = bitsets.get(year)
+            if bitset is None:
+                flags.extend((first + i - 1) % 7 < 5 for i in range(days_in_year))
+            else:
+                flags.extend(bool(bitset >> i & 1) for i in range(days_in_year))
+        return cls(start_year, flags)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'WorkCalendar':
+        """
+        Читает календарь из файла: строки "год шестнадцатеричная_маска", # - комментарий.
+        """
+        bitsets = {}
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    year, bitset = line.split()
+                    bitsets[int(year)] = int(bitset, 16)
+        if not bitsets:
+            raise ValueError('{}: empty work calendar'.format(path))
+        return cls.from_year_bitsets(bitsets)
+
+    def year_bitsets(self) -> Dict[int, int]:
+        bitsets = {}
+        year = date.fromordinal(self.start).year
+        first = self.start
+        while first < self.end:
+            next_first = date(year + 1, 1, 1).toordinal()
+            bitset = 0
+            for i in range(next_first - first):
+                if self._cumulative[first - self.start + i + 1] != self._cumulative[first - self.start + i]:
+                    bitset |= 1 << i
+            bitsets[year] = bitset
+            year, first = year + 1, next_first
+        return bitsets
+
+    def dump(self, path: Union[str, Path], comment: str = ''):
+        """Сохраняет календарь в формате load"""
+        with open(path, 'w', encoding='utf-8') as file:
+            for line in comment.splitlines():
+                file.write('# {}\n'.format(line))
+            for year, bitset in self.year_bitsets().items():
+                file.write('{} {:x}\n'.format(year, bitset))
+
+    def workdays_before(self, ordinal: int) -> int:
+        """Количество рабочих дней с начала летоисчисления до ordinal, не включая его"""
+        if ordinal <= self.start:
+            return _weekdays_before(ordinal)
+        if ordinal <= self.end:
+            return self._offset + self._cumulative[ordinal - self.start]
+        return self._offset + self._cumulative[-1] + _weekdays_before(ordinal) - _weekdays_before(self.end)
+
+    def nth_workday(self, index: int) -> int:
+        """ordinal рабочего дня с порядковым номером index (нумерация как у workdays_before)"""
+        inside_start = self._offset
+        inside_end = self._offset + self._cumulative[-1]
+
+        if inside_start <= index < inside_end:
+            return self.start + bisect_right(self._cumulative, index - inside_start) - 1
+
+        if index < inside_start:
+            weekdays_index = index
+        else:
+            weekdays_index = index - inside_end + _weekdays_before(self.end)
+        weeks, rest = divmod(weekdays_index, 5)
+        return weeks * 7 + rest + 1
+
+    def is_workday(self, day: date) -> bool:
+        ordinal = day.toordinal()
+        if self.start <= ordinal < self.end:
+            return self._cumulative[ordinal - self.start + 1] != self._cumulative[ordinal - self.start]
+        return day.weekday() < 5
+
+    def shift_ordinal(self, ordinal: int, days: int) -> int:
+        """
+        Смещает ordinal на days рабочих дней, как DtIts.shift_workdays:
+        один рабочий день назад от понедельника или субботы - пятница.
+        """
+        if days > 0:
+            return self.nth_workday(self.workdays_before(ordinal + 1) + days - 1)
+        if days < 0:
+            return self.nth_workday(self.workdays_before(ordinal) + days)
+        return ordinal
+
+    def shift_workdays(self, day: date, days: int) -> date:
+        return date.fromordinal(self.shift_ordinal(day.toordinal(), days))
+
+    def workdays_between(self, day_from: date, day_to: date) -> int:
+        """
+        Количество рабочих дней в (day_from, day_to].
+        Если day_to раньше day_from, то отрицательное количество рабочих дней в (day_to, day_from].
+        """
+        return self.workdays_before(day_to.toordinal() + 1) - self.workdays_before(day_from.toordinal() + 1)
+
+    def shift_workdays_many(self, days_list: Iterable[date], days: int) -> List[date]:
+        """shift_workdays для многих дат сразу"""
+        return [self.shift_workdays(day, days) for day in days_list]
+
+    def workdays_between_many(self, pairs: Iterable[Tuple[date, date]]) -> List[int]:
+        """workdays_between для пар (day_from, day_to), например для отчетов по SLA задач"""
+        workdays_before = self.workdays_before
+        return [
+            workdays_before(day_to.toordinal() + 1) - workdays_before(day_from.toordinal() + 1)
+            for day_from, day_to in pairs
+        ]
+
+
+    # Те же вычисления для numpy-массивов ordinal (numpy не обязателен и импортируется только здесь)
+
+    def _get_cumulative_array(self):
+        import numpy
+
+        if self._cumulative_array is None:
+            self._cumulative_array = numpy.array(self._cumulative, dtype=numpy.int64)
+        return self._cumulative_array
+
+    def workdays_before_array(self, ordinals):
+        """workdays_before для numpy-массива ordinal"""
+        import numpy
+
+        cumulative = self._get_cumulative_array()
+        ordinals = numpy.asarray(ordinals, dtype=numpy.int64)
+
+        weeks, rest = numpy.divmod(ordinals - 1, 7)
+        weekdays = weeks * 5 + numpy.minimum(rest, 5)
+        inside = cumulative[numpy.clip(ordinals - self.start, 0, len(cumulative) - 1)] + self._offset
+        after = self._offset + self._cumulative[-1] + weekdays - _weekdays_before(self.end)
+        return numpy.where(ordinals <= self.start, weekdays, numpy.where(ordinals <= self.end, inside, after))
+
+    def nth_workday_array(self, indexes):
+        """nth_workday для numpy-массива порядковых номеров рабочих дней"""
+        import numpy
+
+        cumulative = self._get_cumulative_array()
+        indexes = numpy.asarray(indexes, dtype=numpy.int64)
+        inside_start = self._offset
+        inside_end = self._offset + self._cumulative[-1]
+
+        inside = self.start + numpy.searchsorted(cumulative, indexes - inside_start, side='right') - 1
+        weekdays_index = numpy.where(indexes < inside_start, indexes, indexes - inside_end + _weekdays_before(self.end))
+        weeks, rest = numpy.divmod(weekdays_index, 5)
+        outside = weeks * 7 + rest + 1
+        return numpy.where((indexes >= inside_start) & (indexes < inside_end), inside, outside)
+
+
+DEFAULT_CALENDAR_ID = 'ru'
+
+# Каталог с календарями, которые идут вместе с integration_utils: <calendar_id>.txt
+CALENDARS_DIR = Path(__file__).resolve().parent / 'calendars'
+
+_calendar_providers = {}  # type: Dict[str, Callable[[], WorkCalendar]]
+_calendar_dirs = []  # type: List[Path]
+
+
+def register_calendar(calendar_id: str, provider: Callable[[], WorkCalendar]):
+    """
+    Календарь из произвольного источника (БД, API), provider вызывается один раз при первом обращении.
+
+    Example:
+        register_calendar('kz', lambda: WorkCalendar.from_exceptions(load_kz_holidays()))
+    """
+    _calendar_providers[calendar_id] = provider
+    _load_work_calendar.cache_clear()
+
+
+def register_calendar_dir(path: Union[str, Path]):
+    """
+    Каталог с файлами календарей <calendar_id>.txt, просматривается раньше встроенного CALENDARS_DIR.
+    Так календарь на новый год можно положить в проект, не дожидаясь релиза integration_utils.
+    """
+    _calendar_dirs.insert(0, Path(path))
+    _load_work_calendar.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _load_work_calendar(calendar_id: str) -> WorkCalendar:
+    provider = _calendar_providers.get(calendar_id)
+    if provider is not None:
+        return provider()
+
+    for directory in _calendar_dirs + [CALENDARS_DIR]:
+        path = directory / '{}.txt'.format(calendar_id)
+        if path.is_file():
+            return WorkCalendar.load(path)
+
+    raise LookupError('Unknown work calendar: {!r}'.format(calendar_id))
+
+
+def get_work_calendar(calendar_id: Optional[str] = None) -> WorkCalendar:
+    """Календарь по id (по умолчанию производственный календарь РФ), загружается один раз"""
+    return _load_work_calendar(calendar_id or DEFAULT_CALENDAR_ID)
@@ -0,0 +1,78 @@
+import copy
+import threading
+import time
+
+
+class KeyValueCache:
+    """Read-through cache of one key-value model: per-process dict plus Django cache.
+
+    Values live in the process for ``timeout`` seconds and in the Django cache
+    ``cache_alias`` (skipped when ``cache_alias`` is None) for the same time.
+    Writes of the owning model update both layers; other processes see the new
+    value after their per-process entry expires.
+    """
+
+    def __init__(self, namespace, timeout, cache_alias="default"):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        # key -> (expires_at, value)
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def _cache_key(self, key):
+        return "iu_key_value:{}:{}".format(self.namespace, key)
+
+    def _django_cache(self):
+        if self.cache_alias is None:
+            return None
+        from django.core.cache import caches
+
+        return caches[self.cache_alias]
+
+    def get_many(self, keys):
+        """Returns {key: value} for cached keys; missing keys are absent."""
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._local.get(key)
+                if entry is not None and entry[0] > now:
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+
+        django_cache = self._django_cache()
+        if missing and django_cache is not None:
+            cache_keys = {self._cache_key(key): key for key in missing}
+            from_django = {cache_keys[cache_key]: value for cache_key, value in django_cache.get_many(list(cache_keys)).items()}
+            self._set_local(from_django)
+            found.update(from_django)
+
+        # JSON values are mutable: callers get copies, not the cached objects
+        return {key: copy.deepcopy(value) for key, value in found.items()}
+
+    def set_many(self, mapping):
+        self._set_local(mapping)
+        django_cache = self._django_cache()
+        if django_cache is not None:
+            django_cache.set_many({self._cache_key(key): value for key, value in mapping.items()}, self.timeout)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        django_cache = self._django_cache()
+        if django_cache is not None:
+            django_cache.delete_many([self._cache_key(key) for key in keys])
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def _set_local(self, mapping):
+        expires_at = time.monotonic() + self.timeout
+        with self._lock:
+            for key, value in mapping.items():
+                self._local[key] = (expires_at, copy.deepcopy(value))
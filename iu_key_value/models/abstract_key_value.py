@@ -1,4 +1,18 @@
-from django.db import models
+import copy
+import json
+
+import django
+from django.db import IntegrityError, connections, models, router, transaction
+
+from integration_utils.iu_key_value.cache import KeyValueCache
+
+
+def _not_a_number(key):
+    return TypeError("{}: stored value is not a number".format(key))
+
+
+def _not_an_object(key, path):
+    return TypeError("{}: stored value at {} is not a JSON object".format(key, list(path)))
 
 
 class AbstractKeyValue(models.Model):
@@ -16,27 +30,40 @@ class AbstractKeyValue(models.Model):
     migrate_legacy_values = False
     log_value = True
 
+    # Read-through cache in seconds; None keeps every read in the database.
+    cache_timeout = None
+    # Django cache used together with the per-process cache; None for per-process only.
+    cache_alias = "default"
+
     class Meta:
         abstract = True
 
     def __str__(self):
         return self.key
 
+    @classmethod
+    def get_cache(cls):
+        """Returns the ``KeyValueCache`` of the concrete model or None if caching is off."""
+        if cls.cache_timeout is None:
+            return None
+        cache = cls.__dict__.get("_key_value_cache")
+        if cache is None:
+            cache = KeyValueCache(cls._meta.label_lower, cls.cache_timeout, cls.cache_alias)
+            cls._key_value_cache = cache
+        return cache
+
     @classmethod
     def set_value(cls, key, value, comment=""):
         """Stores a JSON value through the concrete descendant model.
 
         Used by cron/helper code of the owning application. A descendant with
         sensitive values may set ``log_value = False`` to avoid logging JSON.
+        One ``INSERT ... ON CONFLICT DO UPDATE``, so concurrent first writes do not race
+        (Django < 4.1 and MySQL: ``update()``, then ``create()`` for a missing key).
         """
         from settings import ilogger
 
-        update_fields = {"json_value": value}
-        if comment:
-            update_fields["comment"] = comment
-        result = cls.objects.filter(key=key).update(**update_fields)
-        if not result:
-            cls.objects.create(key=key, json_value=value, comment=comment)
+        cls._upsert({key: value}, comment)
         if cls.log_value:
             ilogger.debug("set_value", "{}->{}".format(key, value))
         else:
@@ -50,13 +77,18 @@ class AbstractKeyValue(models.Model):
         application-specific descendants intentionally do not read the old global
         table unless they explicitly opt in.
         """
+        cache = cls.get_cache()
+        if cache is not None:
+            cached = cache.get_many([key])
+            if key in cached:
+                return cached[key]
+
         try:
-            return cls.objects.get(key=key).json_value
+            value = cls.objects.get(key=key).json_value
         except cls.DoesNotExist:
             if cls.migrate_legacy_values:
-                legacy_value = cls._get_legacy_value(key)
+                legacy_value = cls._migrate_legacy_value(key)
                 if legacy_value is not None:
-                    cls.objects.create(key=key, json_value=legacy_value["value"], comment=legacy_value["comment"])
                     return legacy_value["value"]
 
             if create:
@@ -64,6 +96,317 @@ class AbstractKeyValue(models.Model):
                 return default
             return None
 
+        cls._cache_values({key: value})
+        return value
+
+    @classmethod
+    def get_values(cls, keys):
+        """Returns ``{key: value}`` for existing keys with one query for the uncached ones.
+
+        Missing keys are absent from the result (``KeyValue`` still migrates
+        them one by one from the legacy table).
+        """
+        keys = list(dict.fromkeys(keys))
+        cache = cls.get_cache()
+        values = cache.get_many(keys) if cache is not None else {}
+
+        missing = [key for key in keys if key not in values]
+        if missing:
+            loaded = dict(cls.objects.filter(key__in=missing).values_list("key", "json_value"))
+            cls._cache_values(loaded)
+            values.update(loaded)
+
+            if cls.migrate_legacy_values:
+                for key in missing:
+                    if key not in loaded:
+                        legacy_value = cls._migrate_legacy_value(key)
+                        if legacy_value is not None:
+                            values[key] = legacy_value["value"]
+
+        return {key: values[key] for key in keys if key in values}
+
+    @classmethod
+    def set_values(cls, mapping, comment=""):
+        """Stores many JSON values with one ``INSERT ... ON CONFLICT DO UPDATE``.
+
+        ``comment`` is written to every key; an empty comment keeps existing ones.
+        """
+        from settings import ilogger
+
+        if not mapping:
+            return
+        cls._upsert(mapping, comment)
+        if cls.log_value:
+            ilogger.debug("set_values", "{}".format(mapping))
+        else:
+            ilogger.debug("set_values", "{} updated".format(", ".join(mapping)))
+
+    @classmethod
+    def delete_value(cls, key):
+        """Deletes a key and drops it from the cache; returns whether the key existed."""
+        return bool(cls.delete_values([key]))
+
+    @classmethod
+    def delete_values(cls, keys):
+        """Deletes keys with one query and drops them from the cache; returns the number of deleted keys.
+
+        Use it instead of ``objects.filter(...).delete()``: the ORM delete leaves the
+        cached value, and ``get_value()`` keeps returning it until ``cache_timeout``.
+        ``KeyValue`` still migrates a key again if the legacy table has it.
+        """
+        from settings import ilogger
+
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return 0
+        deleted, _ = cls.objects.filter(key__in=keys).delete()
+        cache = cls.get_cache()
+        if cache is not None:
+            cache.delete_many(keys)
+        ilogger.debug("delete_values", "{} deleted".format(", ".join(keys)))
+        return deleted
+
+    @classmethod
+    def increment(cls, key, n=1):
+        """Atomically adds ``n`` to a numeric value (a missing key counts as 0) and returns the result.
+
+        Suited for counters shared by concurrent crons: no read-modify-write on the client.
+        Raises ``TypeError`` and keeps the value if it is not a number (or null).
+        """
+        cls._migrate_missing_legacy_value(key)
+        if cls._is_postgresql():
+            value = cls._upsert_returning(
+                key,
+                "to_jsonb(%s::numeric)", [n],
+                "to_jsonb(COALESCE(({column} #>> '{{}}')::numeric, 0) + %s::numeric)", [n],
+                "COALESCE(jsonb_typeof({column}), 'null') IN ('number', 'null')", [],
+            )
+            if value is None:
+                raise _not_a_number(key)
+        else:
+            def add(current):
+                if current is None:
+                    return n
+                if isinstance(current, bool) or not isinstance(current, (int, float)):
+                    raise _not_a_number(key)
+                return current + n
+
+            value = cls._update_locked(key, add)
+        cls._cache_values({key: value})
+        return value
+
+    @classmethod
+    def compare_and_set(cls, key, expected, new):
+        """Writes ``new`` only if the stored value equals ``expected`` and returns whether it was written.
+
+        ``expected=None`` means the key is missing (or holds null). Use it for
+        watermarks and cursors that several processes may move at once.
+        """
+        cls._migrate_missing_legacy_value(key)
+        if expected is None:
+            updated = cls.objects.filter(key=key, json_value__isnull=True).update(json_value=new)
+            if not updated:
+                try:
+                    with transaction.atomic(using=router.db_for_write(cls)):
+                        cls.objects.create(key=key, json_value=new)
+                    updated = 1
+                except IntegrityError:
+                    updated = 0
+        else:
+            updated = cls.objects.filter(key=key, json_value=expected).update(json_value=new)
+
+        cache = cls.get_cache()
+        if cache is not None:
+            if updated:
+                cache.set_many({key: new})
+            else:
+                cache.delete_many([key])
+        return bool(updated)
+
+    @classmethod
+    def merge(cls, key, patch, path=()):
+        """Atomically merges the ``patch`` dict into the stored JSON object and returns the result.
+
+        Top-level keys of ``patch`` replace keys of the object at ``path``
+        (a sequence of keys, missing or null levels are created as ``{}``).
+        Raises ``TypeError`` and keeps the value if the stored value or a level
+        on ``path`` is not an object (a list, a string, a number).
+
+        Example:
+            SyncKeyValue.merge("deals_sync", {"last_id": 1050}, path=["portals", "b24.example.com"])
+        """
+        if not isinstance(patch, dict):
+            raise TypeError("merge() patch must be a dict")
+        path = [str(part) for part in path]
+        cls._migrate_missing_legacy_value(key)
+        if cls._is_postgresql():
+            nested_patch = patch
+            for part in reversed(path):
+                nested_patch = {part: nested_patch}
+
+            update_sql = "COALESCE(NULLIF({column}, 'null'::jsonb), '{{}}'::jsonb)"
+            update_params = []
+            for depth in range(1, len(path) + 1):
+                merged = "COALESCE(NULLIF({column} #> %s::text[], 'null'::jsonb), '{{}}'::jsonb)"
+                params = [path[:depth]]
+                if depth == len(path):
+                    merged += " || %s::jsonb"
+                    params.append(json.dumps(patch))
+                update_sql = "jsonb_set({}, %s::text[], {}, true)".format(update_sql, merged)
+                update_params = update_params + [path[:depth]] + params
+            if not path:
+                update_sql += " || %s::jsonb"
+                update_params.append(json.dumps(patch))
+
+            # Every level from the root to path is an object, null or missing
+            where_sql = " AND ".join(
+                ["COALESCE(jsonb_typeof({column}), 'null') IN ('object', 'null')"]
+                + ["COALESCE(jsonb_typeof({column} #> %s::text[]), 'null') IN ('object', 'null')"] * len(path)
+            )
+            where_params = [path[:depth] for depth in range(1, len(path) + 1)]
+
+            value = cls._upsert_returning(
+                key, "%s::jsonb", [json.dumps(nested_patch)], update_sql, update_params, where_sql, where_params,
+            )
+            if value is None:
+                raise _not_an_object(key, path)
+        else:
+            def apply(current):
+                if current is None:
+                    current = {}
+                elif not isinstance(current, dict):
+                    raise _not_an_object(key, [])
+                current = copy.deepcopy(current)
+                target = current
+                for depth, part in enumerate(path, 1):
+                    if target.get(part) is None:
+                        target[part] = {}
+                    elif not isinstance(target[part], dict):
+                        raise _not_an_object(key, path[:depth])
+                    target = target[part]
+                target.update(patch)
+                return current
+
+            value = cls._update_locked(key, apply)
+        cls._cache_values({key: value})
+        return value
+
+    @classmethod
+    def _upsert(cls, mapping, comment=""):
+        update_fields = ["json_value", "comment"] if comment else ["json_value"]
+        if cls._supports_upsert():
+            cls.objects.bulk_create(
+                [cls(key=key, json_value=value, comment=comment) for key, value in mapping.items()],
+                update_conflicts=True,
+                unique_fields=["key"],
+                update_fields=update_fields,
+            )
+        else:
+            # Django < 4.1 or a backend without ON CONFLICT (key) (MySQL): update, then create the missing keys
+            using = router.db_for_write(cls)
+            with transaction.atomic(using=using):
+                for key, value in mapping.items():
+                    fields = {"json_value": value, "comment": comment} if comment else {"json_value": value}
+                    if cls.objects.filter(key=key).update(**fields):
+                        continue
+                    try:
+                        with transaction.atomic(using=using):
+                            cls.objects.create(key=key, json_value=value, comment=comment)
+                    except IntegrityError:
+                        # Another process created the key first
+                        cls.objects.filter(key=key).update(**fields)
+        cls._cache_values(mapping)
+
+    @classmethod
+    def _supports_upsert(cls):
+        """Whether ``bulk_create(update_conflicts=True, unique_fields=...)`` works for the write database."""
+        if django.VERSION < (4, 1):
+            return False
+        return connections[router.db_for_write(cls)].features.supports_update_conflicts_with_target
+
+    @classmethod
+    def _is_postgresql(cls):
+        return connections[router.db_for_write(cls)].vendor == "postgresql"
+
+    @classmethod
+    def _upsert_returning(cls, key, insert_sql, insert_params, update_sql, update_params, where_sql="TRUE",
+                          where_params=()):
+        """Runs ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` for one key on PostgreSQL.
+
+        ``{column}`` in ``update_sql`` and ``where_sql`` is replaced with the stored JSON column.
+        Returns None and changes nothing if ``where_sql`` rejects the stored row.
+        """
+        connection = connections[router.db_for_write(cls)]
+        quote_name = connection.ops.quote_name
+        table = quote_name(cls._meta.db_table)
+        key_column = quote_name(cls._meta.get_field("key").column)
+        value_column = quote_name(cls._meta.get_field("json_value").column)
+        comment_column = quote_name(cls._meta.get_field("comment").column)
+
+        column = "{}.{}".format(table, value_column)
+        sql = (
+            "INSERT INTO {table} ({key_column}, {value_column}, {comment_column}) VALUES (%s, {insert_sql}, '') "
+            "ON CONFLICT ({key_column}) DO UPDATE SET {value_column} = {update_sql} WHERE {where_sql} "
+            "RETURNING {value_column}"
+        ).format(
+            table=table, key_column=key_column, value_column=value_column, comment_column=comment_column,
+            insert_sql=insert_sql, update_sql=update_sql.format(column=column), where_sql=where_sql.format(column=column),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [key] + list(insert_params) + list(update_params) + list(where_params))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        # psycopg decodes jsonb itself, a text result means the driver did not
+        return json.loads(row[0]) if isinstance(row[0], str) else row[0]
+
+    @classmethod
+    def _update_locked(cls, key, func):
+        """Read-modify-write under ``select_for_update`` for databases without the PostgreSQL path."""
+        using = router.db_for_write(cls)
+        while True:
+            with transaction.atomic(using=using):
+                obj = cls.objects.select_for_update().filter(key=key).first()
+                if obj is not None:
+                    obj.json_value = func(obj.json_value)
+                    obj.save(update_fields=["json_value"])
+                    return obj.json_value
+                try:
+                    with transaction.atomic(using=using):
+                        value = func(None)
+                        cls.objects.create(key=key, json_value=value)
+                    return value
+                except IntegrityError:
+                    # Another process created the key first, update its value
+                    continue
+
+    @classmethod
+    def _migrate_missing_legacy_value(cls, key):
+        """Moves the legacy value in before an atomic update of a key this model does not have yet."""
+        if not cls.migrate_legacy_values or cls.objects.filter(key=key).exists():
+            return
+        try:
+            with transaction.atomic(using=router.db_for_write(cls)):
+                cls._migrate_legacy_value(key)
+        except IntegrityError:
+            # Another process has created the key meanwhile
+            pass
+
+    @classmethod
+    def _cache_values(cls, mapping):
+        cache = cls.get_cache()
+        if cache is not None and mapping:
+            cache.set_many(mapping)
+
+    @classmethod
+    def _migrate_legacy_value(cls, key):
+        """Copies a key from the legacy table into this model; None if it is not there."""
+        legacy_value = cls._get_legacy_value(key)
+        if legacy_value is not None:
+            cls.objects.create(key=key, json_value=legacy_value["value"], comment=legacy_value["comment"])
+            cls._cache_values({key: legacy_value["value"]})
+        return legacy_value
+
     @staticmethod
     def _get_legacy_value(key):
         """Reads the previous global KeyValue table for the compatibility model only."""
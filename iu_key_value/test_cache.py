@@ -0,0 +1,26 @@
+from unittest import TestCase, mock
+
+from integration_utils.iu_key_value.cache import KeyValueCache
+
+
+class KeyValueCacheTest(TestCase):
+    def setUp(self):
+        self.cache = KeyValueCache("tests.keyvalue", timeout=60, cache_alias=None)
+
+    def test_get_many_returns_cached_copies(self):
+        self.cache.set_many({"cursor": {"id": 1}})
+        value = self.cache.get_many(["cursor", "missing"])
+        self.assertEqual(value, {"cursor": {"id": 1}})
+
+        value["cursor"]["id"] = 2
+        self.assertEqual(self.cache.get_many(["cursor"]), {"cursor": {"id": 1}})
+
+    def test_expired_and_deleted(self):
+        with mock.patch("integration_utils.iu_key_value.cache.time.monotonic", return_value=100):
+            self.cache.set_many({"a": 1, "b": 2})
+        with mock.patch("integration_utils.iu_key_value.cache.time.monotonic", return_value=161):
+            self.assertEqual(self.cache.get_many(["a"]), {})
+
+        self.cache.set_many({"a": 1, "b": 2})
+        self.cache.delete_many(["a"])
+        self.assertEqual(self.cache.get_many(["a", "b"]), {"b": 2})
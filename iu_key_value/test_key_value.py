@@ -0,0 +1,201 @@
+from unittest import TestCase, mock, skipUnless
+
+# Shared test settings: SQLite in memory, IU_KEY_VALUE_TEST_DATABASE for another database
+from integration_utils import testing  # noqa: F401
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from integration_utils.iu_key_value.cache import KeyValueCache
+
+INSTALLED = apps.is_installed("integration_utils.iu_key_value") and apps.is_installed(
+    "integration_utils.its_utils.app_settings"
+)
+
+if INSTALLED:
+    from integration_utils.iu_key_value.models import KeyValue
+    from integration_utils.its_utils.app_settings.models import KeyValue as LegacyKeyValue
+
+
+def stored(key):
+    return KeyValue.objects.get(key=key).json_value
+
+
+@skipUnless(INSTALLED, "iu_key_value and app_settings are not in INSTALLED_APPS")
+class KeyValueTestCase(TestCase):
+    """Creates the KeyValue and legacy tables in the test database and empties them before each test."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with connection.schema_editor() as editor:
+            editor.create_model(KeyValue)
+            editor.create_model(LegacyKeyValue)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            editor.delete_model(KeyValue)
+            editor.delete_model(LegacyKeyValue)
+        super().tearDownClass()
+
+    def setUp(self):
+        KeyValue.objects.all().delete()
+        LegacyKeyValue.objects.all().delete()
+
+
+class KeyValueUpsertTest(KeyValueTestCase):
+    def test_set_values(self):
+        KeyValue.set_value("a", {"x": 1}, comment="first")
+        KeyValue.set_values({"a": [1], "b": None})
+        KeyValue.set_values({"b": 2, "c": "3"}, comment="batch")
+
+        rows = {row.key: (row.json_value, row.comment) for row in KeyValue.objects.all()}
+        self.assertEqual(rows, {"a": ([1], "first"), "b": (2, "batch"), "c": ("3", "batch")})
+
+
+class KeyValueUpdateCreateTest(KeyValueUpsertTest):
+    """set_values() without ON CONFLICT: Django < 4.1 and MySQL."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(KeyValue, "_supports_upsert", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class KeyValueCacheTest(KeyValueTestCase):
+    """get_value/get_values/set_values with cache_timeout on the model."""
+
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        for patcher in [
+            mock.patch.object(KeyValue, "cache_timeout", 60),
+            mock.patch.object(KeyValue, "_key_value_cache", KeyValueCache("tests.keyvalue", 60), create=True),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assertQueries(self, count, func, *args):
+        with CaptureQueriesContext(connection) as queries:
+            result = func(*args)
+        self.assertEqual(len(queries), count, [query["sql"] for query in queries])
+        return result
+
+    def test_set_then_get_is_cached(self):
+        KeyValue.set_values({"a": {"x": 1}, "b": 2})
+        self.assertEqual(self.assertQueries(0, KeyValue.get_value, "a"), {"x": 1})
+        self.assertEqual(self.assertQueries(0, KeyValue.get_values, ["b", "a"]), {"b": 2, "a": {"x": 1}})
+
+        # A direct ORM write is not seen until the cache entry expires
+        KeyValue.objects.filter(key="a").update(json_value=0)
+        self.assertEqual(KeyValue.get_value("a"), {"x": 1})
+
+    def test_read_fills_cache(self):
+        KeyValue.objects.create(key="a", json_value=1)
+        KeyValue.objects.create(key="b", json_value=2)
+        self.assertEqual(self.assertQueries(1, KeyValue.get_value, "a"), 1)
+        # Only the uncached key is read, the legacy table is checked for the missing one
+        self.assertEqual(self.assertQueries(2, KeyValue.get_values, ["a", "b", "missing"]), {"a": 1, "b": 2})
+        self.assertEqual(self.assertQueries(0, KeyValue.get_values, ["a", "b"]), {"a": 1, "b": 2})
+
+    def test_set_again_updates_cache(self):
+        KeyValue.set_value("a", 1)
+        KeyValue.get_value("a")
+        KeyValue.set_values({"a": 2})
+        self.assertEqual(self.assertQueries(0, KeyValue.get_value, "a"), 2)
+        self.assertEqual(KeyValue.increment("a"), 3)
+        self.assertEqual(self.assertQueries(0, KeyValue.get_value, "a"), 3)
+
+    def test_delete_invalidates_cache(self):
+        KeyValue.set_values({"a": 1, "b": 2, "c": 3})
+        self.assertTrue(KeyValue.delete_value("a"))
+        self.assertFalse(KeyValue.delete_value("a"))
+        self.assertEqual(KeyValue.delete_values(["b", "missing"]), 1)
+
+        self.assertIsNone(KeyValue.get_value("a"))
+        self.assertEqual(KeyValue.get_values(["a", "b", "c"]), {"c": 3})
+        # Another process reads through the Django cache: the deleted value is gone from it too
+        KeyValue.objects.create(key="a", json_value="recreated")
+        KeyValue.get_cache().clear_local()
+        self.assertEqual(KeyValue.get_values(["a", "b"]), {"a": "recreated"})
+
+    def test_without_cache_timeout(self):
+        with mock.patch.object(KeyValue, "cache_timeout", None):
+            self.assertIsNone(KeyValue.get_cache())
+            KeyValue.set_value("a", 1)
+            self.assertEqual(self.assertQueries(1, KeyValue.get_value, "a"), 1)
+            KeyValue.objects.filter(key="a").update(json_value=2)
+            self.assertEqual(KeyValue.get_values(["a"]), {"a": 2})
+            self.assertTrue(KeyValue.delete_value("a"))
+            self.assertIsNone(KeyValue.get_value("a"))
+
+
+class KeyValueAtomicTest(KeyValueTestCase):
+    def test_increment(self):
+        self.assertEqual(KeyValue.increment("counter"), 1)
+        self.assertEqual(KeyValue.increment("counter", 2.5), 3.5)
+        self.assertEqual(stored("counter"), 3.5)
+
+        KeyValue.objects.create(key="null_counter", json_value=None)
+        self.assertEqual(KeyValue.increment("null_counter", 2), 2)
+
+        for key, value in [("text", "5"), ("flag", True), ("items", [1])]:
+            KeyValue.objects.create(key=key, json_value=value)
+            with self.assertRaises(TypeError):
+                KeyValue.increment(key)
+            self.assertEqual(stored(key), value)
+
+    def test_compare_and_set(self):
+        self.assertTrue(KeyValue.compare_and_set("cursor", None, 10))
+        self.assertFalse(KeyValue.compare_and_set("cursor", None, 11))
+        self.assertFalse(KeyValue.compare_and_set("cursor", 9, 11))
+        self.assertTrue(KeyValue.compare_and_set("cursor", 10, {"id": 11}))
+        self.assertTrue(KeyValue.compare_and_set("cursor", {"id": 11}, {"id": 12}))
+        self.assertEqual(stored("cursor"), {"id": 12})
+
+    def test_merge(self):
+        self.assertEqual(KeyValue.merge("sync", {"a": 1}), {"a": 1})
+        self.assertEqual(
+            KeyValue.merge("sync", {"id": 5}, path=["portals", "b24"]),
+            {"a": 1, "portals": {"b24": {"id": 5}}},
+        )
+        self.assertEqual(
+            KeyValue.merge("sync", {"id": 6, "page": 2}, path=["portals", "b24"]),
+            {"a": 1, "portals": {"b24": {"id": 6, "page": 2}}},
+        )
+
+        KeyValue.objects.create(key="null_level", json_value={"p": None})
+        self.assertEqual(KeyValue.merge("null_level", {"x": 1}, path=["p"]), {"p": {"x": 1}})
+
+        KeyValue.objects.create(key="list", json_value=[1])
+        cases = [("list", []), ("sync", ["a"]), ("sync", ["a", "b"])]
+        for key, path in cases:
+            before = stored(key)
+            with self.assertRaises(TypeError):
+                KeyValue.merge(key, {"x": 1}, path=path)
+            self.assertEqual(stored(key), before)
+
+    def test_legacy_value_is_migrated_first(self):
+        LegacyKeyValue.objects.create(key="legacy_cursor", value="7")
+        self.assertFalse(KeyValue.compare_and_set("legacy_cursor", None, "8"))
+        self.assertTrue(KeyValue.compare_and_set("legacy_cursor", "7", "8"))
+        self.assertEqual(stored("legacy_cursor"), "8")
+
+        LegacyKeyValue.objects.create(key="legacy_counter", value="7")
+        with self.assertRaises(TypeError):
+            KeyValue.increment("legacy_counter")
+
+
+@skipUnless(INSTALLED and connection.vendor == "postgresql", "the SQL path runs on PostgreSQL only")
+class KeyValueAtomicFallbackTest(KeyValueAtomicTest):
+    """The same cases through the select_for_update path that other databases use."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(KeyValue, "_is_postgresql", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
@@ -0,0 +1,217 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from typing import NamedTuple
+
+from integration_utils.iu_logger.classes.base_logger import BaseLogger
+from integration_utils.iu_logger.classes.log_sinks import StderrLogSink
+from integration_utils.iu_logger.constants import log_levels
+
+
+class BufferedLogRecord(NamedTuple):
+    created: float
+    level: int
+    log_type: str
+    message: object
+    tag: object
+    args: tuple
+    kwargs: dict
+    # Трассировка исключения при exc_info, снятая в момент log()
+    exc_text: str = None
+
+
+class _FlushMarker:
+    # Метка в очереди: поток записи выставляет event, когда все записи до нее отданы в sink
+
+    def __init__(self):
+        self.event = threading.Event()
+
+
+_STOP = object()
+
+
+class BufferedLogger(BaseLogger):
+    # Асинхронный регистратор логов.
+    # log() только кладет запись в ограниченную очередь, фоновый поток пачками отдает записи в sink
+    # (LoggerSink, FileLogSink, HttpLogSink, ModelLogSink из log_sinks), поэтому медленный sink не замедляет запросы.
+    #
+    # При заполнении очереди на high_watermark долю записи ниже WARNING принимаются через одну из sample_every,
+    # при полной очереди записи отбрасываются. Счетчики - в stats().
+    # Незаписанное дописывается при выходе из процесса (atexit) или через flush().
+    # exc_info=True заменяется на кортеж текущего исключения, его трассировка - в record.exc_text.
+    #
+    # ilogger = BufferedLogger(LoggerSink(DbLogger()), batch_size=500)
+
+    def __init__(self, sink, max_queue_size=10000, batch_size=500, flush_interval=1.0,
+                 min_level=log_levels.DEBUG, high_watermark=0.8, sample_every=10, fallback_sink=None):
+        self.sink = sink
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.min_level = min_level
+        self.high_watermark = int(max_queue_size * high_watermark)
+        self.sample_every = sample_every
+        # Куда писать пачку, если sink упал
+        self.fallback_sink = fallback_sink or StderrLogSink()
+
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+        self.sink_errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+        self._sample_counter = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(max_queue_size)
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def log(self, log_level, log_type, message=None, tag=None, *args, **kwargs):
+        if log_level < self.min_level or self._closed:
+            return
+        self._ensure_thread()
+
+        if log_level < log_levels.WARNING and self._queue.qsize() >= self.high_watermark:
+            with self._lock:
+                self._sample_counter += 1
+                if self._sample_counter % self.sample_every:
+                    self.sampled_out += 1
+                    return
+
+        exc_text = None
+        exc_info = kwargs.get('exc_info')
+        if exc_info:
+            # В потоке записи sys.exc_info() уже пуст: исключение фиксируем здесь
+            if isinstance(exc_info, BaseException):
+                exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
+            elif not isinstance(exc_info, tuple):
+                exc_info = sys.exc_info()
+            if exc_info[0] is not None:
+                kwargs['exc_info'] = exc_info
+                exc_text = ''.join(traceback.format_exception(*exc_info))
+
+        record = BufferedLogRecord(time.time(), log_level, log_type, message, tag, args, kwargs, exc_text)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self, timeout=None):
+        """Ждет, пока записи, поставленные до вызова, уйдут в sink. False, если не дождались."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        marker = _FlushMarker()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.event.wait(timeout)
+
+    def close(self, timeout=5):
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self.sink.close()
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'dropped': self.dropped,
+            'sampled_out': self.sampled_out,
+            'written': self.written,
+            'sink_errors': self.sink_errors,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag,
+        }
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # После fork поток родителя в дочернем процессе не работает, очередь могла остаться заблокированной
+                self._queue = queue.Queue(self.max_queue_size)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='BufferedLogger', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch, markers, stop = [], [], False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.event.set()
+            if stop:
+                self._drain()
+                return
+
+    def _drain(self):
+        # Остаток очереди при закрытии
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushMarker):
+                item.event.set()
+            elif item is not _STOP:
+                batch.append(item)
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+
+    def _write(self, batch):
+        lag = time.time() - batch[0].created
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        try:
+            self.sink.write_batch(batch)
+            self.written += len(batch)
+        except Exception as exc:
+            self.sink_errors += 1
+            try:
+                self.fallback_sink.write_batch(batch)
+            except Exception:
+                pass
+            try:
+                self.fallback_sink.write_batch([BufferedLogRecord(
+                    time.time(), log_levels.ERROR, 'buffered_logger_sink_error', repr(exc), None, (), {},
+                )])
+            except Exception:
+                pass
@@ -0,0 +1,112 @@
+import json
+import sys
+import threading
+from datetime import datetime
+from logging import getLevelName
+
+
+class BaseLogSink:
+    # Приемник пачек записей для BufferedLogger.
+    # write_batch вызывается из фонового потока логгера, records - список BufferedLogRecord.
+
+    def write_batch(self, records):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+def _to_json_value(value):
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+
+def record_to_dict(record):
+    return {
+        'created': datetime.fromtimestamp(record.created).isoformat(),
+        'level': getLevelName(record.level),
+        'log_type': record.log_type,
+        'message': _to_json_value(record.message),
+        'tag': _to_json_value(record.tag),
+        'args': [_to_json_value(arg) for arg in record.args],
+        # exc_info - кортеж с трассировкой, вместо него пишется traceback
+        'kwargs': {key: _to_json_value(value) for key, value in record.kwargs.items() if key != 'exc_info'},
+        'traceback': record.exc_text,
+    }
+
+
+class LoggerSink(BaseLogSink):
+    # Передает записи другому регистратору (например, текущему ilogger проекта, который пишет в БД).
+    # Медленная запись остается, но уходит из потока запроса в фоновый поток.
+
+    def __init__(self, logger):
+        self.logger = logger
+
+    def write_batch(self, records):
+        for record in records:
+            self.logger.log(record.level, record.log_type, record.message, record.tag, *record.args, **record.kwargs)
+
+
+class FileLogSink(BaseLogSink):
+    # Дописывает записи в файл по строке JSON на запись.
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = path
+        self.encoding = encoding
+
+    def write_batch(self, records):
+        lines = ''.join(json.dumps(record_to_dict(record), ensure_ascii=False) + '\n' for record in records)
+        with open(self.path, 'a', encoding=self.encoding) as file:
+            file.write(lines)
+
+
+class HttpLogSink(BaseLogSink):
+    # Отправляет пачку одним POST с JSON-массивом записей.
+
+    def __init__(self, url, timeout=10, headers=None):
+        import requests
+
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+        self._session = requests.Session()
+
+    def write_batch(self, records):
+        response = self._session.post(
+            self.url, json=[record_to_dict(record) for record in records], headers=self.headers, timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+    def close(self):
+        self._session.close()
+
+
+class ModelLogSink(BaseLogSink):
+    # Сохраняет пачку в Django-модель одним bulk_create.
+    # make_instance(record) -> несохраненный экземпляр модели.
+
+    def __init__(self, model, make_instance):
+        self.model = model
+        self.make_instance = make_instance
+
+    def write_batch(self, records):
+        from django.db import connections
+
+        try:
+            self.model.objects.bulk_create([self.make_instance(record) for record in records])
+        finally:
+            # Соединение фонового потока само не закрывается
+            connections.close_all()
+
+
+class StderrLogSink(BaseLogSink):
+    # Запасной приемник: печать в stderr, как ConsoleLogger.
+
+    _lock = threading.Lock()
+
+    def write_batch(self, records):
+        with self._lock:
+            for record in records:
+                tag = '{}:'.format(record.tag) if record.tag else ''
+                print('{}: {}{} => {}'.format(getLevelName(record.level), tag, record.log_type, record.message), file=sys.stderr)
+                if record.exc_text:
+                    print(record.exc_text, end='', file=sys.stderr)
@@ -0,0 +1,96 @@
+import json
+import threading
+from unittest import TestCase
+
+from integration_utils.iu_logger.classes.buffered_logger import BufferedLogger
+from integration_utils.iu_logger.classes.log_sinks import BaseLogSink, record_to_dict
+
+
+class ListSink(BaseLogSink):
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def write_batch(self, records):
+        self.release.wait()
+        self.batches.append([record.log_type for record in records])
+
+
+class RecordSink(BaseLogSink):
+    def __init__(self):
+        self.records = []
+
+    def write_batch(self, records):
+        self.records.extend(records)
+
+
+class FailingSink(BaseLogSink):
+    def write_batch(self, records):
+        raise RuntimeError('sink is down')
+
+
+class BufferedLoggerTest(TestCase):
+    def test_batches_and_flush(self):
+        sink = ListSink()
+        logger = BufferedLogger(sink, batch_size=3)
+        for i in range(7):
+            logger.info('type_{}'.format(i), 'message')
+        self.assertTrue(logger.flush(timeout=5))
+        self.assertEqual(sum(sink.batches, []), ['type_{}'.format(i) for i in range(7)])
+        self.assertTrue(all(len(batch) <= 3 for batch in sink.batches))
+        self.assertEqual(logger.stats()['written'], 7)
+        logger.close()
+
+    def test_overflow_drops_and_samples(self):
+        sink = ListSink()
+        sink.release.clear()
+        logger = BufferedLogger(sink, max_queue_size=10, batch_size=1, high_watermark=0.5, sample_every=2)
+        logger.info('blocker')
+        for _ in range(40):
+            logger.error('error')
+            logger.debug('debug')
+        stats = logger.stats()
+        self.assertGreater(stats['dropped'], 0)
+        self.assertGreater(stats['sampled_out'], 0)
+        sink.release.set()
+        logger.close()
+        self.assertEqual(logger.stats()['queued'], 0)
+
+    def test_sink_error_is_counted(self):
+        fallback = ListSink()
+        logger = BufferedLogger(FailingSink(), fallback_sink=fallback)
+        logger.warning('lost', 'message')
+        logger.flush(timeout=5)
+        self.assertEqual(logger.stats()['sink_errors'], 1)
+        self.assertEqual(fallback.batches, [['lost'], ['buffered_logger_sink_error']])
+        logger.close()
+
+    def test_min_level(self):
+        sink = ListSink()
+        logger = BufferedLogger(sink, min_level=30)
+        logger.info('skipped')
+        logger.error('kept')
+        logger.close()
+        self.assertEqual(sink.batches, [['kept']])
+
+    def test_exc_info_is_captured_in_log(self):
+        sink = RecordSink()
+        logger = BufferedLogger(sink)
+        try:
+            int('not a number')
+        except ValueError:
+            logger.error('parse_failed', 'message', 'tag', 1, exc_info=True, portal=object())
+        logger.error('no_exception', exc_info=True)
+        logger.close()
+
+        record, plain = sink.records
+        self.assertIs(record.kwargs['exc_info'][0], ValueError)
+        self.assertIn('test_exc_info_is_captured_in_log', record.exc_text)
+        self.assertIn("ValueError: invalid literal for int() with base 10: 'not a number'", record.exc_text)
+        self.assertIsNone(plain.exc_text)
+
+        data = json.loads(json.dumps(record_to_dict(record)))
+        self.assertEqual(data['args'], [1])
+        self.assertEqual(list(data['kwargs']), ['portal'])
+        self.assertEqual(data['traceback'], record.exc_text)
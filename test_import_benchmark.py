@@ -0,0 +1,24 @@
+from unittest import TestCase
+
+from integration_utils.import_benchmark import measure_import, parse_importtime
+
+
+class ImportBenchmarkTest(TestCase):
+    def test_parse_importtime(self):
+        rows = parse_importtime(
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   re._parser\n'
+            'import time:       300 |        420 | re\n'
+        )
+        self.assertEqual([(row.name, row.self_us, row.cumulative_us) for row in rows],
+                         [('re._parser', 120, 120), ('re', 300, 420)])
+
+    def test_heavy_dependencies_are_lazy(self):
+        for module, lazy in [
+            ('integration_utils.iu_bbcode', 'prettytable'),
+            ('integration_utils.iu_datetime.functions', 'integration_utils.iu_datetime.calendar_work_days'),
+        ]:
+            with self.subTest(module):
+                result = measure_import(module)
+                self.assertIsNotNone(result.cumulative_us, result.error)
+                self.assertNotIn(lazy, [row.name for row in result.rows])
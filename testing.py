@@ -0,0 +1,51 @@
+"""
+Общие настройки Django для тестов integration_utils.
+
+Тестовые модули импортируют его до моделей. Настройки задаются один раз на процесс
+со всеми приложениями, которые проверяют тесты, поэтому при запуске всех тестов сразу
+результат не зависит от того, какой модуль импортирован первым.
+Если настройки уже заданы (тесты внутри проекта), модуль их не трогает.
+
+IU_KEY_VALUE_TEST_DATABASE - JSON записи DATABASES для другой базы, по умолчанию SQLite в памяти:
+
+    IU_KEY_VALUE_TEST_DATABASE='{"ENGINE": "django.db.backends.postgresql", "NAME": "..."}' python -m pytest integration_utils
+"""
+import json
+import os
+import sys
+import types
+
+import django
+from django.conf import settings
+
+try:
+    import settings as project_settings  # noqa: F401
+except ImportError:
+    # Модули integration_utils берут ilogger из settings проекта
+    from integration_utils.iu_logger.classes.mute_logger import MuteLogger
+
+    sys.modules['settings'] = types.SimpleNamespace(ilogger=MuteLogger())
+
+if not settings.configured:
+    from integration_utils.bitrix24.local_settings_class import LocalSettingsClass
+
+    settings.configure(
+        INSTALLED_APPS=[
+            'integration_utils.bitrix24',
+            'integration_utils.bitrix_robots',
+            'integration_utils.iu_key_value',
+            'integration_utils.its_utils.app_settings',
+        ],
+        # reverse() для тестового робота bitrix_robots
+        ROOT_URLCONF='integration_utils.bitrix_robots.test_base',
+        DATABASES={'default': json.loads(os.environ.get('IU_KEY_VALUE_TEST_DATABASE', 'null')) or {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:',
+        }},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        APP_SETTINGS=LocalSettingsClass(
+            portal_domain='b24.example.com', app_domain='app.example.com', app_name='test', salt='salt',
+            secret_key='secret', application_bitrix_client_id='local.test', application_bitrix_client_secret='secret',
+            application_index_path='/',
+        ),
+    )
+    django.setup()
@@ -0,0 +1,440 @@
+"""
+Прием обновлений ботов Telegram и MAX через webhook в Django вместо долгого поллинга
+
+View проверяет секрет, отбрасывает повторы (Telegram и MAX повторяют запрос, если не получили 200),
+ставит обновление в очередь и сразу отвечает 200. Обработка идет в пуле потоков процесса:
+обновления одного чата строго по очереди, разных чатов - параллельно, не больше max_workers.
+
+    # urls.py
+    telegram_webhook = TelegramWebhook(bot, handle_update, secret='...')
+    max_webhook = MaxWebhook(maxi_bot, secret='...')
+    urlpatterns = [
+        path('telegram/webhook/', telegram_webhook.as_view()),
+        path('max/webhook/', max_webhook.as_view()),
+    ]
+
+    telegram_webhook.set_webhook('https://example.com/telegram/webhook/')
+    max_webhook.set_webhook('https://example.com/max/webhook/')
+
+Очередь живет в памяти процесса: обновления, принятые, но не обработанные до перезапуска, теряются.
+Если это недопустимо, переопределите BotWebhook.accept и сохраняйте обновление в базу.
+"""
+import hmac
+import json
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from os import getpid
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .max.core.network.dispatcher import get_update_chat_id as get_max_update_chat_id
+
+QUEUED = 'queued'
+DUPLICATE = 'duplicate'
+BUSY = 'busy'
+
+
+class MemoryDedupStore:
+    """
+    Ключи принятых обновлений в памяти процесса, ключ помнится ttl секунд, не больше max_size ключей
+
+    Подходит, если webhook обслуживает один процесс. Для нескольких процессов - DjangoCacheDedupStore.
+    """
+
+    def __init__(self, ttl: float = 3600, max_size: int = 100000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._keys: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key: str) -> bool:
+        """Запоминает ключ. False, если он уже был"""
+        now = time.monotonic()
+        with self._lock:
+            expires = self._keys.get(key)
+            if expires is not None and expires > now:
+                return False
+            self._keys[key] = now + self.ttl
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+            return True
+
+    def discard(self, key: str):
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class DjangoCacheDedupStore:
+    """Ключи принятых обновлений в Django cache: cache.add атомарен, повтор отсекается во всех процессах"""
+
+    def __init__(self, namespace: str = 'bot', cache_alias: str = 'default', ttl: float = 3600):
+        self.namespace = namespace
+        self.cache_alias = cache_alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+
+        return caches[self.cache_alias]
+
+    def _key(self, key: str) -> str:
+        return f'bot_webhook:{self.namespace}:{key}'
+
+    def add(self, key: str) -> bool:
+        return self.cache.add(self._key(key), 1, timeout=self.ttl)
+
+    def discard(self, key: str):
+        self.cache.delete(self._key(key))
+
+
+class WebhookWorker:
+    """
+    Пул потоков для обновлений с сохранением порядка внутри чата
+
+    Как UpdateDispatcher в vendors/max, но без цикла событий: submit вызывается из view Django.
+    Не больше max_pending необработанных обновлений, дальше submit возвращает False.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Any],
+        max_workers: int = 8,
+        max_pending: int = 1000,
+        get_chat_id: Callable[[Dict[str, Any]], Any] = None,
+    ):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.get_chat_id = get_chat_id
+
+        self.processed = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+        self._queues: Dict[Any, Deque[Dict[str, Any]]] = {}
+        self._pending = 0
+        self._lock = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._closed = False
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self._pending,
+            'active_chats': len(self._queues),
+            'processed': self.processed,
+            'errors': self.errors,
+            'avg_latency': self.total_latency / self.processed if self.processed else 0.0,
+            'max_latency': self.max_latency,
+        }
+
+    def submit(self, update: Dict[str, Any]) -> bool:
+        """Ставит обновление в очередь его чата. False, если очередь заполнена"""
+        chat_id = self.get_chat_id(update) if self.get_chat_id is not None else None
+        # Без чата порядок не нужен: отдельная очередь на обновление
+        key = chat_id if chat_id is not None else object()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('WebhookWorker is closed')
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            queue = self._queues.get(key)
+            if queue is not None:
+                queue.append(update)
+                return True
+            self._queues[key] = deque([update])
+            executor = self._get_executor()
+        executor.submit(self._run_next, key)
+        return True
+
+    def join(self, timeout: float = None) -> bool:
+        """Ждет обработки всех принятых обновлений. False, если не дождались"""
+        with self._lock:
+            return self._lock.wait_for(lambda: not self._pending, timeout)
+
+    def close(self, timeout: float = None) -> bool:
+        """
+        Ждет очередь не дольше timeout секунд и останавливает пул. Обновления, обработка которых
+        еще не началась, отбрасываются; начатые дорабатываются в фоне, close их не ждет.
+
+        :return: True, если все обновления успели обработаться
+        """
+        finished = self.join(timeout)
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=finished)
+        return finished
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Вызывается под self._lock. После fork (gunicorn --preload) потоки родителя не наследуются
+        if self._executor is None or self._pid != getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bot_webhook')
+            self._pid = getpid()
+        return self._executor
+
+    def _run_next(self, key):
+        with self._lock:
+            queue = self._queues[key]
+            if self._closed:
+                # Пул после close дорабатывает уже поставленные вызовы, обновления чата не обрабатываются
+                self._pending -= len(queue)
+                del self._queues[key]
+                self._lock.notify_all()
+                return
+            update = queue[0]
+        started = time.monotonic()
+        failed = False
+        try:
+            self.handler(update)
+        except Exception:
+            failed = True
+            print(f'Error handling webhook update {traceback.format_exc()}')
+        latency = time.monotonic() - started
+
+        with self._lock:
+            self.processed += 1
+            self.errors += failed
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            queue = self._queues[key]
+            queue.popleft()
+            self._pending -= 1
+            if self._closed:
+                self._pending -= len(queue)
+                queue.clear()
+            if not queue:
+                del self._queues[key]
+                self._lock.notify_all()
+                return
+            executor = self._get_executor()
+        # Следующее обновление чата - в конец очереди пула, чтобы активный чат не занимал поток
+        executor.submit(self._run_next, key)
+
+
+class BotWebhook:
+    """
+    Прием обновлений бота через Django view
+
+    Наследники задают SECRET_HEADER, get_update_key (для дедупликации), get_chat_id и process.
+    """
+
+    SECRET_HEADER: str = NotImplemented
+
+    def __init__(
+        self,
+        secret: str = None,
+        max_workers: int = 8,
+        max_pending: int = 1000,
+        dedup: Any = None,
+    ):
+        """
+        :param secret: Секрет, который бот присылает в заголовке SECRET_HEADER. None - не проверять
+        :param max_workers: Сколько обновлений обрабатывать одновременно
+        :param max_pending: Сколько обновлений держать в очереди, дальше view отвечает 503 и бот повторит запрос
+        :param dedup: MemoryDedupStore (по умолчанию), DjangoCacheDedupStore или False - без дедупликации
+        """
+        self.secret = secret
+        if dedup is None:
+            dedup = MemoryDedupStore()
+        self.dedup = dedup if dedup is not False else None
+        self.worker = WebhookWorker(
+            self.process, max_workers=max_workers, max_pending=max_pending, get_chat_id=self.get_chat_id,
+        )
+        self.duplicates = 0
+        self.rejected = 0
+
+    def get_update_key(self, update: Dict[str, Any]) -> Optional[str]:
+        raise NotImplementedError()
+
+    def get_chat_id(self, update: Dict[str, Any]) -> Any:
+        return None
+
+    def process(self, update: Dict[str, Any]):
+        raise NotImplementedError()
+
+    def check_secret(self, value: Optional[str]) -> bool:
+        if not self.secret:
+            return True
+        return value is not None and hmac.compare_digest(value.encode(), self.secret.encode())
+
+    def accept(self, update: Dict[str, Any]) -> str:
+        """
+        Принимает обновление из view
+
+        :return: QUEUED, DUPLICATE или BUSY (очередь заполнена)
+        """
+        key = self.get_update_key(update) if self.dedup is not None else None
+        if key is not None and not self.dedup.add(key):
+            self.duplicates += 1
+            return DUPLICATE
+        if not self.worker.submit(update):
+            # Бот повторит обновление, оно не должно считаться повтором
+            if key is not None:
+                self.dedup.discard(key)
+            self.rejected += 1
+            return BUSY
+        return QUEUED
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.worker.stats(), duplicates=self.duplicates, rejected=self.rejected)
+
+    def as_view(self):
+        from django.http import HttpResponse, HttpResponseNotAllowed
+        from django.views.decorators.csrf import csrf_exempt
+
+        @csrf_exempt
+        def view(request):
+            if request.method != 'POST':
+                return HttpResponseNotAllowed(['POST'])
+            if not self.check_secret(request.headers.get(self.SECRET_HEADER)):
+                return HttpResponse('Wrong secret', status=403)
+            try:
+                update = json.loads(request.body)
+            except ValueError:
+                return HttpResponse('Bad update', status=400)
+            if not isinstance(update, dict):
+                return HttpResponse('Bad update', status=400)
+
+            if self.accept(update) == BUSY:
+                return HttpResponse('Busy', status=503)
+            return HttpResponse('Ok')
+
+        return view
+
+
+def get_telegram_update_chat_id(update: Dict[str, Any]) -> Optional[Any]:
+    """Чат обновления Telegram (или пользователь, если чата нет, например у inline_query)"""
+    for key, value in update.items():
+        if key == 'update_id' or not isinstance(value, dict):
+            continue
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat:
+            return chat.get('id')
+        user = value.get('from') or value.get('user')
+        if user:
+            return user.get('id')
+    return None
+
+
+class TelegramWebhook(BotWebhook):
+    """
+    Webhook бота Telegram: handler получает telegram.Update (разобранный de_json_fast)
+
+    Повторы отсекаются по update_id.
+    """
+
+    SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+    def __init__(
+        self,
+        bot: Any,
+        handler: Callable[[Any], Any],
+        secret: str = None,
+        lazy: bool = True,
+        namespace: str = None,
+        **kwargs: Any,
+    ):
+        """
+        :param bot: telegram.Bot
+        :param handler: Обработчик telegram.Update
+        :param lazy: Разбирать вложенные объекты (reply_to_message, entities, photo) при обращении
+        :param namespace: Префикс ключей дедупликации, по умолчанию id бота из токена
+        """
+        from .telegram import Update
+
+        self.bot = bot
+        self.handler = handler
+        self.lazy = lazy
+        self.namespace = namespace or bot.token.split(':', 1)[0]
+        self._update_class = Update
+        super().__init__(secret=secret, **kwargs)
+
+    def get_update_key(self, update):
+        update_id = update.get('update_id')
+        return None if update_id is None else f'telegram:{self.namespace}:{update_id}'
+
+    def get_chat_id(self, update):
+        return get_telegram_update_chat_id(update)
+
+    def process(self, update):
+        self.handler(self._update_class.de_json_fast(update, self.bot, lazy=self.lazy))
+
+    def set_webhook(self, url: str, **kwargs: Any) -> bool:
+        """bot.set_webhook с секретом этого webhook"""
+        return self.bot.set_webhook(url, secret_token=self.secret, **kwargs)
+
+
+def get_max_update_key(update: Dict[str, Any]) -> Optional[str]:
+    """
+    Ключ обновления MAX для дедупликации
+
+    У обновлений MAX нет update_id, повтор узнается по типу, id сообщения или callback и времени события.
+    """
+    update_type = update.get('update_type')
+    timestamp = update.get('timestamp')
+    if update_type is None or timestamp is None:
+        return None
+    marker = (
+        ((update.get('message') or {}).get('body') or {}).get('mid')
+        or (update.get('callback') or {}).get('callback_id')
+        or update.get('message_id')
+        or get_max_update_chat_id(update)
+    )
+    return f'{update_type}:{marker}:{timestamp}'
+
+
+class MaxWebhook(BotWebhook):
+    """
+    Webhook бота MAX: обновления обрабатывает MaxiBot, как при поллинге
+
+    Повторы отсекаются по get_max_update_key.
+    """
+
+    SECRET_HEADER = 'X-Max-Bot-Api-Secret'
+
+    def __init__(
+        self,
+        bot: Any,
+        handler: Callable[[Dict[str, Any]], Any] = None,
+        secret: str = None,
+        namespace: str = 'max',
+        **kwargs: Any,
+    ):
+        """
+        :param bot: MaxiBot
+        :param handler: Обработчик dict обновления, по умолчанию обработчики MaxiBot
+        :param namespace: Префикс ключей дедупликации, если на одном сервере несколько ботов
+        """
+        self.bot = bot
+        self.handler = handler or bot._process_update
+        self.namespace = namespace
+        super().__init__(secret=secret, **kwargs)
+
+    def get_update_key(self, update):
+        key = get_max_update_key(update)
+        return None if key is None else f'{self.namespace}:{key}'
+
+    def get_chat_id(self, update):
+        return get_max_update_chat_id(update)
+
+    def process(self, update):
+        self.handler(update)
+
+    def set_webhook(self, url: str, update_types: list = None) -> Dict[str, Any]:
+        """Подписывает бота на webhook с секретом этого webhook"""
+        return self.bot.api.subscribe(url, update_types=update_types, secret=self.secret)
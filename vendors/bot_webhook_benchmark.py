@@ -0,0 +1,101 @@
+"""
+Пропускная способность webhook ботов: прием в view и обработка в пуле против обработки по очереди.
+
+    python -m integration_utils.vendors.bot_webhook_benchmark [updates] [handler_ms]
+
+Обработчик имитирует запрос к API бота паузой handler_ms. Обновления идут из 50 чатов с повторами (10%).
+"""
+import json
+import sys
+import time
+
+from django.conf import settings
+
+from integration_utils.vendors.bot_webhook import MaxWebhook, TelegramWebhook
+from integration_utils.vendors.telegram import Bot
+
+
+def make_telegram_updates(count: int, chats: int = 50) -> list:
+    return [
+        {
+            'update_id': 800000000 + number,
+            'message': {
+                'message_id': number, 'date': 1760860800, 'text': 'Сообщение {}'.format(number),
+                'chat': {'id': number % chats, 'type': 'private'},
+                'from': {'id': number % chats, 'is_bot': False, 'first_name': 'Иван'},
+            },
+        }
+        for number in range(count)
+    ]
+
+
+def make_max_updates(count: int, chats: int = 50) -> list:
+    return [
+        {
+            'update_type': 'message_created', 'timestamp': 1760860800000 + number,
+            'message': {
+                'recipient': {'chat_id': number % chats},
+                'sender': {'user_id': number % chats, 'name': 'Иван'},
+                'body': {'mid': 'mid.{}'.format(number), 'text': 'Сообщение {}'.format(number)},
+            },
+        }
+        for number in range(count)
+    ]
+
+
+class _FakeMaxiBot:
+    def __init__(self, handler):
+        self._process_update = handler
+
+
+def run_webhook(title: str, webhook, updates: list, header: str):
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    view = webhook.as_view()
+    # Повторы: каждое десятое обновление приходит дважды
+    bodies = [json.dumps(update) for update in updates]
+    bodies += bodies[::10]
+    requests = [
+        factory.post('/webhook/', data=body, content_type='application/json', **{header: 'secret'})
+        for body in bodies
+    ]
+
+    started = time.monotonic()
+    for request in requests:
+        view(request)
+    accepted = time.monotonic() - started
+    webhook.worker.close()
+    total = time.monotonic() - started
+
+    stats = webhook.stats()
+    print('{:<9} view {:8.0f} req/s ({:.1f} us/req)  processed {:6.0f} upd/s  duplicates {}  max handler {:.0f} ms'.format(
+        title, len(requests) / accepted, accepted * 1e6 / len(requests), stats['processed'] / total,
+        stats['duplicates'], stats['max_latency'] * 1000,
+    ))
+
+
+def run_benchmark(count: int = 2000, handler_ms: float = 5):
+    if not settings.configured:
+        settings.configure()
+
+    def handler(update):
+        time.sleep(handler_ms / 1000)
+
+    started = time.monotonic()
+    for _ in range(count // 10):
+        handler(None)
+    sequential = (count // 10) / (time.monotonic() - started)
+    print('{} updates, handler {} ms, one at a time (polling loop): {:.0f} upd/s'.format(count, handler_ms, sequential))
+
+    for max_workers in (8, 32):
+        telegram = TelegramWebhook(Bot('123:benchmark'), handler, secret='secret', max_workers=max_workers,
+                                   max_pending=count)
+        run_webhook('telegram/{}'.format(max_workers), telegram, make_telegram_updates(count),
+                    'HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN')
+        max_bot = MaxWebhook(_FakeMaxiBot(handler), secret='secret', max_workers=max_workers, max_pending=count)
+        run_webhook('max/{}'.format(max_workers), max_bot, make_max_updates(count), 'HTTP_X_MAX_BOT_API_SECRET')
+
+
+if __name__ == '__main__':
+    run_benchmark(*[cast(arg) for cast, arg in zip((int, float), sys.argv[1:])])
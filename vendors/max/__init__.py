@@ -4,28 +4,41 @@ import re
 import time
 import traceback
 
-from dataclasses import dataclass
 from typing import Dict, Any, List, Optional, Callable, Union
 
-from .apihelper import Api
+from .apihelper import Api, AsyncApi
 from .errors import MaxError, MaxNetworkError, MaxTimeout, MaxUnauthorized
 from .types import CallbackQuery, InlineKeyboardMarkup, InputMedia, Message, Update, UpdateType
 from .util import extract_command, get_text, get_parse_mode, get_edit_message_data
+from .core.network.dispatcher import UpdateDispatcher
 from .core.network.polling import Polling
+from .routing import MessageRouter
+from .step_store import (
+    DjangoCacheStepHandlerStore,
+    KeyValueStepHandlerStore,
+    MemoryStepHandlerStore,
+    StepHandler,
+)
 
 __all__ = [
     "Api",
+    "AsyncApi",
     "CallbackQuery",
+    "DjangoCacheStepHandlerStore",
     "InlineKeyboardMarkup",
     "InputMedia",
+    "KeyValueStepHandlerStore",
     "MaxError",
     "MaxNetworkError",
     "MaxTimeout",
     "MaxUnauthorized",
     "MaxiBot",
+    "MemoryStepHandlerStore",
     "Message",
     "Polling",
+    "StepHandler",
     "Update",
+    "UpdateDispatcher",
     "UpdateType",
     "extract_command",
     "get_edit_message_data",
@@ -36,23 +49,20 @@ __all__ = [
 HandlerFunc = Callable[[Message], None]
 
 
-@dataclass
-class StepHandler:
-    callback: Callable
-    args: tuple
-    kwargs: dict
-    timestamp: float
-
-
 class MaxiBot:
     """
     Главный класс бота
     """
-    def __init__(self, token: str):
+    def __init__(self, token: str, next_step_store: Optional[MemoryStepHandlerStore] = None):
         """
         Метод инициализации бота
         :param token: Токен бота
         :type token: str
+
+        :param next_step_store: Хранилище обработчиков следующего шага. По умолчанию в памяти процесса
+            с TTL час и не больше 10000 записей. Чтобы диалоги переживали перезапуск -
+            DjangoCacheStepHandlerStore или KeyValueStepHandlerStore
+        :type next_step_store: Optional[MemoryStepHandlerStore]
         """
         self.api = Api(token=token)
         self.handlers = {
@@ -66,11 +76,17 @@ class MaxiBot:
             UpdateType.CHAT_TITLE_CHANGED: [],
         }
         self.message_handlers = []
+        # Индекс по message_handlers. Методы регистрации увеличивают _message_handlers_version,
+        # run_handler перестраивает индекс, если его версия отстала или список изменили напрямую
+        self._message_router = MessageRouter()
+        self._message_handlers_version = 0
+        self._message_router_version = 0
         self.callback_query_handlers = []
         self.poll = None
+        self.dispatcher = None
         self.is_running = False
         self.count_retries = 10
-        self._next_steps: Dict[int, StepHandler] = {}
+        self.next_step_store = next_step_store if next_step_store is not None else MemoryStepHandlerStore()
 
     @staticmethod
     def _build_handler_dict(handler: HandlerFunc, **filters):
@@ -86,11 +102,11 @@ class MaxiBot:
             'filters': {ftype: fvalue for ftype, fvalue in filters.items() if fvalue is not None}
         }
 
-    def polling(self, allowed_updates: Optional[List[str]] = None):
+    def polling(self, allowed_updates: Optional[List[str]] = None, max_workers: int = 1, async_client: bool = False):
         """
         Функция, которая запускает корутину
         """
-        asyncio.run(self.start(allowed_updates=allowed_updates))
+        asyncio.run(self.start(allowed_updates=allowed_updates, max_workers=max_workers, async_client=async_client))
 
     def stop(self):
         """
@@ -103,19 +119,38 @@ class MaxiBot:
             self.poll.stop()
         self.is_running = False
 
-    async def start(self, allowed_updates: Optional[List[str]] = None):
+    async def start(
+        self,
+        allowed_updates: Optional[List[str]] = None,
+        max_workers: int = 1,
+        async_client: bool = False,
+    ):
         """
         Метод запускает получение обновлений по боту
 
         :param allowed_updates: Description
         :type allowed_updates: Optional[List[str]]
+
+        :param max_workers: Сколько обновлений разных чатов обрабатывать параллельно,
+            обновления одного чата всегда обрабатываются по очереди. По умолчанию 1 - все обновления
+            по очереди, как раньше; больше 1 - только если обработчики потокобезопасны
+        :type max_workers: int
+
+        :param async_client: Получать обновления через AsyncApi (aiohttp) в цикле событий, без потока на запрос
+        :type async_client: bool
         """
         if self.is_running:
             print("Bot is already running")
             return None
         self.is_running = True
-        self.poll = Polling(api=self.api, allowed_updates=allowed_updates)
-        await self.poll.loop(self._process_update)
+        self.dispatcher = UpdateDispatcher(self._process_update, max_workers=max_workers)
+        poll_api = AsyncApi(token=self.api.client.token) if async_client else self.api
+        self.poll = Polling(api=poll_api, allowed_updates=allowed_updates, dispatcher=self.dispatcher)
+        try:
+            await self.poll.loop(self._process_update)
+        finally:
+            if async_client:
+                await poll_api.close()
 
     # def on(self, update_type: str):
     #     """
@@ -151,10 +186,37 @@ class MaxiBot:
                 content_types=content_types,
                 chat_types=chat_types
             )
-            self.message_handlers.append(handler_dict)
+            self.add_message_handler(handler_dict)
             return funcs
         return decorator
 
+    def add_message_handler(self, handler_dict):
+        """
+        Добавляет обработчик текстовых сообщений напрямую
+
+        :param handler_dict: Словарь с описанием обработчика (см. _build_handler_dict)
+        :type handler_dict: Dict[str, Any]
+
+        :return: None
+        """
+        self.message_handlers.append(handler_dict)
+        self._message_handlers_version += 1
+
+    def _get_message_router(self) -> MessageRouter:
+        """
+        Индекс обработчиков сообщений, актуальный для текущего message_handlers
+        """
+        self._message_router_version = self._message_handlers_version
+        router = self._message_router
+        if len(router) > len(self.message_handlers) or any(
+            compiled.handler_dict is not handler_dict
+            for compiled, handler_dict in zip(router.handlers, self.message_handlers)
+        ):
+            router = self._message_router = MessageRouter(self.message_handlers)
+        for handler_dict in self.message_handlers[len(router):]:
+            router.add(handler_dict)
+        return router
+
     def run_handler(self, context: Message, message_handlers: List[Dict]):
         """
         Метод запуска обработчиков событий текстового сообщения
@@ -162,6 +224,15 @@ class MaxiBot:
         :param context: Description
         :type context: Context
         """
+        if message_handlers is self.message_handlers:
+            router = self._message_router
+            if self._message_router_version != self._message_handlers_version or len(router) != len(message_handlers):
+                router = self._get_message_router()
+            function = router.find(context)
+            if function is not None:
+                function(context)
+            return
+
         for handler in message_handlers:
             if self._check_filters(context=context, handler=handler):
                 handler.get("function")(context)
@@ -256,8 +327,8 @@ class MaxiBot:
                update_type == UpdateType.BOT_STARTED or update_type == UpdateType.BOT_ADDED or \
                update_type == UpdateType.CHAT_TITLE_CHANGED:
                 context = Message(update, self.api)
-                if context.from_user.id in self._next_steps:
-                    handler = self._next_steps.pop(context.from_user.id)
+                handler = self.next_step_store.pop(context.from_user.id)
+                if handler is not None:
                     handler.callback(context, *handler.args, **handler.kwargs)
                 else:
                     self._process_text_message(context)
@@ -280,6 +351,8 @@ class MaxiBot:
         """
         Регистрирует функцию обратного вызова для получения уведомления о поступлении нового сообщения после `message`.
 
+        Обработчик действует next_step_store.ttl секунд.
+
         Предупреждение: Если `callback` используется как лямбда-функция,
         сохранение обработчиков следующего шага работать не будет.
 
@@ -297,7 +370,16 @@ class MaxiBot:
             kwargs=kwargs,
             timestamp=time.time()
         )
-        self._next_steps[message.from_user.id] = handler
+        self.next_step_store.set(message.from_user.id, handler)
+
+    def clear_step_handler(self, message: Message):
+        """
+        Отменяет обработчик следующего шага, зарегистрированный для автора сообщения
+
+        :param message: Объект сообщения
+        :type message: Message
+        """
+        self.next_step_store.delete(message.from_user.id)
 
     def send_photo(
         self,
@@ -1,6 +1,7 @@
 import requests
 from typing import TYPE_CHECKING, Dict, Any, List, Optional
 
+from .core.network.async_client import AsyncClient
 from .core.network.client import Client
 
 if TYPE_CHECKING:
@@ -15,6 +16,8 @@ class Api:
     """
     Клиент для рабты с api MAX
     """
+    is_async = False
+
     def __init__(self, token: str):
         """
         Docstring for __init__
@@ -59,6 +62,39 @@ class Api:
 
         return self.client.request("GET", "/updates", params=params)
 
+    def subscribe(
+        self,
+        url: str,
+        update_types: Optional[List[str]] = None,
+        secret: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Подписывает бота на получение обновлений через webhook
+
+        После подписки get_updates перестает работать, обновления приходят POST-запросами на url
+
+        :param url: HTTPS адрес, куда MAX будет присылать обновления
+        :param update_types: Типы обновлений, None - все
+        :param secret: Секрет, MAX присылает его в заголовке X-Max-Bot-Api-Secret
+
+        :return: Результат операции
+        :rtype: Dict[str, Any]
+        """
+        data = {"url": url}
+        if update_types:
+            data["update_types"] = update_types
+        if secret:
+            data["secret"] = secret
+        return self.client.request("POST", "/subscriptions", data=data)
+
+    def unsubscribe(self, url: str) -> Dict[str, Any]:
+        """
+        Отписывает бота от webhook, после этого снова работает get_updates
+
+        :param url: Адрес, переданный в subscribe
+        """
+        return self.client.request("DELETE", "/subscriptions", params={"url": url})
+
     def get_message(self, msg_id: str):
         """
         Получает сообщение по `msg_id`
@@ -285,3 +321,44 @@ class Api:
             data = {}
 
         return self.client.request("POST", "/answers", params=params, data=data)
+
+
+class AsyncApi(Api):
+    """
+    Асинхронный клиент api MAX: те же методы, что у Api, но возвращают корутины
+
+    async with AsyncApi(token) as api:
+        info = await api.get_my_info()
+    """
+    is_async = True
+
+    def __init__(self, token: str, timeout: float = 60, pool_size: int = 100, verify_ssl: bool = True):
+        """
+        :param token: Токен бота
+        :type token: str
+
+        :param timeout: Таймаут запроса по умолчанию в секундах
+        :type timeout: float
+
+        :param pool_size: Максимум одновременных соединений
+        :type pool_size: int
+
+        :param verify_ssl: Проверять сертификат (синхронный Client не проверяет)
+        :type verify_ssl: bool
+        """
+        self.client = AsyncClient(
+            token=token,
+            proxy=proxy,
+            timeout=timeout,
+            pool_size=pool_size,
+            verify_ssl=verify_ssl,
+        )
+
+    async def close(self):
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
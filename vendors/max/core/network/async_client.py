@@ -0,0 +1,148 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+from ...errors import MaxNetworkError, MaxTimeout
+from .client import Client, raise_for_status
+
+
+class AsyncClient:
+    """
+    Асинхронный клиент API MAX на aiohttp
+
+    Одна сессия aiohttp (и один пул соединений) на клиент, создается при первом запросе.
+    Ошибки те же, что у Client: MaxError и наследники.
+    """
+    BASE_URL = Client.BASE_URL
+
+    def __init__(
+        self,
+        token: str,
+        proxy: Optional[dict] = None,
+        timeout: float = 60,
+        pool_size: int = 100,
+        verify_ssl: bool = True,
+    ):
+        """
+        Инициализация клиента
+
+        :param token: Токен бота
+        :type token: str
+
+        :param proxy: Прокси в формате requests: {"https": "http://host:port"}
+        :type proxy: Optional[dict]
+
+        :param timeout: Таймаут запроса по умолчанию в секундах
+        :type timeout: float
+
+        :param pool_size: Максимум одновременных соединений
+        :type pool_size: int
+        """
+        self.token = token
+        self.proxy = (proxy or {}).get("https") or None
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.verify_ssl = verify_ssl
+        self._session = None
+
+    def _make_url(self, path: str) -> str:
+        return f"{self.BASE_URL}{path}"
+
+    @property
+    def session(self):
+        """Сессия aiohttp, привязана к циклу событий, в котором создана"""
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ssl=None if self.verify_ssl else False),
+                headers={"Authorization": self.token},
+            )
+        return self._session
+
+    async def close(self):
+        """Закрывает сессию и соединения пула"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @staticmethod
+    def _build_form(files: Dict[str, Any]):
+        # files в формате requests: {"поле": содержимое} или {"поле": (имя, содержимое, content_type)}
+        import aiohttp
+
+        form = aiohttp.FormData()
+        for field, value in files.items():
+            if isinstance(value, tuple):
+                file_name, content = value[0], value[1]
+                content_type = value[2] if len(value) > 2 else None
+                form.add_field(field, content, filename=file_name, content_type=content_type)
+            else:
+                form.add_field(field, value, filename=getattr(value, "name", field))
+        return form
+
+    async def request(
+        self,
+        method: str,
+        path: str = None,
+        url: str = None,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        content_types: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Асинхронный запрос к API MAX, параметры как у Client.request
+
+        :param timeout: Таймаут этого запроса в секундах, по умолчанию self.timeout
+        :type timeout: Optional[float]
+
+        :return: Ответ API MAX на заданный метод
+        :rtype: Dict[str, Any]
+        """
+        import aiohttp
+
+        url = self._make_url(path) if not url else url
+        headers = {}
+        if content_types:
+            headers["Content-Type"] = content_types
+        kwargs = {}
+        if files:
+            kwargs["data"] = self._build_form(files)
+        elif data:
+            kwargs["json"] = data
+
+        try:
+            async with self.session.request(
+                method,
+                url,
+                params=params,
+                headers=headers,
+                proxy=self.proxy,
+                timeout=aiohttp.ClientTimeout(total=timeout if timeout is not None else self.timeout),
+                **kwargs,
+            ) as response:
+                if 200 <= response.status <= 299:
+                    return await response.json(content_type=None)
+                response_data = await self._parse(response)
+        except asyncio.TimeoutError as exc:
+            raise MaxTimeout("Timed out") from exc
+        except aiohttp.ClientError as exc:
+            raise MaxNetworkError(f"aiohttp ClientError {exc}") from exc
+
+        raise_for_status(response.status, response_data)
+
+    @staticmethod
+    async def _parse(response) -> Dict[str, Any]:
+        text = await response.text()
+        try:
+            return json.loads(text)
+        except ValueError:
+            return {"message": text or "Unknown HTTPError"}
@@ -1,11 +1,54 @@
 import json
+import os
 from typing import Any, Dict, Optional
 
 import requests
 
+from ....multipart_stream import MultipartStream
 from ...errors import MaxBadRequest, MaxError, MaxNetworkError, MaxNotFound, MaxTimeout, MaxUnauthorized
 
 
+def _file_field(name: str, value: Any) -> tuple:
+    # Как в requests: файл без кортежа получает имя открытого файла или имя поля
+    if isinstance(value, tuple):
+        return value
+    file_name = getattr(value, "name", None)
+    return (os.path.basename(file_name) if isinstance(file_name, str) else name), value
+
+
+def raise_for_status(status_code: int, response_data: Dict[str, Any]):
+    """
+    Исключение MaxError по коду ответа MAX API, общее для Client и AsyncClient
+
+    :param status_code: HTTP-код ответа (не 2xx)
+    :type status_code: int
+
+    :param response_data: Тело ответа с ошибкой
+    :type response_data: Dict[str, Any]
+    """
+    error_code = response_data.get("code")
+    message = response_data.get("message") or response_data.get("error_description") or "Unknown HTTPError"
+
+    if status_code in (401, 403):
+        error_class = MaxUnauthorized
+    elif status_code == 400:
+        error_class = MaxBadRequest
+    elif status_code == 404:
+        error_class = MaxNotFound
+    elif status_code == 502:
+        error_class, message = MaxNetworkError, "Bad Gateway"
+    elif status_code in (408, 429, 500, 503, 504):
+        error_class, message = MaxNetworkError, f"{message} ({status_code})"
+    else:
+        error_class = MaxError
+    raise error_class(
+        message,
+        status_code=status_code,
+        error_code=error_code,
+        response_data=response_data,
+    )
+
+
 class Client:
     """
     Класс низкоуровневых запросов к API MAX
@@ -43,7 +86,8 @@ class Client:
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         files: Optional[Dict[str, Any]] = None,
-        content_types: Optional[str] = None
+        content_types: Optional[str] = None,
+        timeout: float = 60,
     ) -> Dict[str, Any]:
         """
         Главные метод по отправке запроса к API MAX
@@ -63,6 +107,9 @@ class Client:
         :param files: Файлы для отправкиescription
         :type files: Optional[Dict[str, Any]]
 
+        :param timeout: Таймаут запроса в секундах
+        :type timeout: float
+
         :return: Ответ API MAX на заданный метод
         :rtype: Dict[str, Any]
         """
@@ -77,7 +124,13 @@ class Client:
         }
         if content_types:
             headers["Content-Type"] = content_types
-        if data and not files:
+        if files:
+            # Файлы читаются по кускам во время отправки, тело не собирается в памяти
+            file_fields = [(name, _file_field(name, value)) for name, value in files.items()]
+            data = MultipartStream(list((data or {}).items()) + file_fields)
+            headers.update(data.headers)
+            files = None
+        elif data:
             headers["Content-Type"] = "application/json"
             data = json.dumps(data)
 
@@ -91,7 +144,7 @@ class Client:
                 headers=headers,
                 verify=False,
                 proxies=self.proxy,
-                timeout=60,
+                timeout=timeout,
             )
         except requests.exceptions.Timeout as exc:
             raise MaxTimeout("Timed out") from exc
@@ -101,51 +154,7 @@ class Client:
         if 200 <= response.status_code <= 299:
             return response.json()
 
-        response_data = self._parse(response)
-        error_code = response_data.get("code")
-        message = response_data.get("message") or response_data.get("error_description") or "Unknown HTTPError"
-
-        if response.status_code in (401, 403):
-            raise MaxUnauthorized(
-                message,
-                status_code=response.status_code,
-                error_code=error_code,
-                response_data=response_data,
-            )
-        if response.status_code == 400:
-            raise MaxBadRequest(
-                message,
-                status_code=response.status_code,
-                error_code=error_code,
-                response_data=response_data,
-            )
-        if response.status_code == 404:
-            raise MaxNotFound(
-                message,
-                status_code=response.status_code,
-                error_code=error_code,
-                response_data=response_data,
-            )
-        if response.status_code == 502:
-            raise MaxNetworkError(
-                "Bad Gateway",
-                status_code=response.status_code,
-                error_code=error_code,
-                response_data=response_data,
-            )
-        if response.status_code in (408, 429, 500, 503, 504):
-            raise MaxNetworkError(
-                f"{message} ({response.status_code})",
-                status_code=response.status_code,
-                error_code=error_code,
-                response_data=response_data,
-            )
-        raise MaxError(
-            message,
-            status_code=response.status_code,
-            error_code=error_code,
-            response_data=response_data,
-        )
+        raise_for_status(response.status_code, self._parse(response))
 
     @staticmethod
     def _parse(response: requests.Response) -> Dict[str, Any]:
@@ -0,0 +1,177 @@
+import asyncio
+import inspect
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+# Ключ общей очереди при max_workers=1
+_SINGLE_QUEUE = object()
+
+
+def get_update_chat_id(update: Dict[str, Any]) -> Optional[Any]:
+    """
+    Чат, к которому относится обновление MAX
+
+    :param update: Обновление из get_updates
+    :type update: Dict[str, Any]
+
+    :return: chat_id или None, если чат определить не удалось
+    :rtype: Optional[Any]
+    """
+    if update.get("chat_id") is not None:
+        return update["chat_id"]
+    recipient = (update.get("message") or {}).get("recipient") or {}
+    if recipient.get("chat_id") is not None:
+        return recipient["chat_id"]
+    user = update.get("user") or (update.get("callback") or {}).get("user") or {}
+    return user.get("user_id")
+
+
+class UpdateDispatcher:
+    """
+    Параллельная обработка обновлений с сохранением порядка внутри чата
+
+    Обновления одного чата обрабатываются строго по очереди, разных чатов - параллельно,
+    не больше max_workers одновременно. При max_workers=1 все обновления идут одной очередью
+    в порядке получения, как в поллинге без диспетчера. Синхронный обработчик выполняется в пуле потоков,
+    асинхронный (корутина) - в цикле событий.
+    Если в очереди max_pending обновлений, submit ждет, поэтому поллинг не опережает обработку.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Any],
+        max_workers: int = 8,
+        max_pending: int = 1000,
+        get_chat_id: Callable[[Dict[str, Any]], Any] = get_update_chat_id,
+    ):
+        """
+        Инициализация диспетчера
+
+        :param handler: Обработчик одного обновления, обычная функция или корутина
+        :type handler: Callable[[Dict[str, Any]], Any]
+
+        :param max_workers: Сколько обновлений обрабатывать одновременно
+        :type max_workers: int
+
+        :param max_pending: Сколько обновлений держать в очереди, дальше submit ждет
+        :type max_pending: int
+        """
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.get_chat_id = get_chat_id
+
+        self.processed = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+        self._queues: Dict[Any, Deque[Dict[str, Any]]] = {}
+        self._tasks = set()
+        self._pending = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._has_room: Optional[asyncio.Condition] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._is_async_handler = inspect.iscoroutinefunction(handler)
+
+    @property
+    def queue_depth(self) -> int:
+        """Обновления, которые приняты, но еще не обработаны"""
+        return self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Метрики диспетчера
+
+        :return: Глубина очереди, активные чаты, обработано, ошибки, средняя и максимальная длительность обработки в секундах
+        :rtype: Dict[str, Any]
+        """
+        return {
+            "queue_depth": self._pending,
+            "active_chats": len(self._queues),
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_latency": self.total_latency / self.processed if self.processed else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+    async def submit(self, update: Dict[str, Any]):
+        """
+        Ставит обновление в очередь его чата
+
+        :param update: Обновление из get_updates
+        :type update: Dict[str, Any]
+        """
+        self._init_loop_objects()
+        async with self._has_room:
+            await self._has_room.wait_for(lambda: self._pending < self.max_pending)
+            self._pending += 1
+
+        if self.max_workers == 1:
+            key = _SINGLE_QUEUE
+        else:
+            chat_id = self.get_chat_id(update)
+            # Без чата порядок не нужен: отдельная очередь на обновление
+            key = chat_id if chat_id is not None else object()
+        queue = self._queues.get(key)
+        if queue is not None:
+            queue.append(update)
+            return
+        self._queues[key] = deque([update])
+        task = asyncio.ensure_future(self._run_chat(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def join(self):
+        """Ждет обработки всех принятых обновлений"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def close(self):
+        """Дожидается очереди и останавливает пул потоков"""
+        await self.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _init_loop_objects(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._has_room = asyncio.Condition()
+            if not self._is_async_handler:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="max_dispatcher")
+
+    async def _run_chat(self, key):
+        queue = self._queues[key]
+        try:
+            while queue:
+                update = queue[0]
+                async with self._semaphore:
+                    await self._handle(update)
+                queue.popleft()
+                async with self._has_room:
+                    self._pending -= 1
+                    self._has_room.notify()
+        finally:
+            self._queues.pop(key, None)
+
+    async def _handle(self, update: Dict[str, Any]):
+        started = time.monotonic()
+        try:
+            if self._is_async_handler:
+                await self.handler(update)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, self.handler, update)
+                if inspect.isawaitable(result):
+                    await result
+        except Exception:
+            self.errors += 1
+            print(f"Error handling update {traceback.format_exc()}")
+        finally:
+            latency = time.monotonic() - started
+            self.processed += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
@@ -3,6 +3,8 @@ import traceback
 
 from typing import Callable, List, Optional, Dict, Any
 
+from .dispatcher import UpdateDispatcher
+
 # from api import Api
 
 
@@ -11,21 +13,38 @@ class Polling:
     Класс получения обновлений из API MAX через поллинг
     """
 
-    def __init__(self, api, allowed_updates: Optional[List[str]] = None):
+    def __init__(
+        self,
+        api,
+        allowed_updates: Optional[List[str]] = None,
+        dispatcher: Optional[UpdateDispatcher] = None,
+        backoff_initial: float = 1,
+        backoff_max: float = 30,
+    ):
         """
         Инициализация класса
 
-        :param api: Клиент АПИ
+        :param api: Клиент АПИ. С AsyncApi обновления запрашиваются в цикле событий, без потоков
         :type api: Api
 
         :param allowed_updates: Клиент АПИ
         :type allowed_updates: Optional[List[str]]
+
+        :param dispatcher: Параллельная обработка обновлений, без него обработчик вызывается по очереди
+        :type dispatcher: Optional[UpdateDispatcher]
+
+        :param backoff_initial: Пауза после первой ошибки получения обновлений, дальше удваивается до backoff_max
+        :type backoff_initial: float
         """
         self.api = api
         self.allowed_updates = allowed_updates
+        self.dispatcher = dispatcher
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
         self.is_running = False
         self.marker = None
         self.is_prev_add = False
+        self.poll_errors = 0
 
     def stop(self):
         """
@@ -42,28 +61,40 @@ class Polling:
         """
         self.is_running = True
         print("Starting polling loop")
+        backoff = self.backoff_initial
 
         while self.is_running:
             try:
                 updates_data = await self._get_updates()
-                if "marker" in updates_data.keys():
-                    self.marker = updates_data["marker"]
-                updates = updates_data.get("updates", [])
-                for update in updates:
-                    try:
-                        if update.get("update_type") == "bot_added" and self.is_prev_add:
-                            continue
+            except Exception:
+                self.poll_errors += 1
+                print(f"Some error in get updates, retry in {backoff}s {traceback.format_exc()}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+            backoff = self.backoff_initial
+
+            if "marker" in updates_data.keys():
+                self.marker = updates_data["marker"]
+            updates = updates_data.get("updates", [])
+            for update in updates:
+                try:
+                    if update.get("update_type") == "bot_added" and self.is_prev_add:
+                        continue
+                    else:
+                        if update.get("update_type") == "bot_added":
+                            self.is_prev_add = True
+                        else:
+                            self.is_prev_add = False
+                        if self.dispatcher is not None:
+                            await self.dispatcher.submit(update)
                         else:
-                            if update.get("update_type") == "bot_added":
-                                self.is_prev_add = True
-                            else:
-                                self.is_prev_add = False
                             handler(update)
-                    except Exception:
-                        print(f"Error handling update {traceback.format_exc()}")
+                except Exception:
+                    print(f"Error handling update {traceback.format_exc()}")
 
-            except Exception:
-                print(f"Some error in get updates {traceback.format_exc()}")
+        if self.dispatcher is not None:
+            await self.dispatcher.close()
 
     async def _get_updates(self) -> Dict[str, Any]:
         """
@@ -75,6 +106,8 @@ class Polling:
         params = {}
         if self.marker is not None:
             params["marker"] = self.marker
+        if getattr(self.api, "is_async", False):
+            return await self.api.get_updates(self.allowed_updates or [], params)
         updates_data = await asyncio.to_thread(
             self.api.get_updates,
             self.allowed_updates or [],
@@ -0,0 +1,85 @@
+import asyncio
+import importlib.util
+from unittest import TestCase, skipUnless
+
+from integration_utils.vendors.max import AsyncApi, MaxError
+from integration_utils.vendors.max.errors import MaxNotFound, MaxTimeout
+
+
+@skipUnless(importlib.util.find_spec("aiohttp"), "aiohttp is not installed")
+class AsyncClientTest(TestCase):
+    def run_with_server(self, scenario):
+        from aiohttp import web
+
+        async def updates(request):
+            return web.json_response({
+                "updates": [],
+                "marker": int(request.query.get("marker", 0)) + 1,
+                "types": request.query.get("types"),
+                "auth": request.headers.get("Authorization"),
+            })
+
+        async def messages(request):
+            return web.json_response({"body": await request.json(), "chat_id": request.query["chat_id"]})
+
+        async def upload(request):
+            form = await request.post()
+            return web.json_response({"name": form["data"].filename, "size": len(form["data"].file.read())})
+
+        async def slow(request):
+            await asyncio.sleep(1)
+            return web.json_response({})
+
+        async def missing(request):
+            return web.json_response({"code": "not.found", "message": "Chat not found"}, status=404)
+
+        async def main():
+            app = web.Application()
+            app.router.add_get("/updates", updates)
+            app.router.add_post("/messages", messages)
+            app.router.add_post("/upload", upload)
+            app.router.add_get("/slow", slow)
+            app.router.add_get("/chats/1", missing)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = runner.addresses[0][1]
+
+            api = AsyncApi(token="token")
+            api.client.BASE_URL = f"http://127.0.0.1:{port}"
+            try:
+                return await scenario(api)
+            finally:
+                await api.close()
+                await runner.cleanup()
+
+        return asyncio.run(main())
+
+    def test_api_surface(self):
+        async def scenario(api):
+            updates = await api.get_updates(["message_created"], {"marker": 5})
+            sent = await api.send_message(chat_id=10, text="hi")
+            session = api.client.session
+            uploaded = await api.load_file(
+                url=f"{api.client.BASE_URL}/upload", files={"data": ("a.txt", b"12345", "text/plain")},
+            )
+            self.assertIs(api.client.session, session)
+            return updates, sent, uploaded
+
+        updates, sent, uploaded = self.run_with_server(scenario)
+        self.assertEqual(updates, {"updates": [], "marker": 6, "types": "message_created", "auth": "token"})
+        self.assertEqual(sent["body"]["text"], "hi")
+        self.assertEqual(sent["chat_id"], "10")
+        self.assertEqual(uploaded, {"name": "a.txt", "size": 5})
+
+    def test_errors(self):
+        async def scenario(api):
+            with self.assertRaises(MaxNotFound) as error:
+                await api.get_chat_info(1)
+            self.assertEqual(error.exception.error_code, "not.found")
+            self.assertIsInstance(error.exception, MaxError)
+            with self.assertRaises(MaxTimeout):
+                await api.client.request("GET", "/slow", timeout=0.1)
+
+        self.run_with_server(scenario)
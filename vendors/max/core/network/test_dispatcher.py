@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+from integration_utils.vendors.max.core.network.dispatcher import UpdateDispatcher, get_update_chat_id
+
+
+def make_update(chat_id, number):
+    return {"update_type": "message_created", "number": number, "message": {"recipient": {"chat_id": chat_id}}}
+
+
+class UpdateDispatcherTest(TestCase):
+    def test_chat_order_and_parallelism(self):
+        handled = []
+        active = set()
+        overlaps = []
+        lock = threading.Lock()
+
+        def handler(update):
+            chat_id = get_update_chat_id(update)
+            with lock:
+                if chat_id in active:
+                    overlaps.append(chat_id)
+                active.add(chat_id)
+            time.sleep(0.02)
+            with lock:
+                active.discard(chat_id)
+                handled.append((chat_id, update["number"]))
+
+        async def run():
+            dispatcher = UpdateDispatcher(handler, max_workers=4)
+            for number in range(5):
+                for chat_id in (1, 2, 3, 4):
+                    await dispatcher.submit(make_update(chat_id, number))
+            await dispatcher.close()
+            return dispatcher
+
+        started = time.monotonic()
+        dispatcher = asyncio.run(run())
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(overlaps, [])
+        for chat_id in (1, 2, 3, 4):
+            self.assertEqual([number for chat, number in handled if chat == chat_id], list(range(5)))
+        # 20 обновлений по 20 мс в 4 потока
+        self.assertLess(elapsed, 0.3)
+        self.assertEqual(dispatcher.stats()["processed"], 20)
+        self.assertEqual(dispatcher.stats()["queue_depth"], 0)
+
+    def test_single_worker_keeps_arrival_order(self):
+        handled = []
+
+        def handler(update):
+            time.sleep(0.001)
+            handled.append((get_update_chat_id(update), update["number"]))
+
+        async def run():
+            dispatcher = UpdateDispatcher(handler, max_workers=1)
+            updates = [make_update(1, 0), make_update(1, 1), make_update(2, 0), make_update(1, 2), make_update(3, 0)]
+            for update in updates:
+                await dispatcher.submit(update)
+            await dispatcher.close()
+
+        asyncio.run(run())
+        self.assertEqual(handled, [(1, 0), (1, 1), (2, 0), (1, 2), (3, 0)])
+
+    def test_async_handler_and_errors(self):
+        handled = []
+
+        async def handler(update):
+            await asyncio.sleep(0)
+            if update["number"] == 1:
+                raise ValueError("broken handler")
+            handled.append(update["number"])
+
+        async def run():
+            dispatcher = UpdateDispatcher(handler, max_pending=2)
+            for number in range(4):
+                await dispatcher.submit(make_update(1, number))
+            await dispatcher.join()
+            return dispatcher
+
+        dispatcher = asyncio.run(run())
+        self.assertEqual(handled, [0, 2, 3])
+        self.assertEqual(dispatcher.stats()["errors"], 1)
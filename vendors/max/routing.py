@@ -0,0 +1,109 @@
+import heapq
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from .util import extract_command
+
+
+class CompiledHandler:
+    """
+    Обработчик сообщений с фильтрами, подготовленными при регистрации
+
+    Регулярное выражение скомпилировано, списки content_types, chat_types и commands превращены в множества.
+    Дешевые фильтры проверяются раньше regexp и func.
+    """
+
+    __slots__ = ("function", "commands", "regexp", "func", "content_types", "chat_types", "handler_dict")
+
+    def __init__(self, handler_dict: Dict[str, Any]):
+        """
+        :param handler_dict: Словарь из MaxiBot._build_handler_dict
+        :type handler_dict: Dict[str, Any]
+        """
+        filters = handler_dict["filters"]
+        self.handler_dict = handler_dict
+        self.function = handler_dict["function"]
+        self.commands = frozenset(filters["commands"]) if filters.get("commands") is not None else None
+        self.regexp = re.compile(filters["regexp"], re.IGNORECASE) if filters.get("regexp") is not None else None
+        self.func = filters.get("func")
+        self.content_types = frozenset(filters["content_types"]) if filters.get("content_types") is not None else None
+        self.chat_types = frozenset(filters["chat_types"]) if filters.get("chat_types") is not None else None
+
+    def check(self, context, command: Optional[str]) -> bool:
+        """
+        Проверка сообщения на все фильтры обработчика
+
+        :param context: Сообщение
+        :type context: Message
+
+        :param command: Команда из текста сообщения (extract_command), считается один раз на сообщение
+        :type command: Optional[str]
+        """
+        if self.content_types is not None and context.content_type not in self.content_types:
+            return False
+        if self.chat_types is not None and context.chat.type not in self.chat_types:
+            return False
+        if self.commands is not None and command not in self.commands:
+            return False
+        if self.regexp is not None and (context.text is None or not self.regexp.search(context.text)):
+            return False
+        if self.func is not None and not self.func(context):
+            return False
+        return True
+
+
+class MessageRouter:
+    """
+    Индекс обработчиков сообщений MaxiBot
+
+    Обработчики с фильтром commands разложены по словарю команда -> номера обработчиков,
+    поэтому /command проверяет только свои обработчики и обработчики без команд.
+    Порядок регистрации сохраняется: срабатывает первый подходящий обработчик, как и раньше.
+    Обработчик без фильтров (@bot.message_handler()) не срабатывает никогда, как и в MaxiBot._check_filters.
+    """
+
+    def __init__(self, handler_dicts: List[Dict[str, Any]] = ()):
+        self.handlers: List[CompiledHandler] = []
+        self._by_command: Dict[str, List[int]] = {}
+        self._without_command: List[int] = []
+        for handler_dict in handler_dicts:
+            self.add(handler_dict)
+
+    def __len__(self):
+        return len(self.handlers)
+
+    def add(self, handler_dict: Dict[str, Any]):
+        handler = CompiledHandler(handler_dict)
+        index = len(self.handlers)
+        self.handlers.append(handler)
+        if not handler_dict["filters"]:
+            return
+        if handler.commands is None:
+            self._without_command.append(index)
+        else:
+            for command in handler.commands:
+                self._by_command.setdefault(command, []).append(index)
+
+    def find(self, context) -> Optional[Callable]:
+        """
+        Первый по порядку регистрации обработчик, подходящий сообщению
+
+        :param context: Сообщение
+        :type context: Message
+
+        :return: Функция обработчика или None
+        :rtype: Optional[Callable]
+        """
+        command = extract_command(context.text)
+        with_command = self._by_command.get(command) if command is not None else None
+        if with_command:
+            indexes = heapq.merge(with_command, self._without_command)
+        else:
+            indexes = self._without_command
+
+        handlers = self.handlers
+        for index in indexes:
+            handler = handlers[index]
+            if handler.check(context, command):
+                return handler.function
+        return None
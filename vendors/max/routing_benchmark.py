@@ -0,0 +1,59 @@
+"""
+Стоимость выбора обработчика сообщения MaxiBot: перебор словарей фильтров против MessageRouter.
+
+    python -m integration_utils.vendors.max.routing_benchmark
+"""
+import timeit
+from types import SimpleNamespace
+
+from integration_utils.vendors.max import MaxiBot, Message
+
+
+def make_bot(handlers_count: int) -> MaxiBot:
+    bot = MaxiBot(token="benchmark")
+
+    def handler(message):
+        pass
+
+    for i in range(handlers_count):
+        kind = i % 4
+        if kind == 0:
+            bot.message_handler(commands=["command_{}".format(i)])(handler)
+        elif kind == 1:
+            bot.message_handler(regexp=r"^order\s+{}\b".format(i))(handler)
+        elif kind == 2:
+            bot.message_handler(content_types=["photo"], chat_types=["chat"])(handler)
+        else:
+            bot.message_handler(func=lambda message, i=i: message.text == "button {}".format(i))(handler)
+    bot.message_handler(func=lambda message: True)(handler)
+    return bot
+
+
+def make_message(text: str, content_type: str = "text") -> Message:
+    # Message без обращения к API: маршрутизации нужны только text, content_type и chat.type
+    message = Message.__new__(Message)
+    message.text = text
+    message.content_type = content_type
+    message.chat = SimpleNamespace(type="dialog")
+    return message
+
+
+def run_benchmark(handlers_count: int = 300, number: int = 2000):
+    bot = make_bot(handlers_count)
+    messages = {
+        "command (last)": make_message("/command_{}".format(handlers_count - 4)),
+        "unknown command": make_message("/unknown"),
+        "plain text": make_message("hello"),
+        "photo": make_message("", "photo"),
+    }
+    print("{} handlers".format(len(bot.message_handlers)))
+    for title, message in messages.items():
+        legacy = timeit.timeit(lambda: bot.run_handler(message, list(bot.message_handlers)), number=number)
+        current = timeit.timeit(lambda: bot.run_handler(message, bot.message_handlers), number=number)
+        print("{:<16} legacy {:8.1f} us  router {:8.1f} us  x{:.1f}".format(
+            title, legacy * 1e6 / number, current * 1e6 / number, legacy / current,
+        ))
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,314 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class StepHandler:
+    callback: Callable
+    args: tuple
+    kwargs: dict
+    timestamp: float
+
+
+def callback_path(callback: Callable) -> Optional[str]:
+    """
+    Путь "модуль:имя" функции для сохранения в постоянное хранилище
+
+    :return: None для лямбд, вложенных функций и других объектов, которые нельзя импортировать заново
+    :rtype: Optional[str]
+    """
+    module = getattr(callback, "__module__", None)
+    qualname = getattr(callback, "__qualname__", None)
+    if not module or not qualname or "<" in qualname:
+        return None
+    return f"{module}:{qualname}"
+
+
+def resolve_callback(path: str) -> Callable:
+    module_name, qualname = path.split(":", 1)
+    target = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    return target
+
+
+class MemoryStepHandlerStore:
+    """
+    Обработчики следующего шага в памяти процесса
+
+    Запись живет ttl секунд с момента регистрации, хранится не больше max_size записей:
+    при переполнении вытесняется та, к которой дольше всего не обращались.
+    """
+
+    def __init__(self, ttl: float = 3600, max_size: int = 10000):
+        """
+        :param ttl: Сколько секунд ждать следующего сообщения пользователя, None - без ограничения
+        :type ttl: float
+
+        :param max_size: Максимум записей
+        :type max_size: int
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._handlers: "OrderedDict[Any, StepHandler]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._handlers)
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+    def is_expired(self, handler: StepHandler) -> bool:
+        return self.ttl is not None and handler.timestamp + self.ttl < time.time()
+
+    def set(self, user_id, handler: StepHandler):
+        with self._lock:
+            self._handlers[user_id] = handler
+            self._handlers.move_to_end(user_id)
+            while len(self._handlers) > self.max_size:
+                self._handlers.popitem(last=False)
+
+    def get(self, user_id) -> Optional[StepHandler]:
+        with self._lock:
+            handler = self._handlers.get(user_id)
+            if handler is None:
+                return None
+            if self.is_expired(handler):
+                del self._handlers[user_id]
+                return None
+            self._handlers.move_to_end(user_id)
+            return handler
+
+    def pop(self, user_id) -> Optional[StepHandler]:
+        with self._lock:
+            handler = self._handlers.pop(user_id, None)
+        if handler is None or self.is_expired(handler):
+            return None
+        return handler
+
+    def delete(self, user_id):
+        with self._lock:
+            self._handlers.pop(user_id, None)
+
+    def cleanup(self) -> int:
+        """
+        Удаляет просроченные записи
+
+        :return: Сколько записей удалено
+        :rtype: int
+        """
+        with self._lock:
+            expired = [user_id for user_id, handler in self._handlers.items() if self.is_expired(handler)]
+            for user_id in expired:
+                del self._handlers[user_id]
+        return len(expired)
+
+
+class PersistentStepHandlerStore(MemoryStepHandlerStore):
+    """
+    Обработчики следующего шага, которые переживают перезапуск бота
+
+    Запись дублируется в постоянное хранилище в виде {"callback": "модуль:имя", "args", "kwargs", "timestamp"}.
+    Поэтому callback должен быть функцией уровня модуля или методом класса. Лямбды и вложенные функции
+    хранятся только в памяти процесса. Наследники реализуют _load, _save и _remove.
+
+    pop() вызывается на каждое сообщение, а обработчик ждет редкий пользователь. miss_ttl секунд
+    store помнит, что у пользователя обработчика нет, и не читает хранилище повторно.
+    Включайте, только если обработчики регистрирует этот же процесс (polling): обработчик,
+    записанный другим процессом, станет виден не раньше чем через miss_ttl.
+    """
+
+    def __init__(self, ttl: float = 3600, max_size: int = 10000, miss_ttl: float = 0):
+        """
+        :param miss_ttl: Сколько секунд не перечитывать хранилище для пользователя без обработчика, 0 - всегда читать
+        :type miss_ttl: float
+        """
+        super().__init__(ttl=ttl, max_size=max_size)
+        self.miss_ttl = miss_ttl
+        # user_id -> когда перестать доверять промаху
+        self._misses: "OrderedDict[Any, float]" = OrderedDict()
+
+    def set(self, user_id, handler: StepHandler):
+        super().set(user_id, handler)
+        with self._lock:
+            self._misses.pop(user_id, None)
+        path = callback_path(handler.callback)
+        if path is None:
+            print(f"Step handler {handler.callback!r} is not importable, it will not survive restart")
+            return
+        self._save(user_id, {
+            "callback": path,
+            "args": list(handler.args),
+            "kwargs": handler.kwargs,
+            "timestamp": handler.timestamp,
+        })
+
+    def get(self, user_id) -> Optional[StepHandler]:
+        handler = super().get(user_id)
+        if handler is None:
+            handler = self._restore(user_id)
+            if handler is not None:
+                super().set(user_id, handler)
+        return handler
+
+    def pop(self, user_id) -> Optional[StepHandler]:
+        handler = super().pop(user_id)
+        if handler is None:
+            # Прочитанный обработчик _restore удаляет сам, при промахе удалять нечего
+            return self._restore(user_id, remove=True)
+        self._remove(user_id)
+        return handler
+
+    def delete(self, user_id):
+        super().delete(user_id)
+        self._remove(user_id)
+
+    def _is_known_miss(self, user_id) -> bool:
+        with self._lock:
+            expires_at = self._misses.get(user_id)
+            if expires_at is None:
+                return False
+            if expires_at > time.monotonic():
+                return True
+            del self._misses[user_id]
+            return False
+
+    def _remember_miss(self, user_id):
+        if not self.miss_ttl:
+            return
+        with self._lock:
+            self._misses[user_id] = time.monotonic() + self.miss_ttl
+            self._misses.move_to_end(user_id)
+            while len(self._misses) > self.max_size:
+                self._misses.popitem(last=False)
+
+    def _restore(self, user_id, remove: bool = False) -> Optional[StepHandler]:
+        """
+        Читает обработчик из постоянного хранилища
+
+        :param remove: Удалить найденный обработчик из хранилища (pop)
+        :type remove: bool
+        """
+        if self._is_known_miss(user_id):
+            return None
+        data = self._load(user_id)
+        if not data:
+            self._remember_miss(user_id)
+            return None
+        try:
+            handler = StepHandler(
+                callback=resolve_callback(data["callback"]),
+                args=tuple(data.get("args") or ()),
+                kwargs=data.get("kwargs") or {},
+                timestamp=data["timestamp"],
+            )
+        except Exception as exc:
+            print(f"Can not restore step handler {data.get('callback')}: {exc}")
+            self._remove(user_id)
+            return None
+        if self.is_expired(handler):
+            self._remove(user_id)
+            return None
+        if remove:
+            self._remove(user_id)
+        return handler
+
+    def _load(self, user_id) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError()
+
+    def _save(self, user_id, data: Dict[str, Any]):
+        raise NotImplementedError()
+
+    def _remove(self, user_id):
+        raise NotImplementedError()
+
+
+class DjangoCacheStepHandlerStore(PersistentStepHandlerStore):
+    """
+    Обработчики следующего шага в Django cache (Redis, Memcached, база), запись истекает через ttl
+    """
+
+    def __init__(
+        self,
+        namespace: str = "max",
+        cache_alias: str = "default",
+        ttl: float = 3600,
+        max_size: int = 10000,
+        miss_ttl: float = 0,
+    ):
+        super().__init__(ttl=ttl, max_size=max_size, miss_ttl=miss_ttl)
+        self.namespace = namespace
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+
+        return caches[self.cache_alias]
+
+    def _key(self, user_id) -> str:
+        return f"max_next_step:{self.namespace}:{user_id}"
+
+    def _load(self, user_id):
+        return self.cache.get(self._key(user_id))
+
+    def _save(self, user_id, data):
+        self.cache.set(self._key(user_id), data, timeout=self.ttl)
+
+    def _remove(self, user_id):
+        self.cache.delete(self._key(user_id))
+
+
+class KeyValueStepHandlerStore(PersistentStepHandlerStore):
+    """
+    Обработчики следующего шага в таблице iu_key_value (или другом наследнике AbstractKeyValue)
+
+    args и kwargs должны сериализоваться в JSON. Строки пользователей, которые так и не ответили,
+    удаляет cleanup() (например, из cron).
+    """
+
+    def __init__(self, namespace: str = "max", model=None, ttl: float = 3600, max_size: int = 10000, miss_ttl: float = 0):
+        super().__init__(ttl=ttl, max_size=max_size, miss_ttl=miss_ttl)
+        self.namespace = namespace
+        self._model = model
+
+    @property
+    def model(self):
+        if self._model is None:
+            from integration_utils.iu_key_value.models import KeyValue
+
+            self._model = KeyValue
+        return self._model
+
+    def _key_prefix(self) -> str:
+        return f"max_next_step_{self.namespace}_"
+
+    def _key(self, user_id) -> str:
+        return f"{self._key_prefix()}{user_id}"
+
+    def _load(self, user_id):
+        return self.model.get_value(self._key(user_id))
+
+    def _save(self, user_id, data):
+        self.model.set_value(self._key(user_id), data, comment="Обработчик следующего шага бота MAX")
+
+    def _remove(self, user_id):
+        # Через delete_value, чтобы запись ушла и из кэша модели (cache_timeout), иначе обработчик сработает снова
+        self.model.delete_value(self._key(user_id))
+
+    def cleanup(self) -> int:
+        # Записи в памяти дублируют строки таблицы, поэтому считаются только удаленные строки
+        super().cleanup()
+        if self.ttl is None:
+            return 0
+        expired_before = time.time() - self.ttl
+        rows = self.model.objects.filter(key__startswith=self._key_prefix()).values_list("key", "json_value")
+        expired = [key for key, value in rows if not isinstance(value, dict) or value.get("timestamp", 0) < expired_before]
+        if expired:
+            self.model.delete_values(expired)
+        return len(expired)
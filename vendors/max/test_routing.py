@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+from integration_utils.vendors.max import MaxiBot, Message
+
+
+def make_message(text, content_type="text", chat_type="dialog"):
+    message = Message.__new__(Message)
+    message.text = text
+    message.content_type = content_type
+    message.chat = SimpleNamespace(type=chat_type)
+    return message
+
+
+class MessageRouterTest(TestCase):
+    def setUp(self):
+        self.bot = MaxiBot(token="test")
+        self.called = []
+
+        def register(name, **filters):
+            self.bot.message_handler(**filters)(lambda message: self.called.append(name))
+
+        register("start", commands=["start", "help"])
+        register("order", regexp=r"^order\s+\d+")
+        register("photo_in_chat", content_types=["photo"], chat_types=["chat"])
+        register("start_in_chat", commands=["start"], chat_types=["chat"])
+        register("yes", func=lambda message: message.text == "yes")
+        register("fallback", content_types=["text"])
+
+    def route(self, message):
+        self.called.clear()
+        self.bot.run_handler(message, self.bot.message_handlers)
+        routed = list(self.called)
+        self.called.clear()
+        self.bot.run_handler(message, list(self.bot.message_handlers))
+        self.assertEqual(routed, self.called)
+        return routed
+
+    def test_same_as_filter_loop(self):
+        self.assertEqual(self.route(make_message("/start payload")), ["start"])
+        self.assertEqual(self.route(make_message("/help@bot")), ["start"])
+        self.assertEqual(self.route(make_message("/start", chat_type="chat")), ["start"])
+        self.assertEqual(self.route(make_message("ORDER 15")), ["order"])
+        self.assertEqual(self.route(make_message("", "photo", "chat")), ["photo_in_chat"])
+        self.assertEqual(self.route(make_message("", "photo")), [])
+        self.assertEqual(self.route(make_message("yes")), ["yes"])
+        self.assertEqual(self.route(make_message("/unknown")), ["fallback"])
+
+    def test_handlers_added_directly(self):
+        self.bot.message_handlers.insert(0, self.bot._build_handler_dict(
+            lambda message: self.called.append("first"), regexp="urgent",
+        ))
+        self.assertEqual(self.route(make_message("urgent order 1")), ["first"])
+
+    def test_handler_without_filters_never_fires(self):
+        self.bot.message_handlers.clear()
+        register = self.bot.message_handler()
+        register(lambda message: self.called.append("any"))
+        self.assertEqual(self.route(make_message("hello")), [])
+        self.assertEqual(self.route(make_message("/start")), [])
+
+    def test_same_count_after_registration(self):
+        self.assertEqual(self.route(make_message("/unknown")), ["fallback"])
+        # Количество обработчиков не изменилось, но индекс должен перестроиться по версии
+        self.bot.message_handlers.pop()
+        self.bot.add_message_handler(self.bot._build_handler_dict(
+            lambda message: self.called.append("other"), content_types=["text"],
+        ))
+        self.assertEqual(self.route(make_message("/unknown")), ["other"])
@@ -0,0 +1,194 @@
+import time
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from integration_utils.iu_key_value import test_key_value
+from integration_utils.vendors.max import MaxiBot, Message, MemoryStepHandlerStore, StepHandler
+from integration_utils.vendors.max.step_store import (
+    DjangoCacheStepHandlerStore,
+    KeyValueStepHandlerStore,
+    PersistentStepHandlerStore,
+)
+
+calls = []
+
+
+def remember_answer(message, question):
+    calls.append((message.text, question))
+
+
+class DictStepHandlerStore(PersistentStepHandlerStore):
+    def __init__(self, storage, **kwargs):
+        super().__init__(**kwargs)
+        self.storage = storage
+        self.loads = 0
+        self.removes = 0
+
+    def _load(self, user_id):
+        self.loads += 1
+        return self.storage.get(user_id)
+
+    def _save(self, user_id, data):
+        self.storage[user_id] = data
+
+    def _remove(self, user_id):
+        self.removes += 1
+        self.storage.pop(user_id, None)
+
+
+def make_handler(callback=remember_answer, timestamp=None):
+    return StepHandler(callback=callback, args=("name",), kwargs={}, timestamp=timestamp or time.time())
+
+
+class MemoryStepHandlerStoreTest(TestCase):
+    def test_ttl(self):
+        store = MemoryStepHandlerStore(ttl=60)
+        store.set(1, make_handler(timestamp=time.time() - 61))
+        store.set(2, make_handler())
+        self.assertIsNone(store.pop(1))
+        self.assertIsNotNone(store.pop(2))
+        self.assertIsNone(store.pop(2))
+
+    def test_lru(self):
+        store = MemoryStepHandlerStore(max_size=2)
+        store.set(1, make_handler())
+        store.set(2, make_handler())
+        store.get(1)
+        store.set(3, make_handler())
+        self.assertEqual(len(store), 2)
+        self.assertIn(1, store)
+        self.assertNotIn(2, store)
+
+    def test_cleanup(self):
+        store = MemoryStepHandlerStore(ttl=60)
+        for user_id in range(5):
+            store.set(user_id, make_handler(timestamp=time.time() - 100))
+        store.set(5, make_handler())
+        self.assertEqual(store.cleanup(), 5)
+        self.assertEqual(len(store), 1)
+
+
+class PersistentStepHandlerStoreTest(TestCase):
+    def test_survives_restart(self):
+        storage = {}
+        DictStepHandlerStore(storage).set(1, make_handler())
+        handler = DictStepHandlerStore(storage).pop(1)
+        self.assertIs(handler.callback, remember_answer)
+        self.assertEqual(handler.args, ("name",))
+        self.assertEqual(storage, {})
+
+    def test_lambda_kept_in_memory_only(self):
+        storage = {}
+        store = DictStepHandlerStore(storage)
+        store.set(1, make_handler(callback=lambda message: None))
+        self.assertEqual(storage, {})
+        self.assertIsNotNone(store.pop(1))
+
+    def test_expired_not_restored(self):
+        storage = {}
+        DictStepHandlerStore(storage, ttl=60).set(1, make_handler(timestamp=time.time() - 61))
+        self.assertIsNone(DictStepHandlerStore(storage, ttl=60).pop(1))
+        self.assertEqual(storage, {})
+
+
+    def test_pop_without_handler_does_not_remove(self):
+        store = DictStepHandlerStore({})
+        self.assertIsNone(store.pop(1))
+        self.assertIsNone(store.pop(1))
+        self.assertEqual((store.loads, store.removes), (2, 0))
+
+    def test_miss_ttl(self):
+        storage = {}
+        store = DictStepHandlerStore(storage, miss_ttl=60, max_size=1)
+        self.assertIsNone(store.pop(1))
+        self.assertIsNone(store.get(1))
+        self.assertEqual(store.loads, 1)
+
+        # Обработчик, записанный другим процессом, не виден до истечения miss_ttl
+        DictStepHandlerStore(storage).set(1, make_handler())
+        self.assertIsNone(store.pop(1))
+        with mock.patch("integration_utils.vendors.max.step_store.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertIsNotNone(store.pop(1))
+
+        # Свой set() сбрасывает промах: обработчик 1 вытеснен из памяти, но читается из хранилища
+        self.assertIsNone(store.pop(1))
+        store.set(1, make_handler())
+        store.set(2, make_handler())
+        self.assertIsNotNone(store.pop(1))
+
+
+class ConsumedOnceMixin:
+    """Обработчик, прочитанный из хранилища после перезапуска, срабатывает один раз"""
+
+    def make_store(self):
+        raise NotImplementedError()
+
+    def test_consumed_once(self):
+        self.make_store().set(1, make_handler())
+        handler = self.make_store().pop(1)
+        self.assertIs(handler.callback, remember_answer)
+        self.assertIsNone(self.make_store().pop(1))
+        self.assertIsNone(self.make_store().get(1))
+
+    def test_delete(self):
+        self.make_store().set(1, make_handler())
+        self.make_store().delete(1)
+        self.assertIsNone(self.make_store().pop(1))
+
+
+class DjangoCacheStepHandlerStoreTest(ConsumedOnceMixin, TestCase):
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches["default"].clear()
+
+    def make_store(self):
+        return DjangoCacheStepHandlerStore(namespace="test")
+
+
+class KeyValueStepHandlerStoreTest(ConsumedOnceMixin, test_key_value.KeyValueTestCase):
+    """KeyValue с кэшем чтения: удаление должно убрать запись и из кэша модели"""
+
+    def setUp(self):
+        super().setUp()
+        from django.core.cache import caches
+
+        caches["default"].clear()
+        for patcher in [
+            mock.patch.object(test_key_value.KeyValue, "cache_timeout", 60),
+            mock.patch.object(
+                test_key_value.KeyValue, "_key_value_cache",
+                test_key_value.KeyValueCache("tests.keyvalue", 60), create=True,
+            ),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_store(self):
+        return KeyValueStepHandlerStore(namespace="test")
+
+    def test_cleanup(self):
+        store = self.make_store()
+        store.set(1, make_handler(timestamp=time.time() - 7200))
+        store.set(2, make_handler())
+        self.assertEqual(self.make_store().cleanup(), 1)
+        self.assertIsNone(self.make_store().pop(1))
+        self.assertIsNotNone(self.make_store().pop(2))
+
+
+class MaxiBotNextStepTest(TestCase):
+    def test_next_step_after_restart(self):
+        storage = {}
+        message = Message.__new__(Message)
+        message.from_user = SimpleNamespace(id=7)
+        MaxiBot(token="test", next_step_store=DictStepHandlerStore(storage)).register_next_step_handler(
+            message, remember_answer, "name",
+        )
+
+        bot = MaxiBot(token="test", next_step_store=DictStepHandlerStore(storage))
+        message.text = "Ivan"
+        calls.clear()
+        with mock.patch("integration_utils.vendors.max.Message", return_value=message):
+            bot._process_update({"update_type": "message_created", "message": {}})
+        self.assertEqual(calls, [("Ivan", "name")])
+        self.assertIsNone(bot.next_step_store.pop(7))
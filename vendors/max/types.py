@@ -570,7 +570,8 @@ class InputMedia(JsonDeserializable):
     :param type: Тип медиа (photo/file)
     :type type: str
 
-    :param media: Байты медиа
+    :param media: Байты медиа, путь к файлу, открытый файл или итератор кусков bytes.
+        Файл и итератор загружаются в MAX по кускам, без чтения целиком в память
     :type media: bytes
 
     :param caption: Подпись к медиа
@@ -625,7 +626,7 @@ class InputMedia(JsonDeserializable):
                 media_name = media_name or media_path.name
                 media_type = mimetypes.guess_type(media_path.name)[0] or "application/octet-stream"
                 with media_path.open("rb") as media_file:
-                    files = {"data": (media_name, media_file.read(), media_type)}
+                    files = {"data": (media_name, media_file, media_type)}
                     return self.api.load_file(url=url, files=files, content_types=None)
 
         if file_name:
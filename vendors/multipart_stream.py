@@ -0,0 +1,144 @@
+"""
+Потоковое тело multipart/form-data для загрузки файлов в MAX и Telegram
+
+Файлы читаются кусками по chunk_size, в памяти одновременно не больше пары кусков,
+поэтому пересылка 50MB файла не требует копий файла в памяти.
+"""
+import os
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+from uuid import uuid4
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _quote(value: str) -> str:
+    # Как в vendors/telegram/utils/request._render_part: без RFC2231, серверы Telegram его не понимают
+    value = value.replace('\\', '\\\\').replace('"', '\\"')
+    return value.replace('\r', ' ').replace('\n', ' ')
+
+
+def source_size(source: Any) -> Optional[int]:
+    """
+    Сколько байт осталось в источнике: bytes, файл или объект с size
+
+    :return: None, если размер заранее неизвестен (итератор, pipe)
+    :rtype: Optional[int]
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    size = getattr(source, 'size', None)
+    if isinstance(size, int):
+        return size
+    if hasattr(source, 'read'):
+        try:
+            position = source.tell()
+            try:
+                return os.fstat(source.fileno()).st_size - position
+            except (AttributeError, OSError, ValueError):
+                end = source.seek(0, os.SEEK_END)
+                source.seek(position)
+                return end - position
+        except (AttributeError, OSError, ValueError):
+            return None
+    return None
+
+
+def iter_source(source: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Куски источника не длиннее chunk_size
+
+    :param source: bytes, файл (read), объект с iter_chunks(chunk_size) или итератор bytes
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        for start in range(0, len(source), chunk_size):
+            yield bytes(source[start:start + chunk_size])
+    elif hasattr(source, 'iter_chunks'):
+        yield from source.iter_chunks(chunk_size)
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        for chunk in source:
+            for start in range(0, len(chunk), chunk_size):
+                yield chunk[start:start + chunk_size]
+
+
+class MultipartStream:
+    """
+    Тело multipart/form-data, которое читается по кускам
+
+    Поля - dict или список пар (имя, значение). Значение - строка (обычное поле) или
+    кортеж (имя файла, источник[, content_type]), источник - bytes, файл, итератор bytes.
+
+    Объект можно передать как data в requests или body в urllib3: оба читают его по кускам.
+    len - полный размер тела для Content-Length или None, тогда отправка идет с Transfer-Encoding: chunked.
+    """
+
+    def __init__(
+        self,
+        fields: Union[dict, Iterable[Tuple[str, Any]]],
+        boundary: str = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.boundary = boundary or uuid4().hex
+        self.chunk_size = chunk_size
+        self._parts: List[Any] = []
+
+        items = fields.items() if isinstance(fields, dict) else fields
+        for name, value in items:
+            if isinstance(value, tuple):
+                file_name, source = value[0], value[1]
+                content_type = value[2] if len(value) > 2 and value[2] else 'application/octet-stream'
+                self._parts.append((
+                    f'--{self.boundary}\r\n'
+                    f'Content-Disposition: form-data; name="{_quote(name)}"; filename="{_quote(file_name)}"\r\n'
+                    f'Content-Type: {content_type}\r\n\r\n'
+                ).encode('utf-8'))
+                self._parts.append(source)
+                self._parts.append(b'\r\n')
+            else:
+                if not isinstance(value, bytes):
+                    value = str(value).encode('utf-8')
+                self._parts.append((
+                    f'--{self.boundary}\r\n'
+                    f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+                ).encode('utf-8') + value + b'\r\n')
+        self._parts.append(f'--{self.boundary}--\r\n'.encode('utf-8'))
+
+        sizes = [source_size(part) for part in self._parts]
+        self.len = None if None in sizes else sum(sizes)
+        self._chunks = None
+        self._buffer = b''
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    @property
+    def headers(self) -> dict:
+        """Content-Type и, если размер известен, Content-Length"""
+        headers = {'Content-Type': self.content_type}
+        if self.len is not None:
+            headers['Content-Length'] = str(self.len)
+        return headers
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self._parts:
+            yield from iter_source(part, self.chunk_size)
+
+    def read(self, size: int = -1) -> bytes:
+        if self._chunks is None:
+            self._chunks = iter(self)
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
@@ -22,8 +22,9 @@ try:
 except ImportError:
     import json  # type: ignore[no-redef]
 
+import inspect
 import warnings
-from typing import TYPE_CHECKING, List, Optional, Tuple, Type, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Type, TypeVar
 
 from .utils.types import JSONDict
 from .utils.deprecate import set_new_attribute_deprecated
@@ -34,6 +35,77 @@ if TYPE_CHECKING:
 TO = TypeVar('TO', bound='TelegramObject', covariant=True)
 
 
+class DeJsonField(NamedTuple):
+    """
+    Поле в карте de_json_fast: ключ JSON разбирается parse(value, bot, lazy) и передается в __init__ как attr
+
+    lazy - поле можно отложить: __init__ сохраняет его как есть (или ``value or []``),
+    в ленивом режиме оно разбирается при первом обращении к атрибуту.
+    """
+
+    attr: str
+    parse: Callable[[Any, Optional['Bot'], bool], Any]
+    lazy: bool = False
+
+
+class _Raw:
+    """Неразобранное значение ленивого поля"""
+
+    __slots__ = ('data', 'bot', 'parse')
+
+    def __init__(self, data: Any, bot: Optional['Bot'], parse: Callable[[Any, Optional['Bot'], bool], Any]):
+        self.data = data
+        self.bot = bot
+        self.parse = parse
+
+
+class _LazyField:
+    """Дескриптор поверх слота: при первом чтении превращает _Raw в объект и кладет его обратно в слот"""
+
+    __slots__ = ('slot',)
+
+    def __init__(self, slot: Any):
+        self.slot = slot
+
+    def __get__(self, obj: Any, owner: type = None) -> Any:
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj, owner)
+        if value.__class__ is _Raw:
+            value = value.parse(value.data, value.bot, True)
+            self.slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj: Any) -> None:
+        self.slot.__delete__(obj)
+
+
+class _DeJsonPlan:
+    """Все, что de_json_fast один раз вычисляет для класса"""
+
+    __slots__ = ('fields', 'skip_empty', 'pass_bot', 'target', 'builder', 'lazy_target', 'lazy_builder')
+
+    def __init__(self, cls: type):
+        # None - у класса свой de_json без карты
+        self.fields: Optional[Dict[str, DeJsonField]] = cls._de_json_fields()
+        # Переопределенные de_json возвращают None и для пустого dict
+        self.skip_empty = cls.de_json.__func__ is not TelegramObject.de_json.__func__
+        self.pass_bot = 'bot' in inspect.signature(cls.__init__).parameters
+        self.target = cls
+        self.builder = _builder_class(cls)
+        lazy_fields = [field.attr for field in (self.fields or {}).values() if field.lazy]
+        self.lazy_target = _lazy_class(cls, lazy_fields) if lazy_fields else cls
+        self.lazy_builder = _builder_class(self.lazy_target) if lazy_fields else self.builder
+
+
+_de_json_plans: Dict[type, _DeJsonPlan] = {}
+
+_JSON_SCALARS = frozenset((str, int, float, bool))
+
+
 class TelegramObject:
     """Base class for most Telegram objects."""
 
@@ -44,6 +116,23 @@ class TelegramObject:
     # We add __dict__ here for backward compatibility & also to avoid repetition for subclasses.
     __slots__ = ('__dict__',)
 
+    # Имена всех слотов класса и предков и те из них, что попадают в to_dict; заполняются в __init_subclass__
+    _slot_names: FrozenSet[str] = frozenset()
+    _dict_attrs: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        slots = [
+            attr
+            for klass in reversed(cls.__mro__)
+            for attr in klass.__dict__.get('__slots__', ())
+            if attr != '__dict__'
+        ]
+        cls._slot_names = frozenset(slots)
+        cls._dict_attrs = tuple(
+            attr for attr in dict.fromkeys(slots) if attr != 'bot' and not attr.startswith('_')
+        )
+
     def __str__(self) -> str:
         return str(self.to_dict())
 
@@ -51,7 +140,11 @@ class TelegramObject:
         return getattr(self, item, None)
 
     def __setattr__(self, key: str, value: object) -> None:
-        set_new_attribute_deprecated(self, key, value)
+        # Запись в слот не может создать новый атрибут, проверка set_new_attribute_deprecated ей не нужна
+        if key in self._slot_names:
+            object.__setattr__(self, key, value)
+        else:
+            set_new_attribute_deprecated(self, key, value)
 
     @staticmethod
     def _parse_data(data: Optional[JSONDict]) -> Optional[JSONDict]:
@@ -95,6 +188,77 @@ class TelegramObject:
 
         return [cls.de_json(d, bot) for d in data]
 
+    @classmethod
+    def _de_json_fields(cls) -> Optional[Dict[str, DeJsonField]]:
+        """
+        Карта полей для de_json_fast: ключ JSON -> DeJsonField
+
+        Ключи, которых нет в карте, передаются в __init__ как есть. Классы со своим de_json
+        переопределяют метод, иначе de_json_fast вызывает их de_json (None - карты нет).
+        """
+        if cls.de_json.__func__ is TelegramObject.de_json.__func__:  # type: ignore[attr-defined]
+            return {}
+        return None
+
+    @classmethod
+    def _de_json_plan(cls) -> _DeJsonPlan:
+        plan = _de_json_plans.get(cls)
+        if plan is None:
+            plan = _de_json_plans[cls] = _DeJsonPlan(cls)
+        return plan
+
+    @classmethod
+    def de_json_fast(cls: Type[TO], data: Optional[JSONDict], bot: Optional['Bot'], lazy: bool = False) -> Optional[TO]:
+        """
+        Быстрый de_json: тот же результат, но по заранее посчитанной карте полей класса
+
+        data не копируется и не изменяется, поэтому его можно передавать без копии.
+        С lazy=True поля, помеченные в карте как lazy (reply_to_message, entities, photo ...),
+        разбираются только при первом обращении к ним. Такие объекты - экземпляры подкласса
+        с тем же именем, isinstance, ==, hash, to_dict работают как у обычных.
+        """
+        plan = _de_json_plans.get(cls) or cls._de_json_plan()
+        fields = plan.fields
+        if fields is None:
+            return cls.de_json(data, bot)  # type: ignore[return-value]
+        if data is None or plan.skip_empty and not data:
+            return None
+        if cls is TelegramObject:
+            return cls()
+
+        kwargs = {}
+        if plan.pass_bot:
+            kwargs['bot'] = bot
+        for key, value in data.items():
+            field = fields.get(key)
+            if field is None:
+                kwargs[key] = value
+            elif value is not None:
+                if lazy and field.lazy:
+                    kwargs[field.attr] = _Raw(value, bot, field.parse)
+                else:
+                    kwargs[field.attr] = field.parse(value, bot, lazy)
+        # __init__ выполняется в подклассе без проверки __setattr__, потом объект получает свой класс
+        if lazy:
+            obj = object.__new__(plan.lazy_builder)
+            obj.__init__(**kwargs)
+            object.__setattr__(obj, '__class__', plan.lazy_target)
+        else:
+            obj = object.__new__(plan.builder)
+            obj.__init__(**kwargs)
+            object.__setattr__(obj, '__class__', cls)
+        return obj
+
+    @classmethod
+    def de_list_fast(
+        cls: Type[TO], data: Optional[List[JSONDict]], bot: Optional['Bot'], lazy: bool = False
+    ) -> List[Optional[TO]]:
+        """Список для de_json_fast, как de_list"""
+        if not data:
+            return []
+
+        return [cls.de_json_fast(d, bot, lazy) for d in data]
+
     def to_json(self) -> str:
         """Gives a JSON representation of object.
 
@@ -111,18 +275,14 @@ class TelegramObject:
         """
         data = {}
 
-        # We want to get all attributes for the class, using self.__slots__ only includes the
-        # attributes used by that class itself, and not its superclass(es). Hence we get its MRO
-        # and then get their attributes. The `[:-2]` slice excludes the `object` class & the
-        # TelegramObject class itself.
-        attrs = {attr for cls in self.__class__.__mro__[:-2] for attr in cls.__slots__}
-        for key in attrs:
-            if key == 'bot' or key.startswith('_'):
-                continue
-
+        # Атрибуты класса и предков (без bot и приватных) собраны один раз в __init_subclass__,
+        # у строк и чисел to_dict не ищется
+        for key in self._dict_attrs:
             value = getattr(self, key, None)
             if value is not None:
-                if hasattr(value, 'to_dict'):
+                if value.__class__ in _JSON_SCALARS:
+                    data[key] = value
+                elif hasattr(value, 'to_dict'):
                     data[key] = value.to_dict()
                 else:
                     data[key] = value
@@ -150,3 +310,50 @@ class TelegramObject:
         if self._id_attrs:
             return hash((self.__class__, self._id_attrs))  # pylint: disable=no-member
         return super().__hash__()
+
+
+def _new_object(cls: type) -> Any:
+    return cls.__new__(cls)
+
+
+def _builder_class(cls: type) -> type:
+    """
+    Подкласс cls с обычным object.__setattr__ для __init__ в de_json_fast
+
+    __init__ пишет только в слоты, проверка новых атрибутов TelegramObject.__setattr__
+    ему не нужна, а вызов ее на каждое поле - заметная доля времени разбора.
+    """
+    return type(cls.__name__, (cls,), {
+        '__slots__': (),
+        '__module__': cls.__module__,
+        '__qualname__': cls.__qualname__,
+        '__setattr__': object.__setattr__,
+    })
+
+
+def _lazy_class(cls: type, lazy_fields: List[str]) -> type:
+    """Подкласс cls, у которого слоты lazy_fields читаются через _LazyField"""
+
+    def __hash__(self: Any) -> int:
+        if self._id_attrs:
+            return hash((cls, self._id_attrs))
+        return object.__hash__(self)
+
+    def __reduce_ex__(self: Any, protocol: Any) -> Any:
+        # pickle и copy получают обычный объект cls с разобранными полями
+        for attr in lazy_fields:
+            getattr(self, attr)
+        reduced = object.__reduce_ex__(self, protocol)
+        return (_new_object, (cls,)) + tuple(reduced[2:])
+
+    namespace: Dict[str, Any] = {
+        '__slots__': (),
+        '__module__': cls.__module__,
+        '__qualname__': cls.__qualname__,
+        '__hash__': __hash__,
+        '__reduce_ex__': __reduce_ex__,
+    }
+    for attr in lazy_fields:
+        slot = next(klass.__dict__[attr] for klass in cls.__mro__ if attr in klass.__dict__)
+        namespace[attr] = _LazyField(slot)
+    return type(cls.__name__, (cls,), namespace)
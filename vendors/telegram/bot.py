@@ -105,7 +105,7 @@ from .utils.helpers import (
     parse_file_input,
     DEFAULT_20,
 )
-from .utils.request import Request
+from .utils.request import Request, get_shared_request
 from .utils.types import FileInput, JSONDict, ODVInput, DVInput
 
 if TYPE_CHECKING:
@@ -158,7 +158,8 @@ class Bot(TelegramObject):
         base_url (:obj:`str`, optional): Telegram Bot API service URL.
         base_file_url (:obj:`str`, optional): Telegram Bot API file URL.
         request (:obj:`telegram.utils.request.Request`, optional): Pre initialized
-            :obj:`telegram.utils.request.Request`.
+            :obj:`telegram.utils.request.Request`. По умолчанию общий на процесс
+            :func:`telegram.utils.request.get_shared_request`.
         private_key (:obj:`bytes`, optional): Private key for decryption of telegram passport data.
         private_key_password (:obj:`bytes`, optional): Password for above private key.
         defaults (:class:`telegram.ext.Defaults`, optional): An object containing default values to
@@ -215,7 +216,8 @@ class Bot(TelegramObject):
         self.base_file_url = str(base_file_url) + str(self.token)
         self._bot: Optional[User] = None
         self._commands: Optional[List[BotCommand]] = None
-        self._request = request or Request()
+        # Без явного request используется общий пул соединений процесса (get_shared_request)
+        self._request = request
         self.private_key = None
         self.logger = logging.getLogger(__name__)
 
@@ -367,6 +369,8 @@ class Bot(TelegramObject):
 
     @property
     def request(self) -> Request:  # skip-cq: PY-D0003
+        if self._request is None:
+            return get_shared_request()
         return self._request
 
     @staticmethod
@@ -18,11 +18,12 @@
 # along with this program.  If not, see [http://www.gnu.org/licenses/].
 # pylint: disable=W0622
 """This module contains an object that represents a Telegram CallbackQuery"""
-from typing import TYPE_CHECKING, Any, List, Optional, Union, Tuple, ClassVar
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union, Tuple, ClassVar
 
 from . import Message, TelegramObject, User, Location, ReplyMarkup, constants
 from .utils.helpers import DEFAULT_NONE
 from .utils.types import JSONDict, ODVInput, DVInput
+from .base import DeJsonField
 
 if TYPE_CHECKING:
     from . import (
@@ -143,6 +144,14 @@ class CallbackQuery(TelegramObject):
 
         return cls(bot=bot, **data)
 
+    @classmethod
+    def _de_json_fields(cls) -> Dict[str, DeJsonField]:
+        """Карта для de_json_fast, повторяет de_json"""
+        return {
+            'from': DeJsonField('from_user', User.de_json_fast),
+            'message': DeJsonField('message', Message.de_json_fast),
+        }
+
     def answer(
         self,
         text: str = None,
@@ -20,11 +20,12 @@
 """This module contains an object that represents a Telegram Chat."""
 import warnings
 from datetime import datetime
-from typing import TYPE_CHECKING, List, Optional, ClassVar, Union, Tuple, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, ClassVar, Union, Tuple, Any
 
 from . import ChatPhoto, TelegramObject, constants, MenuButton
 from .utils.types import JSONDict, FileInput, ODVInput, DVInput
 from .utils.deprecate import TelegramDeprecationWarning
+from .base import DeJsonField
 
 from .chatpermissions import ChatPermissions
 from .chatlocation import ChatLocation
@@ -385,6 +386,18 @@ class Chat(TelegramObject):
 
         return cls(bot=bot, **data)
 
+    @classmethod
+    def _de_json_fields(cls) -> Dict[str, DeJsonField]:
+        """Карта для de_json_fast, повторяет de_json"""
+        from . import Message  # pylint: disable=C0415
+
+        return {
+            'photo': DeJsonField('photo', ChatPhoto.de_json_fast),
+            'pinned_message': DeJsonField('pinned_message', Message.de_json_fast, lazy=True),
+            'permissions': DeJsonField('permissions', ChatPermissions.de_json_fast),
+            'location': DeJsonField('location', ChatLocation.de_json_fast),
+        }
+
     def leave(self, timeout: ODVInput[float] = DEFAULT_NONE, api_kwargs: JSONDict = None) -> bool:
         """Shortcut for::
 
@@ -0,0 +1,41 @@
+"""
+Разбор записанных обновлений Telegram: de_json против de_json_fast и ленивого de_json_fast.
+
+    python -m integration_utils.vendors.telegram.dejson_benchmark [corpus.json]
+
+corpus.json - список обновлений в формате Bot API (по умолчанию dejson_corpus.json рядом).
+"""
+import json
+import os
+import sys
+import timeit
+
+from integration_utils.vendors.telegram import Bot, Update
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'dejson_corpus.json')
+
+
+def load_corpus(path: str = CORPUS_PATH) -> list:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def run_benchmark(path: str = CORPUS_PATH, number: int = 200):
+    corpus = load_corpus(path)
+    bot = Bot('123:benchmark')
+    parsers = {
+        'de_json': lambda: [Update.de_json(update, bot) for update in corpus],
+        'de_json_fast': lambda: [Update.de_json_fast(update, bot) for update in corpus],
+        'lazy': lambda: [Update.de_json_fast(update, bot, lazy=True) for update in corpus],
+        'lazy + text': lambda: [Update.de_json_fast(update, bot, lazy=True).effective_message for update in corpus],
+    }
+    print('{} updates'.format(len(corpus)))
+    base = None
+    for title, parse in parsers.items():
+        seconds = timeit.timeit(parse, number=number) / number / len(corpus)
+        base = base or seconds
+        print('{:<14} {:8.1f} us/update  x{:.1f}'.format(title, seconds * 1e6, base / seconds))
+
+
+if __name__ == '__main__':
+    run_benchmark(*sys.argv[1:2])
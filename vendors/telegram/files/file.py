@@ -26,7 +26,7 @@ from typing import IO, TYPE_CHECKING, Any, Optional, Union
 
 from .. import TelegramObject
 from ..passport.credentials import decrypt
-from ..utils.helpers import is_local_file
+from ..utils.helpers import atomic_write, is_local_file
 
 if TYPE_CHECKING:
     from .. import Bot, FileCredentials
@@ -143,14 +143,15 @@ class File(TelegramObject):
         if out:
             if local_file:
                 with open(url, 'rb') as file:
-                    buf = file.read()
+                    shutil.copyfileobj(file, out)
+            elif self._credentials:
+                # Расшифровке нужен файл целиком
+                buf = self.bot.request.retrieve(url, timeout=timeout)
+                out.write(decrypt(
+                    b64decode(self._credentials.secret), b64decode(self._credentials.hash), buf
+                ))
             else:
-                buf = self.bot.request.retrieve(url)
-                if self._credentials:
-                    buf = decrypt(
-                        b64decode(self._credentials.secret), b64decode(self._credentials.hash), buf
-                    )
-            out.write(buf)
+                self.bot.request.stream_download(url, out, timeout=timeout)
             return out
 
         if custom_path and local_file:
@@ -166,12 +167,15 @@ class File(TelegramObject):
         else:
             filename = os.path.join(os.getcwd(), self.file_id)
 
+        if not self._credentials:
+            self.bot.request.download(url, filename, timeout=timeout)
+            return filename
+
         buf = self.bot.request.retrieve(url, timeout=timeout)
-        if self._credentials:
-            buf = decrypt(
-                b64decode(self._credentials.secret), b64decode(self._credentials.hash), buf
-            )
-        with open(filename, 'wb') as fobj:
+        buf = decrypt(
+            b64decode(self._credentials.secret), b64decode(self._credentials.hash), buf
+        )
+        with atomic_write(filename) as fobj:
             fobj.write(buf)
         return filename
 
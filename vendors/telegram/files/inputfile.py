@@ -27,12 +27,15 @@ import imghdr
 import logging
 import mimetypes
 import os
-from typing import IO, Optional, Tuple, Union
+from typing import IO, Iterable, Iterator, Optional, Tuple, Union
 from uuid import uuid4
 
+from ...multipart_stream import DEFAULT_CHUNK_SIZE, iter_source, source_size
 from ..utils.deprecate import set_new_attribute_deprecated
 
 DEFAULT_MIME_TYPE = 'application/octet-stream'
+# imghdr смотрит только на первые 32 байта
+IMAGE_HEADER_SIZE = 32
 logger = logging.getLogger(__name__)
 
 
@@ -40,8 +43,8 @@ class InputFile:
     """This object represents a Telegram InputFile.
 
     Args:
-        obj (:obj:`File handler` | :obj:`bytes`): An open file descriptor or the files content as
-            bytes.
+        obj (:obj:`File handler` | :obj:`bytes` | Iterable[:obj:`bytes`]): An open file descriptor,
+            the files content as bytes or an iterator of byte chunks.
         filename (:obj:`str`, optional): Filename for this InputFile.
         attach (:obj:`bool`, optional): Whether this should be send as one file or is part of a
             collection of files.
@@ -54,16 +57,37 @@ class InputFile:
         filename (:obj:`str`): Optional. Filename for the file to be sent.
         attach (:obj:`str`): Optional. Attach id for sending multiple files.
 
+    Файл и итератор не читаются целиком: для определения типа берется начало,
+    остальное отправляет Request.post по кускам (iter_chunks). input_file_content читает все в память,
+    оставлен для совместимости.
     """
 
-    __slots__ = ('filename', 'attach', 'input_file_content', 'mimetype', '__dict__')
+    __slots__ = ('filename', 'attach', '_content', '_stream', '_stream_start', '_head', 'mimetype', '__dict__')
 
-    def __init__(self, obj: Union[IO, bytes], filename: str = None, attach: bool = None):
+    def __init__(self, obj: Union[IO, bytes, Iterable[bytes]], filename: str = None, attach: bool = None):
         self.filename = None
+        self._content = None
+        self._stream = None
+        self._stream_start = None
+        self._head = b''
         if isinstance(obj, bytes):
-            self.input_file_content = obj
+            self._content = obj
+            head = obj
+        elif self.is_file(obj):
+            self._stream = obj
+            try:
+                self._stream_start = obj.tell() if obj.seekable() else None  # type: ignore[union-attr]
+            except (AttributeError, OSError, ValueError):
+                self._stream_start = None
+            head = obj.read(IMAGE_HEADER_SIZE)  # type: ignore[union-attr]
+            if self._stream_start is not None:
+                obj.seek(self._stream_start)  # type: ignore[union-attr]
+            else:
+                self._head = head
         else:
-            self.input_file_content = obj.read()
+            # Итератор кусков: первый кусок нужен для определения типа, его запоминаем
+            self._stream = iter(obj)
+            head = self._head = next(self._stream, b'')
         self.attach = 'attached' + uuid4().hex if attach else None
 
         if filename:
@@ -71,7 +95,7 @@ class InputFile:
         elif hasattr(obj, 'name') and not isinstance(obj.name, int):  # type: ignore[union-attr]
             self.filename = os.path.basename(obj.name)  # type: ignore[union-attr]
 
-        image_mime_type = self.is_image(self.input_file_content)
+        image_mime_type = self.is_image(head[:IMAGE_HEADER_SIZE])
         if image_mime_type:
             self.mimetype = image_mime_type
         elif self.filename:
@@ -85,10 +109,43 @@ class InputFile:
     def __setattr__(self, key: str, value: object) -> None:
         set_new_attribute_deprecated(self, key, value)
 
+    @property
+    def input_file_content(self) -> bytes:
+        if self._content is None:
+            self._content = b''.join(self.iter_chunks())
+            self._stream = None
+        return self._content
+
+    @property
+    def size(self) -> Optional[int]:
+        """Размер содержимого в байтах или None, если заранее неизвестен"""
+        if self._content is not None:
+            return len(self._content)
+        if self._stream_start is None:
+            return None
+        return source_size(self._stream)
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Содержимое кусками не длиннее chunk_size. Файл с seek можно прочитать повторно."""
+        if self._content is not None:
+            yield from iter_source(self._content, chunk_size)
+            return
+        if self._stream_start is not None:
+            self._stream.seek(self._stream_start)  # type: ignore[union-attr]
+        elif self._head:
+            head, self._head = self._head, b''
+            yield head
+        yield from iter_source(self._stream, chunk_size)
+
     @property
     def field_tuple(self) -> Tuple[str, bytes, str]:  # skipcq: PY-D0003
         return self.filename, self.input_file_content, self.mimetype
 
+    @property
+    def stream_field_tuple(self) -> Tuple[str, 'InputFile', str]:
+        """Как field_tuple, но содержимое читается по кускам (для MultipartStream)"""
+        return self.filename, self, self.mimetype
+
     @staticmethod
     def is_image(stream: bytes) -> Optional[str]:
         """Check if the content file is an image by analyzing its headers.
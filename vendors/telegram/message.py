@@ -71,6 +71,7 @@ from .utils.helpers import (
 )
 from .utils.types import JSONDict, FileInput, ODVInput, DVInput
 from .utils.argumentparsing import de_json_optional
+from .base import DeJsonField
 
 if TYPE_CHECKING:
     from . import (
@@ -86,6 +87,10 @@ if TYPE_CHECKING:
     )
 
 
+def _parse_timestamp(value: int, bot: Optional['Bot'], lazy: bool) -> datetime.datetime:
+    return from_timestamp(value)  # type: ignore[return-value]
+
+
 class Message(TelegramObject):
     # fmt: off
     """This object represents a message.
@@ -878,6 +883,60 @@ class Message(TelegramObject):
 
         return cls(bot=bot, **data)
 
+    @classmethod
+    def _de_json_fields(cls) -> Dict[str, DeJsonField]:
+        """Карта для de_json_fast, повторяет de_json"""
+        fields = {
+            'from': DeJsonField('from_user', User.de_json_fast),
+            'date': DeJsonField('date', _parse_timestamp),
+            'forward_date': DeJsonField('forward_date', _parse_timestamp),
+            'edit_date': DeJsonField('edit_date', _parse_timestamp),
+            'reply_to_message': DeJsonField('reply_to_message', Message.de_json_fast, lazy=True),
+            'pinned_message': DeJsonField('pinned_message', Message.de_json_fast, lazy=True),
+            'entities': DeJsonField('entities', MessageEntity.de_list_fast, lazy=True),
+            'caption_entities': DeJsonField('caption_entities', MessageEntity.de_list_fast, lazy=True),
+            'photo': DeJsonField('photo', PhotoSize.de_list_fast, lazy=True),
+            'new_chat_members': DeJsonField('new_chat_members', User.de_list_fast),
+            'new_chat_photo': DeJsonField('new_chat_photo', PhotoSize.de_list_fast),
+            'reply_markup': DeJsonField('reply_markup', InlineKeyboardMarkup.de_json_fast),
+        }
+        objects = {
+            User: ('receiver_user', 'forward_from', 'left_chat_member', 'via_bot', 'guest_bot_caller_user'),
+            Chat: ('sender_chat', 'chat', 'forward_from_chat', 'guest_bot_caller_chat'),
+            Audio: ('audio',),
+            Document: ('document',),
+            Animation: ('animation',),
+            Game: ('game',),
+            Sticker: ('sticker',),
+            Video: ('video',),
+            Voice: ('voice',),
+            VideoNote: ('video_note',),
+            Contact: ('contact',),
+            Location: ('location',),
+            Venue: ('venue',),
+            MessageAutoDeleteTimerChanged: ('message_auto_delete_timer_changed',),
+            Invoice: ('invoice',),
+            SuccessfulPayment: ('successful_payment',),
+            PassportData: ('passport_data',),
+            Poll: ('poll',),
+            Dice: ('dice',),
+            ProximityAlertTriggered: ('proximity_alert_triggered',),
+            VideoChatScheduled: ('voice_chat_scheduled', 'video_chat_scheduled'),
+            VideoChatStarted: ('voice_chat_started', 'video_chat_started'),
+            VideoChatEnded: ('voice_chat_ended', 'video_chat_ended'),
+            VideoChatParticipantsInvited: ('voice_chat_participants_invited', 'video_chat_participants_invited'),
+            WebAppData: ('web_app_data',),
+            ForumTopicClosed: ('forum_topic_closed',),
+            ForumTopicCreated: ('forum_topic_created',),
+            ForumTopicReopened: ('forum_topic_reopened',),
+            ForumTopicEdited: ('forum_topic_edited',),
+            DirectMessagesTopic: ('direct_messages_topic',),
+        }
+        for tg_class, keys in objects.items():
+            for key in keys:
+                fields[key] = DeJsonField(key, tg_class.de_json_fast)
+        return fields
+
     @property
     def effective_attachment(
         self,
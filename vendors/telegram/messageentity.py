@@ -18,10 +18,11 @@
 # along with this program.  If not, see [http://www.gnu.org/licenses/].
 """This module contains an object that represents a Telegram MessageEntity."""
 
-from typing import TYPE_CHECKING, Any, List, Optional, ClassVar
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, ClassVar
 
 from . import TelegramObject, User, constants
 from .utils.types import JSONDict
+from .base import DeJsonField
 
 if TYPE_CHECKING:
     from . import Bot
@@ -117,6 +118,11 @@ class MessageEntity(TelegramObject):
 
         return cls(**data)
 
+    @classmethod
+    def _de_json_fields(cls) -> Dict[str, DeJsonField]:
+        """Карта для de_json_fast, повторяет de_json"""
+        return {'user': DeJsonField('user', User.de_json_fast)}
+
     MENTION: ClassVar[str] = constants.MESSAGEENTITY_MENTION
     """:const:`telegram.constants.MESSAGEENTITY_MENTION`"""
     HASHTAG: ClassVar[str] = constants.MESSAGEENTITY_HASHTAG
@@ -0,0 +1,49 @@
+import copy
+import pickle
+from unittest import TestCase
+
+from integration_utils.vendors.telegram import Bot, Message, Update
+from integration_utils.vendors.telegram.dejson_benchmark import load_corpus
+from integration_utils.vendors.telegram.utils.deprecate import TelegramDeprecationWarning
+
+
+class DeJsonFastTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = load_corpus()
+        cls.bot = Bot('123:token')
+
+    def test_same_as_de_json(self):
+        original = copy.deepcopy(self.corpus)
+        for data in self.corpus:
+            expected = Update.de_json(data, self.bot).to_dict()
+            self.assertEqual(Update.de_json_fast(data, self.bot).to_dict(), expected)
+            self.assertEqual(Update.de_json_fast(data, self.bot, lazy=True).to_dict(), expected)
+        self.assertEqual(self.corpus, original)
+
+    def test_lazy_fields(self):
+        data = next(update for update in self.corpus if 'reply_to_message' in update.get('message', {}))
+        message = Update.de_json_fast(data, self.bot, lazy=True).message
+        self.assertIsInstance(message, Message)
+        self.assertEqual(type(message).__name__, 'Message')
+
+        reply = message.reply_to_message
+        self.assertIsInstance(reply, Message)
+        self.assertIs(message.reply_to_message, reply)
+        self.assertEqual(reply.text, data['message']['reply_to_message']['text'])
+        self.assertEqual(message.entities[0].user.id, data['message']['entities'][0]['user']['id'])
+        self.assertIs(reply.bot, self.bot)
+
+        plain = Message.de_json(data['message'], self.bot)
+        self.assertEqual(message, plain)
+        self.assertEqual(hash(message), hash(plain))
+
+        restored = pickle.loads(pickle.dumps(Update.de_json_fast(data, None, lazy=True).message))
+        self.assertIs(type(restored), Message)
+        self.assertEqual(restored.reply_to_message.text, reply.text)
+
+    def test_custom_attribute_warning(self):
+        message = Update.de_json_fast(self.corpus[0], self.bot).message
+        self.assertIs(type(message), Message)
+        with self.assertWarns(TelegramDeprecationWarning):
+            message.custom = 1
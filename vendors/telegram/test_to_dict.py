@@ -0,0 +1,49 @@
+from unittest import TestCase, mock
+
+from integration_utils.vendors.telegram import Bot, TelegramObject, Update
+from integration_utils.vendors.telegram.dejson_benchmark import load_corpus
+from integration_utils.vendors.telegram.to_dict_benchmark import (
+    make_inline_keyboard,
+    make_media_group,
+    make_reply_keyboard,
+)
+
+
+def legacy_to_dict(self):
+    # TelegramObject.to_dict до кэширования атрибутов
+    data = {}
+    attrs = {attr for cls in self.__class__.__mro__[:-2] for attr in cls.__slots__}
+    for key in attrs:
+        if key == 'bot' or key.startswith('_'):
+            continue
+        value = getattr(self, key, None)
+        if value is not None:
+            if hasattr(value, 'to_dict'):
+                data[key] = value.to_dict()
+            else:
+                data[key] = value
+    if data.get('from_user'):
+        data['from'] = data.pop('from_user', None)
+    return data
+
+
+class ToDictTest(TestCase):
+    def assertSameAsLegacy(self, obj):
+        with mock.patch.object(TelegramObject, 'to_dict', legacy_to_dict):
+            expected = obj.to_dict()
+        self.assertEqual(obj.to_dict(), expected)
+
+    def test_send_path_objects(self):
+        for obj in [make_inline_keyboard(), make_reply_keyboard(), *make_media_group()]:
+            self.assertSameAsLegacy(obj)
+
+        button = make_inline_keyboard().to_dict()['inline_keyboard'][0][0]
+        self.assertEqual(button, {'text': 'Задача 0.0', 'callback_data': 'task:0:0'})
+        media = make_media_group()[0]
+        self.assertEqual(media.to_dict()['media'], 'attach://' + media.media.attach)
+        self.assertEqual(media.to_dict()['caption_entities'][1], {'type': 'url', 'offset': 7, 'length': 20})
+
+    def test_updates(self):
+        bot = Bot('123:token')
+        for data in load_corpus():
+            self.assertSameAsLegacy(Update.de_json(data, bot))
@@ -0,0 +1,64 @@
+"""
+Стоимость сериализации того, что уходит с каждой отправкой: клавиатуры и медиагруппы.
+
+    python -m integration_utils.vendors.telegram.to_dict_benchmark
+"""
+import timeit
+
+from integration_utils.vendors.telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InputFile,
+    InputMediaPhoto,
+    KeyboardButton,
+    MessageEntity,
+    ReplyKeyboardMarkup,
+)
+
+
+def make_inline_keyboard(rows: int = 4, columns: int = 3) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton('Задача {}.{}'.format(row, column), callback_data='task:{}:{}'.format(row, column))
+            for column in range(columns)
+        ]
+        for row in range(rows)
+    ] + [[InlineKeyboardButton('Открыть портал', url='https://example.bitrix24.ru/')]])
+
+
+def make_reply_keyboard(rows: int = 3, columns: int = 2) -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        [[KeyboardButton('Кнопка {}.{}'.format(row, column)) for column in range(columns)] for row in range(rows)]
+        + [[KeyboardButton('Отправить телефон', request_contact=True)]],
+        resize_keyboard=True,
+    )
+
+
+def make_media_group(size: int = 10) -> list:
+    entities = [MessageEntity('bold', 0, 6), MessageEntity('url', 7, 20)]
+    return [
+        InputMediaPhoto(
+            InputFile(b'\x89PNG\r\n\x1a\n' + bytes(64), filename='photo{}.png'.format(number), attach=True),
+            caption='Отчет https://example.com/{}'.format(number) if number == 0 else None,
+            caption_entities=entities if number == 0 else None,
+        )
+        for number in range(size)
+    ]
+
+
+def run_benchmark(number: int = 5000):
+    inline_keyboard = make_inline_keyboard()
+    reply_keyboard = make_reply_keyboard()
+    media_group = make_media_group()
+    cases = {
+        'inline keyboard to_json': inline_keyboard.to_json,
+        'reply keyboard to_json': reply_keyboard.to_json,
+        'media group x10 to_dict': lambda: [media.to_dict() for media in media_group],
+    }
+    for title, serialize in cases.items():
+        seconds = timeit.timeit(serialize, number=number) / number
+        print('{:<24} {:8.1f} us'.format(title, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    run_benchmark()
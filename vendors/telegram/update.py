@@ -18,7 +18,7 @@
 # along with this program.  If not, see [http://www.gnu.org/licenses/].
 """This module contains an object that represents a Telegram Update."""
 
-from typing import TYPE_CHECKING, Any, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from . import (
     CallbackQuery,
@@ -36,6 +36,7 @@ from . import (
 from .messagereactionupdated import MessageReactionUpdated, MessageReactionCountUpdated
 from .poll import PollAnswer
 from .utils.types import JSONDict
+from .base import DeJsonField
 
 if TYPE_CHECKING:
     from . import Bot, Chat, User  # noqa
@@ -436,3 +437,22 @@ class Update(TelegramObject):
         data['message_reaction_count'] = MessageReactionCountUpdated.de_json(data.get('message_reaction_count'), bot)
 
         return cls(**data)
+
+    @classmethod
+    def _de_json_fields(cls) -> Dict[str, DeJsonField]:
+        """Карта для de_json_fast, повторяет de_json"""
+        objects = {
+            Message: ('message', 'guest_message', 'edited_message', 'channel_post', 'edited_channel_post'),
+            InlineQuery: ('inline_query',),
+            ChosenInlineResult: ('chosen_inline_result',),
+            CallbackQuery: ('callback_query',),
+            ShippingQuery: ('shipping_query',),
+            PreCheckoutQuery: ('pre_checkout_query',),
+            Poll: ('poll',),
+            PollAnswer: ('poll_answer',),
+            ChatMemberUpdated: ('my_chat_member', 'chat_member'),
+            ChatJoinRequest: ('chat_join_request',),
+            MessageReactionUpdated: ('message_reaction',),
+            MessageReactionCountUpdated: ('message_reaction_count',),
+        }
+        return {key: DeJsonField(key, tg_class.de_json_fast) for tg_class, keys in objects.items() for key in keys}
@@ -19,11 +19,15 @@
 """This module contains helper functions."""
 
 import datetime as dtm  # dtm = "DateTime Module"
+import os
 import re
 import signal
 import time
+import uuid
 
 from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
 from html import escape
 from pathlib import Path
 
@@ -93,6 +97,31 @@ def is_local_file(obj: Optional[Union[str, Path]]) -> bool:
         return False
 
 
+@contextmanager
+def atomic_write(filename: Union[str, Path]) -> Iterator[IO[bytes]]:
+    """Открывает на запись временный файл рядом с filename и после успешной записи
+    заменяет им filename (os.replace). При ошибке временный файл удаляется, а прежнее
+    содержимое filename остается как было.
+
+    Args:
+        filename (:obj:`str` | :obj:`pathlib.Path`): Итоговый путь файла.
+    """
+    filename = os.fspath(filename)
+    tmp_name = '{}.{}.part'.format(filename, uuid.uuid4().hex[:8])
+    # Права как у open(filename, 'wb'): 0o666 с учетом umask, а не 0o600 как у tempfile
+    fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as fobj:
+            yield fobj
+        os.replace(tmp_name, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
 def parse_file_input(
     file_input: Union[FileInput, 'TelegramObject'],
     tg_type: Type['TelegramObject'] = None,
@@ -107,6 +136,7 @@ def parse_file_input(
       absolute path and adds the ``file://`` prefix. Returns the input unchanged, otherwise.
     * :class:`pathlib.Path` objects are treated the same way as strings.
     * For IO and bytes input, returns an :class:`telegram.InputFile`.
+    * An iterator of bytes chunks is returned as a streamed :class:`telegram.InputFile`.
     * If :attr:`tg_type` is specified and the input is of that type, returns the ``file_id``
       attribute.
 
@@ -141,6 +171,8 @@ def parse_file_input(
     if InputFile.is_file(file_input):
         file_input = cast(IO, file_input)
         return InputFile(file_input, attach=attach, filename=filename)
+    if isinstance(file_input, Iterator):
+        return InputFile(file_input, attach=attach, filename=filename)
     if tg_type and isinstance(file_input, tg_type):
         return file_input.file_id  # type: ignore[attr-defined]
     return file_input
@@ -0,0 +1,342 @@
+"""Отправка сообщений Telegram с соблюдением лимитов Bot API заранее, а не после RetryAfter."""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Tuple, Union
+
+from ..error import RetryAfter
+from .request import get_shared_request
+
+# Лимиты Telegram: около 30 сообщений в секунду на бота, 1 в секунду в личный чат, 20 в минуту в группу
+GLOBAL_RATE = 30.0
+CHAT_RATE = 1.0
+GROUP_RATE = 20 / 60
+
+
+class TokenBucket:
+    """
+    Корзина токенов: rate токенов в секунду, не больше burst подряд
+
+    Не потокобезопасна, ей пользуется только поток диспетчера RateLimitedSender.
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float = 1, now: float = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Через сколько секунд будет доступен токен"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def refill_time(self, now: float) -> float:
+        """Через сколько секунд корзина наполнится до burst"""
+        self._refill(now)
+        return (self.burst - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, now: float, seconds: float):
+        """Не выдавать токены seconds секунд (после RetryAfter)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class _Task:
+    __slots__ = ('priority', 'seq', 'chat_id', 'func', 'args', 'kwargs', 'future', 'retries', 'running', 'flood_error')
+
+    def __init__(self, priority, seq, chat_id, func, args, kwargs):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.retries = 0
+        self.running = False
+        # Последний RetryAfter, пока задача ждет повтора
+        self.flood_error = None
+
+
+class RateLimitedSender:
+    """
+    Очередь отправки через Bot с глобальным и початовым лимитом
+
+    Каждый запрос ждет токен в общей корзине (global_rate в секунду) и в корзине своего чата
+    (chat_rate для личных чатов, group_rate для групп - chat_id < 0). Сообщения одного чата уходят
+    строго по очереди, разных чатов - параллельно в max_workers потоках. Из готовых к отправке первыми
+    идут задачи с меньшим priority, при равном - в порядке постановки.
+
+    На RetryAfter задача возвращается в начало очереди своего чата, вся отправка приостанавливается
+    на retry_after секунд. Результат - concurrent.futures.Future; пока задача ждет в очереди,
+    ее можно отменить через future.cancel().
+
+        sender = RateLimitedSender(bot)
+        futures = [sender.send_message(chat_id, 'Новость') for chat_id in chat_ids]
+        sender.join()  # дождаться отправки
+        sender.close()
+    """
+
+    def __init__(
+        self,
+        bot: Any,
+        global_rate: float = GLOBAL_RATE,
+        chat_rate: float = CHAT_RATE,
+        group_rate: float = GROUP_RATE,
+        global_burst: float = GLOBAL_RATE,
+        chat_burst: float = 1,
+        max_workers: int = 4,
+        max_retries: int = 3,
+    ):
+        self.bot = bot
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+
+        self.sent = 0
+        self.errors = 0
+        self.retry_after_count = 0
+
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chat_buckets: Dict[Any, TokenBucket] = {}
+        # chat_id -> очередь задач чата; первая задача чата лежит в _ready или _waiting, остальные ждут ее
+        self._chats: Dict[Any, Deque[_Task]] = {}
+        self._ready: List[Tuple[int, int, Any]] = []
+        self._waiting: List[Tuple[float, int, Any]] = []
+        # Чаты без очереди: корзина удаляется, когда наполнится, чтобы не копить корзины всех чатов
+        self._idle: List[Tuple[float, Any]] = []
+        self._idle_at: Dict[Any, float] = {}
+        self._active = 0
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        # Общий пул соединений Bot должен вмещать все потоки отправки
+        get_shared_request(con_pool_size=max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='RateLimitedSender')
+        self._thread = threading.Thread(target=self._run, name='RateLimitedSender', daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        method: Union[str, Callable],
+        chat_id: Union[int, str],
+        *args: Any,
+        priority: int = 0,
+        callback: Callable[[Future], Any] = None,
+        **kwargs: Any,
+    ) -> Future:
+        """
+        Ставит вызов метода бота в очередь
+
+        :param method: Имя метода Bot ('send_message', 'send_document', ...) или функция (chat_id, *args, **kwargs)
+        :param chat_id: Чат, его лимит учитывается
+        :param priority: Меньше - раньше
+        :param callback: Вызывается с Future после выполнения
+        :return: Future с результатом метода
+        """
+        func = getattr(self.bot, method) if isinstance(method, str) else method
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('RateLimitedSender is closed')
+            task = _Task(priority, next(self._seq), chat_id, func, args, kwargs)
+            if callback is not None:
+                task.future.add_done_callback(callback)
+            queue = self._chats.get(chat_id)
+            if queue is None:
+                self._chats[chat_id] = deque([task])
+                self._schedule_head(chat_id, time.monotonic())
+            else:
+                queue.append(task)
+            self._condition.notify()
+        return task.future
+
+    def send_message(self, chat_id: Union[int, str], text: str, priority: int = 0, **kwargs: Any) -> Future:
+        return self.submit('send_message', chat_id, text, priority=priority, **kwargs)
+
+    @property
+    def queue_depth(self) -> int:
+        with self._condition:
+            return sum(len(queue) for queue in self._chats.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self.queue_depth,
+            'active': self._active,
+            'sent': self.sent,
+            'errors': self.errors,
+            'retry_after': self.retry_after_count,
+        }
+
+    def join(self, timeout: float = None) -> bool:
+        """Ждет отправки всего, что поставлено в очередь. False, если не дождались"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._chats:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout: float = None) -> bool:
+        """
+        Ждет отправки очереди не дольше timeout секунд и останавливает отправку.
+        Неотправленные задачи отменяются (future.cancel()), задачи, ждущие повтора после RetryAfter,
+        завершаются этим RetryAfter.
+
+        :return: True, если все задачи успели выполниться
+        """
+        finished = self.join(timeout)
+        retried = []
+        with self._condition:
+            self._closed = True
+            for chat_id, queue in list(self._chats.items()):
+                for task in list(queue):
+                    if not task.running:
+                        # Future задачи на повторе уже в состоянии RUNNING, cancel() на нее не действует
+                        if task.flood_error is not None:
+                            retried.append(task)
+                        else:
+                            task.future.cancel()
+                        queue.remove(task)
+                if not queue:
+                    del self._chats[chat_id]
+            self._ready.clear()
+            self._waiting.clear()
+            self._condition.notify_all()
+        for task in retried:
+            task.future.set_exception(task.flood_error)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        return finished
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, int) and chat_id < 0 or isinstance(chat_id, str) and chat_id.startswith('@')
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    def _schedule_head(self, chat_id, now: float, delay: float = 0.0):
+        # Вызывается под self._condition
+        task = self._chats[chat_id][0]
+        ready_at = now + max(delay, self._bucket(chat_id).wait_time(now))
+        if ready_at <= now:
+            heapq.heappush(self._ready, (task.priority, task.seq, chat_id))
+        else:
+            heapq.heappush(self._waiting, (ready_at, task.seq, chat_id))
+
+    def _run(self):
+        with self._condition:
+            while True:
+                if self._closed:
+                    if not self._active:
+                        return
+                    self._condition.wait()
+                    continue
+
+                now = time.monotonic()
+                while self._waiting and self._waiting[0][0] <= now:
+                    _, _, chat_id = heapq.heappop(self._waiting)
+                    task = self._chats[chat_id][0]
+                    heapq.heappush(self._ready, (task.priority, task.seq, chat_id))
+                while self._idle and self._idle[0][0] <= now:
+                    idle_at, chat_id = heapq.heappop(self._idle)
+                    # Чат мог снова получить сообщения и освободиться позже
+                    if self._idle_at.get(chat_id) == idle_at and chat_id not in self._chats:
+                        del self._idle_at[chat_id]
+                        del self._chat_buckets[chat_id]
+
+                wait = None
+                if self._ready and self._active < self.max_workers:
+                    wait = self._global.wait_time(now)
+                    if wait <= 0:
+                        _, _, chat_id = heapq.heappop(self._ready)
+                        task = self._chats[chat_id][0]
+                        # Отмененная задача ничего не отправит, _execute только освободит очередь чата
+                        if not task.future.cancelled():
+                            self._global.consume(now)
+                            self._bucket(chat_id).consume(now)
+                        task.running = True
+                        self._active += 1
+                        self._executor.submit(self._execute, task)
+                        continue
+
+                for queue in (self._waiting, self._idle):
+                    if queue:
+                        until = queue[0][0] - now
+                        wait = until if wait is None else min(wait, until)
+                self._condition.wait(wait)
+
+    def _execute(self, task: _Task):
+        # True - отправлено, False - ошибка, None - задачу отменили, пока она ждала в очереди
+        sent = None
+        flood_error = None
+        try:
+            # При повторе после RetryAfter Future уже в состоянии RUNNING
+            if task.future.running() or task.future.set_running_or_notify_cancel():
+                try:
+                    result = task.func(task.chat_id, *task.args, **task.kwargs)
+                except RetryAfter as exc:
+                    flood_error = exc
+                except Exception as exc:
+                    sent = False
+                    task.future.set_exception(exc)
+                else:
+                    sent = True
+                    task.future.set_result(result)
+        finally:
+            retried = self._finish(task, sent, flood_error)
+        if flood_error is not None and not retried:
+            # Future завершается вне блокировки: callback может ставить новые задачи
+            task.future.set_exception(flood_error)
+
+    def _finish(self, task: _Task, sent, flood_error) -> bool:
+        """Освобождает очередь чата после выполнения задачи. True, если задача поставлена на повтор"""
+        with self._condition:
+            self._active -= 1
+            task.running = False
+            now = time.monotonic()
+            queue = self._chats[task.chat_id]
+            if flood_error is not None:
+                self.retry_after_count += 1
+                self._global.pause(now, flood_error.retry_after)
+                if task.retries < self.max_retries and not self._closed:
+                    task.retries += 1
+                    task.flood_error = flood_error
+                    self._schedule_head(task.chat_id, now, delay=flood_error.retry_after)
+                    self._condition.notify_all()
+                    return True
+                sent = False
+            if sent:
+                self.sent += 1
+            elif sent is False:
+                self.errors += 1
+            task.flood_error = None
+            queue.popleft()
+            if queue:
+                self._schedule_head(task.chat_id, now)
+            else:
+                del self._chats[task.chat_id]
+                idle_at = self._idle_at[task.chat_id] = now + self._bucket(task.chat_id).refill_time(now)
+                heapq.heappush(self._idle, (idle_at, task.chat_id))
+            self._condition.notify_all()
+        return False
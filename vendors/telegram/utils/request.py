@@ -22,6 +22,7 @@ import os
 import re
 import socket
 import sys
+import threading
 import warnings
 
 try:
@@ -29,7 +30,7 @@ try:
 except ImportError:
     import json  # type: ignore[no-redef]
 
-from typing import Any, Union
+from typing import IO, Any, Dict, Tuple, Union
 
 import certifi
 
@@ -59,8 +60,10 @@ from ..error import (
     TimedOut,
     Unauthorized,
 )
+from ...multipart_stream import DEFAULT_CHUNK_SIZE, MultipartStream
 from .types import JSONDict
 from .deprecate import set_new_attribute_deprecated
+from .helpers import atomic_write
 
 
 def _render_part(self: RequestField, name: str, value: str) -> str:  # pylint: disable=W0613
@@ -286,6 +289,18 @@ class Request:
         Raises:
             TelegramError
 
+        """
+        return self._open(*args, **kwargs).data
+
+    def _open(self, *args: object, **kwargs: Any) -> 'urllib3.BaseHTTPResponse':
+        """Выполняет запрос urllib3 и превращает ошибки в исключения Telegram.
+        Что делает: то же, что `_request_wrapper`, но возвращает сам ответ: с `preload_content=False`
+        тело успешного ответа не читается, его можно читать по кускам (`stream_download`).
+        Где используется: `_request_wrapper`, `stream_download`.
+
+        Returns:
+            urllib3.BaseHTTPResponse: Ответ с кодом 2xx.
+
         """
         # Make sure to hint Telegram servers that we reuse connections by sending
         # "Connection: keep-alive" in the HTTP headers.
@@ -308,7 +323,7 @@ class Request:
 
         if 200 <= resp.status <= 299:
             # 200-299 range are HTTP success statuses
-            return resp.data
+            return resp
 
         try:
             message = self._get_error_message(self._load_json(resp.data))
@@ -363,7 +378,7 @@ class Request:
         for key, val in data.copy().items():
             if isinstance(val, InputFile):
                 # Convert the InputFile to urllib3 field format
-                data[key] = val.field_tuple
+                data[key] = val.stream_field_tuple
                 files = True
             elif isinstance(val, (float, int)):
                 # Urllib3 doesn't like floats it seems
@@ -378,20 +393,20 @@ class Request:
                         media_dict = med.to_dict()
                         media.append(media_dict)
                         if isinstance(med.media, InputFile):
-                            data[med.media.attach] = med.media.field_tuple
+                            data[med.media.attach] = med.media.stream_field_tuple
                             # if the file has a thumb, we also need to attach it to the data
                             if "thumb" in media_dict:
-                                data[med.thumb.attach] = med.thumb.field_tuple
+                                data[med.thumb.attach] = med.thumb.stream_field_tuple
                     data[key] = json.dumps(media)
                 # Single media
                 else:
                     # Attach and set val to attached name
                     media_dict = val.to_dict()
                     if isinstance(val.media, InputFile):
-                        data[val.media.attach] = val.media.field_tuple
+                        data[val.media.attach] = val.media.stream_field_tuple
                         # if the file has a thumb, we also need to attach it to the data
                         if "thumb" in media_dict:
-                            data[val.thumb.attach] = val.thumb.field_tuple
+                            data[val.thumb.attach] = val.thumb.stream_field_tuple
                     data[key] = json.dumps(media_dict)
             elif isinstance(val, list):
                 # In case we're sending files, we need to json-dump lists manually
@@ -400,7 +415,9 @@ class Request:
 
         # Use multipart upload if we're uploading files, otherwise use JSON
         if files:
-            result = self._request_wrapper('POST', url, fields=data, **urlopen_kwargs)
+            # Файлы читаются по кускам при отправке, тело целиком в памяти не собирается
+            body = MultipartStream(data)
+            result = self._request_wrapper('POST', url, body=body, headers=body.headers, **urlopen_kwargs)
         else:
             result = self._request_wrapper(
                 'POST',
@@ -428,6 +445,39 @@ class Request:
 
         return self._request_wrapper('GET', url, **urlopen_kwargs)
 
+    def stream_download(
+        self, url: str, out: IO, timeout: float = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> int:
+        """Скачивает файл по URL в `out` кусками по chunk_size, не держа файл целиком в памяти.
+
+        Args:
+            url (:obj:`str`): The web location we want to retrieve.
+            out (:obj:`io.BufferedWriter`): Куда писать, открыт на запись в бинарном режиме.
+            timeout (:obj:`int` | :obj:`float`, optional): Read timeout.
+            chunk_size (:obj:`int`, optional): Размер куска в байтах.
+
+        Returns:
+            :obj:`int`: Сколько байт записано.
+
+        """
+        urlopen_kwargs = {}
+        if timeout is not None:
+            urlopen_kwargs['timeout'] = Timeout(read=timeout, connect=self._connect_timeout)
+
+        resp = self._open('GET', url, preload_content=False, **urlopen_kwargs)
+        written = 0
+        try:
+            for chunk in resp.stream(chunk_size):
+                out.write(chunk)
+                written += len(chunk)
+        except urllib3.exceptions.HTTPError as error:
+            if is_timeout_error(error):
+                raise TimedOut() from error
+            raise NetworkError(f'urllib3 HTTPError {sanitize_telegram_bot_token(str(error))}') from error
+        finally:
+            resp.release_conn()
+        return written
+
     def download(self, url: str, filename: str, timeout: float = None) -> None:
         """Download a file by its URL.
 
@@ -438,7 +488,67 @@ class Request:
                 the connection pool).
             filename (:obj:`str`): The filename within the path to download the file.
 
+        Файл пишется во временный рядом с filename и заменяет его только после успешной загрузки:
+        при обрыве соединения прежний файл не портится и не остается недокачанным.
+
         """
-        buf = self.retrieve(url, timeout=timeout)
-        with open(filename, 'wb') as fobj:
-            fobj.write(buf)
+        with atomic_write(filename) as fobj:
+            self.stream_download(url, fobj, timeout=timeout)
+
+
+# Размер пула общего Request: столько потоков могут отправлять запросы одновременно,
+# не открывая новых соединений. Больше - через get_shared_request(con_pool_size=...)
+SHARED_CON_POOL_SIZE = 8
+
+_shared_requests: Dict[Tuple, Request] = {}
+_shared_requests_lock = threading.Lock()
+_shared_requests_pid = None
+
+
+def get_shared_request(
+    con_pool_size: int = None,
+    proxy_url: str = None,
+    urllib3_proxy_kwargs: JSONDict = None,
+    connect_timeout: float = 5.0,
+    read_timeout: float = 5.0,
+) -> Request:
+    """Общий на процесс :class:`Request` для одинаковых настроек прокси и таймаутов.
+    Что делает: возвращает один пул соединений urllib3 на набор настроек; если нужен пул больше
+    уже созданного, создает новый Request с пулом нужного размера и дальше отдает его.
+    После fork дочерний процесс получает новые Request, соединения родителя не используются.
+    Где используется: `Bot` без явного `request`, `log_to_telegram`.
+
+    Args:
+        con_pool_size (:obj:`int`, optional): Сколько соединений держать, по умолчанию
+            :attr:`SHARED_CON_POOL_SIZE`. Обычно равно числу потоков, которые отправляют запросы.
+        proxy_url, urllib3_proxy_kwargs, connect_timeout, read_timeout: Как у :class:`Request`.
+
+    Returns:
+        :class:`Request`
+    """
+    global _shared_requests_pid  # pylint: disable=W0603
+
+    if not proxy_url:
+        proxy_url = os.environ.get('HTTPS_PROXY') or os.environ.get('https_proxy')
+    key = (
+        proxy_url,
+        tuple(sorted((urllib3_proxy_kwargs or {}).items())),
+        connect_timeout,
+        read_timeout,
+    )
+    con_pool_size = con_pool_size or SHARED_CON_POOL_SIZE
+
+    with _shared_requests_lock:
+        if _shared_requests_pid != os.getpid():
+            _shared_requests.clear()
+            _shared_requests_pid = os.getpid()
+        request = _shared_requests.get(key)
+        if request is None or request.con_pool_size < con_pool_size:
+            request = _shared_requests[key] = Request(
+                con_pool_size=max(con_pool_size, request.con_pool_size if request else 0),
+                proxy_url=proxy_url,
+                urllib3_proxy_kwargs=urllib3_proxy_kwargs,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+            )
+        return request
@@ -0,0 +1,127 @@
+import threading
+import time
+from unittest import TestCase
+
+from integration_utils.vendors.telegram.error import BadRequest, RetryAfter
+from integration_utils.vendors.telegram.utils.ratelimiter import RateLimitedSender, TokenBucket
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+        self.flood = set()
+
+    def send_message(self, chat_id, text):
+        with self.lock:
+            if text in self.flood:
+                self.flood.discard(text)
+                raise RetryAfter(0.2)
+            if text == 'bad':
+                raise BadRequest('Chat not found')
+            self.sent.append((time.monotonic(), chat_id, text))
+        return text
+
+
+class TokenBucketTest(TestCase):
+    def test_rate(self):
+        bucket = TokenBucket(rate=2, burst=2, now=0)
+        bucket.consume(0)
+        bucket.consume(0)
+        self.assertAlmostEqual(bucket.wait_time(0), 0.5)
+        self.assertEqual(bucket.wait_time(0.5), 0)
+        bucket.pause(0.5, 3)
+        self.assertAlmostEqual(bucket.wait_time(0.5), 3.5)
+
+
+class RateLimitedSenderTest(TestCase):
+    def test_limits_and_chat_order(self):
+        bot = FakeBot()
+        sender = RateLimitedSender(bot, global_rate=40, global_burst=1, chat_rate=10, max_workers=4)
+        futures = [sender.send_message(chat_id, f'{chat_id}:{number}') for number in range(4) for chat_id in range(5)]
+        self.assertTrue(sender.join(5))
+        sender.close()
+
+        self.assertEqual([future.result() for future in futures], [f'{c}:{n}' for n in range(4) for c in range(5)])
+        times = [sent_at for sent_at, _, _ in bot.sent]
+        self.assertGreaterEqual(times[-1] - times[0], 19 / 40 * 0.9)
+        for chat_id in range(5):
+            chat = [(sent_at, text) for sent_at, sent_chat, text in bot.sent if sent_chat == chat_id]
+            self.assertEqual([text for _, text in chat], [f'{chat_id}:{n}' for n in range(4)])
+            for (first, _), (second, _) in zip(chat, chat[1:]):
+                self.assertGreaterEqual(second - first, 0.1 * 0.9)
+
+    def test_priority(self):
+        bot = FakeBot()
+        sender = RateLimitedSender(bot, global_rate=20, global_burst=1, max_workers=1)
+        sender.send_message(1, 'first').result(5)
+        # Следующий глобальный токен через 50 мс, к этому моменту в очереди обе задачи
+        sender.send_message(2, 'low', priority=10)
+        sender.send_message(3, 'high', priority=-10)
+        sender.join(5)
+        sender.close()
+        self.assertEqual([text for _, _, text in bot.sent], ['first', 'high', 'low'])
+
+    def test_retry_after_and_errors(self):
+        bot = FakeBot()
+        bot.flood.add('flood')
+        done = []
+        sender = RateLimitedSender(bot, global_rate=100, chat_rate=100)
+        flood = sender.send_message(1, 'flood', callback=done.append)
+        after = sender.send_message(1, 'after')
+        bad = sender.send_message(2, 'bad')
+        sender.join(5)
+        sender.close()
+
+        self.assertEqual(flood.result(), 'flood')
+        self.assertEqual(done, [flood])
+        self.assertIsInstance(bad.exception(), BadRequest)
+        self.assertEqual([text for _, chat_id, text in bot.sent if chat_id == 1], ['flood', 'after'])
+        self.assertEqual(sender.stats()['retry_after'], 1)
+
+    def test_cancel_queued(self):
+        bot = FakeBot()
+        done = []
+        sender = RateLimitedSender(bot, chat_rate=5)
+        futures = [sender.send_message(1, str(number)) for number in range(3)]
+        futures[1].add_done_callback(done.append)
+        # Вторая задача чата ждет токен 200 мс, отмена успевает раньше
+        self.assertTrue(futures[1].cancel())
+        self.assertTrue(sender.join(5))
+        sender.close()
+
+        self.assertEqual([text for _, _, text in bot.sent], ['0', '2'])
+        self.assertEqual(futures[2].result(), '2')
+        self.assertEqual(done, [futures[1]])
+        self.assertEqual(sender.stats(), {'queue_depth': 0, 'active': 0, 'sent': 2, 'errors': 0, 'retry_after': 0})
+
+    def test_close_cancels_pending(self):
+        bot = FakeBot()
+        sender = RateLimitedSender(bot, chat_rate=1)
+        futures = [sender.send_message(1, str(number)) for number in range(3)]
+        self.assertFalse(sender.close(timeout=0.3))
+        self.assertEqual(futures[0].result(), '0')
+        self.assertTrue(all(future.cancelled() for future in futures[1:]))
+        with self.assertRaises(RuntimeError):
+            sender.send_message(1, 'late')
+
+    def test_close_fails_retrying(self):
+        def flood(chat_id):
+            raise RetryAfter(5)
+
+        sender = RateLimitedSender(FakeBot())
+        future = sender.submit(flood, 1)
+        self.assertFalse(sender.close(timeout=0.3))
+        self.assertIsInstance(future.exception(1), RetryAfter)
+
+    def test_idle_chat_buckets_are_dropped(self):
+        bot = FakeBot()
+        sender = RateLimitedSender(bot, chat_rate=20)
+        futures = [sender.send_message(chat_id, str(chat_id)) for chat_id in range(5)]
+        self.assertTrue(sender.join(5))
+        self.assertEqual([future.result() for future in futures], [str(chat_id) for chat_id in range(5)])
+        # Корзина на 1 сообщение с rate=20 наполняется за 50 мс
+        time.sleep(0.2)
+        self.assertEqual(sender._chat_buckets, {})
+        sender.send_message(1, 'again').result(5)
+        sender.close()
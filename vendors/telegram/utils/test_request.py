@@ -0,0 +1,66 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from integration_utils.vendors.telegram import Bot
+from integration_utils.vendors.telegram.error import NetworkError
+from integration_utils.vendors.telegram.utils import request as request_module
+from integration_utils.vendors.telegram.utils.request import Request, get_shared_request
+
+
+class SharedRequestTest(TestCase):
+    def test_registry(self):
+        shared = get_shared_request()
+        self.assertIs(get_shared_request(), shared)
+        self.assertGreaterEqual(shared.con_pool_size, request_module.SHARED_CON_POOL_SIZE)
+        self.assertIsNot(get_shared_request(read_timeout=30), shared)
+        self.assertIsNot(get_shared_request(proxy_url='http://127.0.0.1:3128'), shared)
+
+        bigger = get_shared_request(con_pool_size=shared.con_pool_size + 4)
+        self.assertEqual(bigger.con_pool_size, shared.con_pool_size + 4)
+        self.assertIs(get_shared_request(), bigger)
+
+    def test_new_pool_after_fork(self):
+        shared = get_shared_request()
+        request_module._shared_requests_pid = -1
+        self.assertIsNot(get_shared_request(), shared)
+
+    def test_bot_uses_shared_request(self):
+        self.assertIs(Bot('123:token').request, get_shared_request())
+        self.assertIs(Bot('123:token').request, Bot('456:token').request)
+        own = Request()
+        self.assertIs(Bot('123:token', request=own).request, own)
+
+
+class DownloadTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.filename = os.path.join(self.directory, 'photo.jpg')
+        with open(self.filename, 'wb') as fobj:
+            fobj.write(b'old')
+
+    def download(self, *chunks, error=None):
+        def stream_download(url, out, timeout=None, chunk_size=None):
+            for chunk in chunks:
+                out.write(chunk)
+            if error is not None:
+                raise error
+            return sum(len(chunk) for chunk in chunks)
+
+        with mock.patch.object(Request, 'stream_download', side_effect=stream_download):
+            Request().download('https://api.telegram.org/file/bot123/photo.jpg', self.filename)
+
+    def test_replaces_file_after_download(self):
+        self.download(b'new ', b'content')
+        with open(self.filename, 'rb') as fobj:
+            self.assertEqual(fobj.read(), b'new content')
+        self.assertEqual(os.listdir(self.directory), ['photo.jpg'])
+
+    def test_keeps_file_on_error(self):
+        with self.assertRaises(NetworkError):
+            self.download(b'partial', error=NetworkError('connection reset'))
+        with open(self.filename, 'rb') as fobj:
+            self.assertEqual(fobj.read(), b'old')
+        self.assertEqual(os.listdir(self.directory), ['photo.jpg'])
@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+from unittest import TestCase
+
+from integration_utils import testing  # noqa: F401
+from integration_utils.vendors.bot_webhook import (
+    BUSY,
+    DUPLICATE,
+    QUEUED,
+    MaxWebhook,
+    MemoryDedupStore,
+    TelegramWebhook,
+    WebhookWorker,
+    get_max_update_key,
+)
+from integration_utils.vendors.telegram import Bot, Update
+
+
+def telegram_update(update_id, chat_id, text='hi'):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 1760860800, 'text': text,
+            'chat': {'id': chat_id, 'type': 'private'}, 'from': {'id': chat_id, 'is_bot': False, 'first_name': 'A'},
+        },
+    }
+
+
+def max_update(chat_id, mid, timestamp=1760860800000):
+    return {
+        'update_type': 'message_created', 'timestamp': timestamp,
+        'message': {'recipient': {'chat_id': chat_id}, 'body': {'mid': mid, 'text': 'hi'}},
+    }
+
+
+class WebhookWorkerTest(TestCase):
+    def test_chat_order_and_limit(self):
+        handled = []
+        lock = threading.Lock()
+        gate = threading.Event()
+
+        def handler(update):
+            gate.wait(5)
+            time.sleep(0.01)
+            with lock:
+                handled.append((update['chat'], update['number']))
+
+        worker = WebhookWorker(handler, max_workers=4, max_pending=20, get_chat_id=lambda update: update['chat'])
+        for number in range(5):
+            for chat in range(4):
+                self.assertTrue(worker.submit({'chat': chat, 'number': number}))
+        self.assertFalse(worker.submit({'chat': 9, 'number': 0}))
+        gate.set()
+        self.assertTrue(worker.close(5))
+
+        for chat in range(4):
+            self.assertEqual([number for handled_chat, number in handled if handled_chat == chat], list(range(5)))
+        self.assertEqual(worker.stats()['processed'], 20)
+        with self.assertRaises(RuntimeError):
+            worker.submit({'chat': 1, 'number': 5})
+
+    def test_close_drops_not_started(self):
+        handled = []
+        gate = threading.Event()
+
+        def handler(update):
+            gate.wait(5)
+            handled.append(update['number'])
+
+        worker = WebhookWorker(handler, max_workers=1, get_chat_id=lambda update: update['chat'])
+        for number in range(3):
+            worker.submit({'chat': number % 2, 'number': number})
+        # Первое обновление уже обрабатывается, второй чат ждет свободного потока
+        self.assertFalse(worker.close(0.1))
+        gate.set()
+        self.assertTrue(worker.join(5))
+        self.assertEqual(handled, [0])
+        self.assertEqual(worker.stats()['active_chats'], 0)
+
+    def test_dedup_store(self):
+        store = MemoryDedupStore(ttl=60, max_size=2)
+        self.assertTrue(store.add('a'))
+        self.assertFalse(store.add('a'))
+        store.add('b')
+        store.add('c')
+        self.assertTrue(store.add('a'))
+
+
+class TelegramWebhookTest(TestCase):
+    def setUp(self):
+        from django.test import RequestFactory
+
+        self.factory = RequestFactory()
+        self.received = []
+        self.webhook = TelegramWebhook(Bot('123:token'), self.received.append, secret='s3cret', max_workers=2)
+        self.view = self.webhook.as_view()
+
+    def post(self, update, secret='s3cret'):
+        headers = {'HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN': secret} if secret else {}
+        request = self.factory.post('/tg/', data=json.dumps(update), content_type='application/json', **headers)
+        return self.view(request)
+
+    def test_view(self):
+        self.assertEqual(self.post(telegram_update(1, 10)).status_code, 200)
+        self.assertEqual(self.post(telegram_update(1, 10)).status_code, 200)
+        self.assertEqual(self.post(telegram_update(2, 10), secret='wrong').status_code, 403)
+        self.assertEqual(self.post(telegram_update(2, 10), secret=None).status_code, 403)
+        self.assertEqual(self.view(self.factory.get('/tg/')).status_code, 405)
+        self.assertEqual(self.post('not an update').status_code, 400)
+        self.assertTrue(self.webhook.worker.close(5))
+
+        self.assertEqual(len(self.received), 1)
+        self.assertIsInstance(self.received[0], Update)
+        self.assertEqual(self.received[0].message.text, 'hi')
+        self.assertEqual(self.webhook.stats()['duplicates'], 1)
+
+    def test_busy_is_not_duplicate(self):
+        webhook = TelegramWebhook(Bot('123:token'), self.received.append, max_pending=0)
+        self.assertEqual(webhook.accept(telegram_update(1, 10)), BUSY)
+        webhook.worker.max_pending = 10
+        self.assertEqual(webhook.accept(telegram_update(1, 10)), QUEUED)
+        self.assertEqual(webhook.accept(telegram_update(1, 10)), DUPLICATE)
+        webhook.worker.close(5)
+
+
+class MaxWebhookTest(TestCase):
+    def test_accept(self):
+        received = []
+        bot = type('FakeMaxiBot', (), {'_process_update': lambda self, update: received.append(update)})()
+        webhook = MaxWebhook(bot)
+        self.assertEqual(webhook.accept(max_update(1, 'mid.1')), QUEUED)
+        self.assertEqual(webhook.accept(max_update(1, 'mid.1')), DUPLICATE)
+        self.assertEqual(webhook.accept(max_update(1, 'mid.2')), QUEUED)
+        webhook.worker.close(5)
+        self.assertEqual([update['message']['body']['mid'] for update in received], ['mid.1', 'mid.2'])
+        self.assertEqual(get_max_update_key(max_update(1, 'mid.1')), 'message_created:mid.1:1760860800000')
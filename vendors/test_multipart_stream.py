@@ -0,0 +1,130 @@
+import io
+import json
+import os
+import tempfile
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from integration_utils.vendors.multipart_stream import MultipartStream
+from integration_utils.vendors.telegram import InputFile
+from integration_utils.vendors.telegram.utils.request import Request
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n' + b'\0' * 24
+
+
+def parse_multipart(body, content_type):
+    message = BytesParser(policy=HTTP).parsebytes(b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+    return {part.get_param('name', header='content-disposition'): (part.get_filename(), part.get_payload(decode=True))
+            for part in message.iter_parts()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    payload = b''
+
+    def do_POST(self):
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            body = b''
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                chunk = self.rfile.read(size + 2)[:size]
+                if not size:
+                    break
+                body += chunk
+        else:
+            body = self.rfile.read(int(self.headers['Content-Length']))
+        fields = parse_multipart(body, self.headers['Content-Type'])
+        result = {name: [file_name, len(content), content[:8].hex()] for name, (file_name, content) in fields.items()}
+        self._reply(json.dumps({'ok': True, 'result': result}).encode())
+
+    def do_GET(self):
+        self._reply(self.payload, 'application/octet-stream')
+
+    def _reply(self, body, content_type='application/json'):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MultipartStreamTest(TestCase):
+    def test_body(self):
+        stream = MultipartStream(
+            [('chat_id', '10'), ('caption', 'a "b"\nc'), ('document', ('file.bin', io.BytesIO(b'x' * 300), 'text/plain'))],
+            chunk_size=64,
+        )
+        chunks = []
+        while True:
+            chunk = stream.read(100)
+            if not chunk:
+                break
+            self.assertLessEqual(len(chunk), 100)
+            chunks.append(chunk)
+        body = b''.join(chunks)
+        self.assertEqual(len(body), stream.len)
+        fields = parse_multipart(body, stream.content_type)
+        self.assertEqual(fields['chat_id'][1], b'10')
+        self.assertEqual(fields['caption'][1], b'a "b"\nc')
+        self.assertEqual(fields['document'], ('file.bin', b'x' * 300))
+
+    def test_same_as_urllib3(self):
+        from urllib3 import encode_multipart_formdata
+
+        fields = [('chat_id', '10'), ('document', ('a "x".bin', b'123', 'text/plain'))]
+        body, content_type = encode_multipart_formdata(fields, boundary='boundary')
+        stream = MultipartStream(fields, boundary='boundary')
+        self.assertEqual(stream.read(), body)
+        self.assertEqual(stream.content_type, content_type)
+
+    def test_iterator_has_no_length(self):
+        stream = MultipartStream({'data': ('a.bin', iter([b'ab', b'cd']))})
+        self.assertIsNone(stream.len)
+        self.assertNotIn('Content-Length', stream.headers)
+        self.assertEqual(parse_multipart(stream.read(), stream.content_type)['data'], ('a.bin', b'abcd'))
+
+
+class TelegramStreamingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}/'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_input_file_is_not_read_at_init(self):
+        source = io.BytesIO(PNG_HEADER + b'y' * 1000)
+        input_file = InputFile(source, filename='a.png')
+        self.assertEqual(input_file.mimetype, 'image/png')
+        self.assertEqual(source.tell(), 0)
+        self.assertEqual(input_file.size, 1032)
+        self.assertEqual(b''.join(input_file.iter_chunks(100)), source.getvalue())
+        self.assertEqual(b''.join(input_file.iter_chunks(100)), source.getvalue())
+
+    def test_upload(self):
+        request = Request()
+        with tempfile.TemporaryFile() as file:
+            file.write(PNG_HEADER + b'z' * 200000)
+            file.seek(0)
+            result = request.post(self.url, {'chat_id': 1, 'photo': InputFile(file, filename='p.png')})
+        self.assertEqual(result['photo'], ['p.png', 200032, PNG_HEADER[:8].hex()])
+        self.assertEqual(result['chat_id'][1], 1)
+
+        chunks = iter([PNG_HEADER, b'a' * 100, b'b' * 100])
+        result = request.post(self.url, {'document': InputFile(chunks, filename='d.png')})
+        self.assertEqual(result['document'], ['d.png', 232, PNG_HEADER[:8].hex()])
+
+    def test_download(self):
+        _Handler.payload = os.urandom(300000)
+        out = io.BytesIO()
+        self.assertEqual(Request().stream_download(self.url, out, chunk_size=1024), 300000)
+        self.assertEqual(out.getvalue(), _Handler.payload)